@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the backend.
+
+Run from the ``backend`` directory, e.g. ``python -m benchmarks.suite`` for
+the full suite with regression thresholds, ``python -m benchmarks.synthetic``
+to generate test CSVs or ``python -m benchmarks.pdf_charts``.
+"""
@@ -0,0 +1,139 @@
+"""
+Compare CSV parsing before and after column pruning and explicit dtypes.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.csv_parsing [--rows 1000000] [--extra-columns 0 3]
+        [--dirty-rate 0 0.01] [--chunksize 100000]
+
+Every combination of ``--extra-columns`` and ``--dirty-rate`` is a synthetic
+CSV (see ``synthetic.py``) that is validated and summarized three ways:
+
+- ``baseline``: ``pd.read_csv`` with every column and inferred dtypes, as
+  uploads were parsed before
+- ``c``: ``accumulate_csv`` with pandas, reading only ``REQUIRED_COLUMNS``
+  with the dtypes in ``CSV_DTYPES``
+- ``pyarrow``: ``accumulate_csv`` with pyarrow's streaming reader
+
+Each variant runs in a fresh interpreter: once timed, then once more for
+its peak memory, which adds the ``tracemalloc`` peak (Python objects and
+pandas/numpy buffers) to the peak of pyarrow's memory pool (which
+``tracemalloc`` cannot see). The in-memory size of the largest parsed
+chunk is reported too.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from .synthetic import write_equipment_csv
+
+
+VARIANTS = ["baseline", "c", "pyarrow"]
+
+
+def run_variant(variant, path, chunksize):
+    """Parse ``path`` once; runs in a child process."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+    import pandas as pd
+    import pyarrow as pa
+
+    from equipment.analytics import (
+        SummaryAccumulator,
+        ValidationReport,
+        accumulate_csv,
+        validate_chunk,
+    )
+
+    largest_chunk = 0
+
+    def measure_chunk(chunk):
+        nonlocal largest_chunk
+        largest_chunk = max(largest_chunk, int(chunk.memory_usage(deep=True).sum()))
+
+    def parse():
+        with open(path, "rb") as csv_file:
+            if variant == "baseline":
+                accumulator = SummaryAccumulator()
+                report = ValidationReport()
+                for chunk in pd.read_csv(csv_file, chunksize=chunksize):
+                    measure_chunk(chunk)
+                    accumulator.update(validate_chunk(chunk, report, drop_invalid=True))
+            else:
+                accumulate_csv(
+                    csv_file,
+                    chunksize,
+                    on_chunk=measure_chunk,
+                    drop_invalid=True,
+                    engine=variant,
+                )
+
+    start = time.perf_counter()
+    parse()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    parse()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": seconds,
+        "peak_mb": (traced_peak + pa.default_memory_pool().max_memory()) / 1024 / 1024,
+        "largest_chunk_mb": largest_chunk / 1024 / 1024,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--extra-columns", type=int, nargs="+", default=[0, 3])
+    parser.add_argument("--dirty-rate", type=float, nargs="+", default=[0.0, 0.01])
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--child", nargs=2, metavar=("VARIANT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        variant, path = args.child
+        print(json.dumps(run_variant(variant, path, args.chunksize)))
+        return
+
+    print(
+        f"{'extra':>5}  {'dirty':>5}  {'variant':<8}  {'seconds':>8}  "
+        f"{'peak MB':>8}  {'chunk MB':>8}"
+    )
+    with tempfile.TemporaryDirectory(prefix="equipment-csv-") as scratch:
+        for extra_columns in args.extra_columns:
+            for dirty_rate in args.dirty_rate:
+                path = Path(scratch) / f"equipment_{extra_columns}_{dirty_rate}.csv"
+                write_equipment_csv(
+                    path, args.rows, dirty_rate=dirty_rate, extra_columns=extra_columns
+                )
+                for variant in VARIANTS:
+                    output = subprocess.run(
+                        [
+                            sys.executable, "-m", "benchmarks.csv_parsing",
+                            "--chunksize", str(args.chunksize),
+                            "--child", variant, str(path),
+                        ],
+                        capture_output=True, text=True, check=True,
+                    ).stdout
+                    result = json.loads(output.splitlines()[-1])
+                    print(
+                        f"{extra_columns:>5}  {dirty_rate:>5}  {variant:<8}  "
+                        f"{result['seconds']:>8.2f}  {result['peak_mb']:>8.1f}  "
+                        f"{result['largest_chunk_mb']:>8.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Concurrent-load comparison of the WSGI and ASGI deployments.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.load [--readers 32] [--uploaders 16] [--duration 20]
+        [--upload-rate 262144] [--workers 1] [--threads 1] [--rows 5000]
+        [--output load_results.json]
+
+Starts the API twice on a throwaway database: under gunicorn with
+``--workers`` processes of ``--threads`` threads (the defaults match the
+previous ``start.sh``), and under uvicorn with ``--workers`` processes and
+``ASYNC_API=True``. Against each,
+``--uploaders`` clients keep posting distinct ``--rows``-row CSVs, sending
+the body at ``--upload-rate`` bytes per second like a client on a slow
+link, while ``--readers`` clients keep reading ``/api/history/``. Every
+client has its own keep-alive connection; the run lasts ``--duration``
+seconds.
+
+The WSGI server can only work on ``workers * threads`` requests at a time,
+and a thread reading a slow upload body is busy for the whole transfer, so
+reads queue behind uploads. The ASGI server receives bodies on its event
+loop and only hands complete uploads to the blocking pool, so reads keep
+flowing. Reported per server: completed reads and uploads per second,
+their p50/p99 latency and failed requests. Pass ``--upload-rate 0`` to
+send bodies at full speed; on few CPU cores the per-request overhead of
+Django's async middleware adapters then makes the WSGI server the faster
+one.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .synthetic import write_equipment_csv
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(kind, port, args):
+    if kind == "wsgi":
+        return [
+            sys.executable, "-m", "gunicorn", "config.wsgi:application",
+            "--bind", f"127.0.0.1:{port}",
+            "--workers", str(args.workers),
+            "--threads", str(args.threads),
+            "--timeout", "120",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "config.asgi:application",
+        "--port", str(port),
+        "--workers", str(args.workers),
+        "--no-access-log",
+    ]
+
+
+def wait_until_ready(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during start-up")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/api/history/")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError("Server did not start")
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Client(threading.Thread):
+    """Sends requests on one keep-alive connection until ``stop`` is set."""
+
+    def __init__(self, port, stop, make_request, rate=0):
+        super().__init__(daemon=True)
+        self.port = port
+        self.stop = stop
+        self.make_request = make_request
+        self.rate = rate
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+        n = 0
+        while not self.stop.is_set():
+            method, path, body, headers = self.make_request(n)
+            n += 1
+            start = time.perf_counter()
+            try:
+                if body and self.rate:
+                    self.send_slowly(conn, method, path, body, headers)
+                else:
+                    conn.request(method, path, body, headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+            if self.stop.is_set():
+                break  # cut off by the end of the run, not by the server
+            if ok:
+                self.latencies.append(time.perf_counter() - start)
+            else:
+                self.errors += 1
+        conn.close()
+
+    def send_slowly(self, conn, method, path, body, headers):
+        conn.putrequest(method, path)
+        for name, value in {**headers, "Content-Length": str(len(body))}.items():
+            conn.putheader(name, value)
+        conn.endheaders()
+        chunk_size = max(1, self.rate // 10)
+        for offset in range(0, len(body), chunk_size):
+            conn.send(body[offset:offset + chunk_size])
+            time.sleep(0.1)
+
+
+def run_load(port, args, csv_body):
+    header, rows = csv_body.split(b"\n", 1)
+
+    def read(n):
+        return "GET", "/api/history/", None, {}
+
+    def uploader(client_id):
+        def upload(n):
+            # A distinct first row so no upload is a duplicate.
+            unique = f"LOAD-{client_id}-{n},Pump,{n % 500 + 1},5.0,100.0\n".encode()
+            return "POST", "/api/upload-csv/", header + b"\n" + unique + rows, {
+                "Content-Type": "text/csv",
+                "Content-Disposition": f'attachment; filename="load-{client_id}-{n}.csv"',
+            }
+        return upload
+
+    stop = threading.Event()
+    readers = [Client(port, stop, read) for _ in range(args.readers)]
+    uploaders = [
+        Client(port, stop, uploader(i), args.upload_rate) for i in range(args.uploaders)
+    ]
+    for client in readers + uploaders:
+        client.start()
+    time.sleep(args.duration)
+    stop.set()
+    for client in readers + uploaders:
+        client.join(timeout=120)
+
+    result = {}
+    for name, clients in (("reads", readers), ("uploads", uploaders)):
+        latencies = [value for client in clients for value in client.latencies]
+        result[name] = {
+            "per_second": len(latencies) / args.duration,
+            "p50_s": statistics.median(latencies) if latencies else None,
+            "p99_s": percentile(latencies, 0.99),
+            "errors": sum(client.errors for client in clients),
+        }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--uploaders", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--upload-rate", type=int, default=256 * 1024)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--output", type=Path, default=Path("load_results.json"))
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="equipment-load-") as scratch:
+        scratch = Path(scratch)
+        csv_path = write_equipment_csv(scratch / "load.csv", args.rows)
+        csv_body = csv_path.read_bytes()
+
+        for kind in ("wsgi", "asgi"):
+            data_dir = scratch / kind
+            env = {
+                **os.environ,
+                "DATABASE_URL": f"sqlite:///{data_dir / 'db.sqlite3'}",
+                "DATASET_ARCHIVE_ROOT": str(data_dir / "archive"),
+                "UPLOAD_SPOOL_ROOT": str(data_dir / "spool"),
+                "CACHE_LOCATION": str(data_dir / "cache"),
+                "PDF_PRERENDER": "False",
+                "ASYNC_API": str(kind == "asgi"),
+            }
+            data_dir.mkdir()
+            subprocess.run(
+                [sys.executable, "manage.py", "migrate", "-v", "0"],
+                cwd=BACKEND_DIR, env=env, check=True,
+            )
+
+            port = free_port()
+            process = subprocess.Popen(
+                server_command(kind, port, args),
+                cwd=BACKEND_DIR, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_until_ready(port, process)
+                results[kind] = run_load(port, args, csv_body)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+                shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(f"{'server':<6}  {'kind':<8}  {'req/s':>7}  {'p50 ms':>8}  {'p99 ms':>8}  {'errors':>6}")
+    for kind, result in results.items():
+        for name, stats in result.items():
+            p50, p99 = (
+                f"{stats[key] * 1000:.0f}" if stats[key] is not None else "-"
+                for key in ("p50_s", "p99_s")
+            )
+            print(
+                f"{kind:<6}  {name:<8}  {stats['per_second']:>7.1f}  "
+                f"{p50:>8}  {p99:>8}  {stats['errors']:>6}"
+            )
+
+    parameters = {**vars(args), "output": str(args.output)}
+    args.output.write_text(json.dumps({"parameters": parameters, "results": results}, indent=2))
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
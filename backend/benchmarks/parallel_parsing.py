@@ -0,0 +1,108 @@
+"""
+Time serial and byte-range parallel parsing of one large upload.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.parallel_parsing [--rows 20000000] [--workers 1 2 4 8]
+        [--repeat 3]
+
+Writes a synthetic ``--rows``-row CSV (see ``synthetic.py``), then, for
+every ``--workers`` count, validates, summarizes and archives it the way
+``ingest_csv`` does, with ``PROCESS_WORKERS`` set to that count: one worker
+is the serial parse, more split the file into that many byte ranges. Each
+count runs in a fresh interpreter whose pool is started before timing,
+since a server keeps its pool warm between uploads. Reported: the best of
+``--repeat`` runs and the speedup over one worker.
+
+The speedup only approaches the worker count with as many idle cores and
+a file already in the page cache; merging the partial results is cheap.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .synthetic import write_equipment_csv
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def run_parse(path, repeat):
+    """Parse ``path`` ``repeat`` times and print the best time; runs in a child."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+    from django.conf import settings
+
+    from equipment.archive import delete_archive
+    from equipment.ingest import archive_csv
+    from equipment.parallel import archive_csv_parallel, plan_ranges
+    from equipment.processes import get_process_pool
+
+    pool = get_process_pool()
+    list(pool.map(time.sleep, [0.5] * settings.PROCESS_WORKERS))
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with open(path, "rb") as csv_file:
+            plan = plan_ranges(csv_file)
+            if plan is None:
+                accumulator, archive_name, _ = archive_csv(csv_file)
+            else:
+                accumulator, archive_name, _ = archive_csv_parallel(*plan)
+        elapsed = time.perf_counter() - start
+        accumulator.result()
+        delete_archive(archive_name)
+        best = elapsed if best is None else min(best, elapsed)
+    print(best)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="equipment-parallel-") as scratch:
+        scratch = Path(scratch)
+        path = write_equipment_csv(scratch / "upload.csv", args.rows)
+        size_mb = path.stat().st_size / 1024 / 1024
+        print(f"{args.rows} rows, {size_mb:.0f} MB")
+
+        baseline = None
+        print(f"{'workers':>7}  {'seconds':>8}  {'MB/s':>7}  {'speedup':>7}")
+        for workers in args.workers:
+            env = {
+                **os.environ,
+                "PROCESS_WORKERS": str(workers),
+                "PARALLEL_PARSE_MIN_BYTES": "0",
+                "DATASET_ARCHIVE_ROOT": str(scratch / "archive"),
+            }
+            output = subprocess.run(
+                [
+                    sys.executable, "-c",
+                    "import sys; from benchmarks.parallel_parsing import run_parse; "
+                    "run_parse(sys.argv[1], int(sys.argv[2]))",
+                    str(path), str(args.repeat),
+                ],
+                cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            seconds = float(output.split()[-1])
+            baseline = baseline or seconds
+            print(
+                f"{workers:>7}  {seconds:>8.2f}  {size_mb / seconds:>7.1f}  "
+                f"{baseline / seconds:>6.2f}x"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Compare PDF report rendering with vector and matplotlib charts.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.pdf_charts [--repeat 20] [--types 5 40]
+
+Each renderer draws the same report for synthetic datasets with the given
+numbers of equipment Types. Mean and best render time and PDF size are
+printed per renderer. The first render of each renderer is a warm-up and is
+not timed, so one-off import cost is not counted.
+"""
+
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import django
+
+
+def synthetic_dataset(type_count):
+    distribution = {f"Type {i + 1:02d}": 1000 - i * 7 for i in range(type_count)}
+    return SimpleNamespace(
+        filename=f"benchmark_{type_count}_types.csv",
+        uploaded_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        summary={
+            "total_equipment": sum(distribution.values()),
+            "average_flowrate": 175.26,
+            "average_pressure": 35.1,
+            "average_temperature": 81.2,
+            "type_distribution": distribution,
+        },
+        type_statistics={},
+    )
+
+
+def measure(generate_pdf, dataset, renderer, repeat):
+    generate_pdf(dataset, chart_renderer=renderer)  # warm-up
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pdf = generate_pdf(dataset, chart_renderer=renderer).getvalue()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "mean_ms": statistics.mean(timings) * 1000,
+        "best_ms": min(timings) * 1000,
+        "size_bytes": len(pdf),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--types", type=int, nargs="+", default=[5, 40])
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+    from equipment.reports import CHART_RENDERERS, generate_pdf
+
+    print(f"{'types':>5}  {'renderer':<10}  {'mean ms':>8}  {'best ms':>8}  {'size KB':>8}")
+    for type_count in args.types:
+        dataset = synthetic_dataset(type_count)
+        for renderer in CHART_RENDERERS:
+            result = measure(generate_pdf, dataset, renderer, args.repeat)
+            print(
+                f"{type_count:>5}  {renderer:<10}  {result['mean_ms']:>8.1f}  "
+                f"{result['best_ms']:>8.1f}  {result['size_bytes'] / 1024:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
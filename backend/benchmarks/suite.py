@@ -0,0 +1,250 @@
+"""
+Benchmark suite with regression thresholds.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.suite [--rows 1000 100000] [--types 20]
+        [--dirty-rate 0.01] [--repeat 3] [--output bench_results.json]
+        [--thresholds benchmarks/thresholds.json]
+
+For every ``--rows`` size a synthetic CSV (see ``synthetic.py``) is timed
+through ``pd.read_csv`` (required columns only, ``CSV_DTYPES``) plus
+validation and ``compute_summary``, and through
+``POST /api/upload-csv/``. ``generate_pdf``, ``GET /api/history/`` and
+``GET /api/pdf/`` (cold and cached) are then timed against the last upload.
+Endpoints are called with Django's test client against a throwaway test
+database, archive, spool and cache. ``app_startup`` times a fresh
+interpreter running ``django.setup()`` and loading the URL patterns; its
+memory is the child's, so no peak is recorded for it.
+
+Each case runs once untimed as a warm-up, then ``--repeat`` timed runs,
+then once more under ``tracemalloc`` for its peak Python heap (pandas and
+numpy buffers included; pyarrow's own allocator is not). Results go to
+``--output`` as JSON. A case with an entry in ``--thresholds`` fails when
+its median time or peak memory exceeds it, and any failure makes the run
+exit with status 1. The checked-in ``thresholds.json`` allows roughly three
+times the timings of a typical developer laptop with the default
+``--types`` and ``--dirty-rate``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+
+from .synthetic import write_equipment_csv
+
+
+DEFAULT_THRESHOLDS = Path(__file__).with_name("thresholds.json")
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+STARTUP_SCRIPT = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+def measure(func, repeat, setup=None, trace_memory=True):
+    """Time ``func`` and record its peak traced memory; see the module docstring."""
+    def run():
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    run()  # warm-up
+    timings = [run() for _ in range(repeat)]
+    result = {
+        "runs": repeat,
+        "median_s": statistics.median(timings),
+        "best_s": min(timings),
+    }
+    if not trace_memory:
+        return result
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result["peak_mb"] = peak / 1024 / 1024
+    return result
+
+
+def check(result, threshold):
+    """Return the list of limits ``result`` exceeds."""
+    exceeded = []
+    if "seconds" in threshold and result["median_s"] > threshold["seconds"]:
+        exceeded.append(f"median {result['median_s']:.3f}s > {threshold['seconds']}s")
+    if "peak_mb" in threshold and result.get("peak_mb", 0) > threshold["peak_mb"]:
+        exceeded.append(f"peak {result['peak_mb']:.1f} MB > {threshold['peak_mb']} MB")
+    return exceeded
+
+
+def run_cases(args, data_dir):
+    import pandas as pd
+    from django.core.cache import cache
+    from django.test import Client
+
+    from equipment.analytics import (
+        CSV_DTYPES,
+        REQUIRED_COLUMNS,
+        ValidationReport,
+        compute_summary,
+        validate_chunk,
+    )
+    from equipment.models import Dataset
+    from equipment.reports import generate_pdf
+
+    client = Client()
+    upload_url = "/api/upload-csv/" + ("?drop_invalid=1" if args.dirty_rate else "")
+
+    def reset_datasets():
+        # Deleting makes the next upload a new dataset, not a duplicate.
+        Dataset.objects.all().delete()
+        cache.clear()
+
+    def expect(response, status=200):
+        if response.status_code != status:
+            raise RuntimeError(
+                f"{response.request['PATH_INFO']} returned {response.status_code}"
+            )
+        return response
+
+    cases = {}
+    for rows in args.rows:
+        path = data_dir / f"equipment_{rows}_{args.types}_{args.dirty_rate}_{args.seed}.csv"
+        if not path.exists():
+            write_equipment_csv(path, rows, args.types, args.dirty_rate, args.seed)
+
+        def read_and_summarize(path=path):
+            frame = pd.read_csv(path, usecols=REQUIRED_COLUMNS, dtype=CSV_DTYPES)
+            frame = validate_chunk(frame, ValidationReport(), drop_invalid=True)
+            compute_summary(frame)
+
+        def upload(path=path):
+            with open(path, "rb") as csv_file:
+                expect(client.post(upload_url, {"file": csv_file}))
+
+        cases[f"read_csv_summary@{rows}"] = (read_and_summarize, None)
+        cases[f"api_upload_csv@{rows}"] = (upload, reset_datasets)
+
+    for name, (func, setup) in cases.items():
+        yield name, measure(func, args.repeat, setup)
+
+    # The last upload stays in place for the size-independent cases.
+    dataset = Dataset.objects.latest("uploaded_at")
+    yield "generate_pdf", measure(lambda: generate_pdf(dataset), args.repeat)
+    yield "api_history", measure(
+        lambda: expect(client.get("/api/history/")), args.repeat, cache.clear
+    )
+    yield "api_pdf_cold", measure(
+        lambda: expect(client.get("/api/pdf/")), args.repeat, cache.clear
+    )
+    yield "api_pdf_cached", measure(lambda: expect(client.get("/api/pdf/")), args.repeat)
+
+    def start_app():
+        subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT], cwd=BACKEND_DIR, check=True
+        )
+
+    yield "app_startup", measure(start_app, args.repeat, trace_memory=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--types", type=int, default=20)
+    parser.add_argument("--dirty-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--thresholds", type=Path, default=DEFAULT_THRESHOLDS)
+    parser.add_argument(
+        "--data-dir", type=Path, help="Keep generated CSVs here between runs"
+    )
+    args = parser.parse_args(argv)
+
+    thresholds = json.loads(args.thresholds.read_text()) if args.thresholds.exists() else {}
+
+    with tempfile.TemporaryDirectory(prefix="equipment-bench-") as scratch:
+        scratch = Path(scratch)
+        for name in ("DATASET_ARCHIVE_ROOT", "UPLOAD_SPOOL_ROOT", "CACHE_LOCATION"):
+            os.environ[name] = str(scratch / name.lower())
+        os.environ["PDF_PRERENDER"] = "False"
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+        django.setup()
+
+        from django.test.runner import DiscoverRunner
+        from django.test.utils import setup_test_environment, teardown_test_environment
+
+        data_dir = args.data_dir or scratch
+        data_dir.mkdir(parents=True, exist_ok=True)
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0)
+        databases = runner.setup_databases()
+        results = {}
+        try:
+            print(f"{'case':<28}  {'median s':>9}  {'best s':>9}  {'peak MB':>8}")
+            for name, result in run_cases(args, data_dir):
+                threshold = thresholds.get(name)
+                if threshold is not None:
+                    result["threshold"] = threshold
+                    result["exceeded"] = check(result, threshold)
+                results[name] = result
+                peak = f"{result['peak_mb']:>8.1f}" if "peak_mb" in result else f"{'-':>8}"
+                print(
+                    f"{name:<28}  {result['median_s']:>9.3f}  {result['best_s']:>9.3f}  "
+                    f"{peak}  {'; '.join(result.get('exceeded', []))}"
+                )
+        finally:
+            runner.teardown_databases(databases)
+            teardown_test_environment()
+
+    failed = [name for name, result in results.items() if result.get("exceeded")]
+    args.output.write_text(
+        json.dumps(
+            {
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "parameters": {
+                    "rows": args.rows,
+                    "types": args.types,
+                    "dirty_rate": args.dirty_rate,
+                    "seed": args.seed,
+                    "repeat": args.repeat,
+                },
+                "results": results,
+                "failed": failed,
+            },
+            indent=2,
+        )
+    )
+    print(f"Results written to {args.output}")
+
+    if failed:
+        print(f"Regressions: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Deterministic synthetic equipment CSVs.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.synthetic out.csv [--rows 1000000] [--types 20]
+        [--dirty-rate 0.01] [--extra-columns 0] [--seed 0]
+
+The same arguments always produce the same bytes. Type frequencies fall off
+as 1/rank, like real inventories where a few Types dominate. With a
+non-zero ``dirty_rate``, that fraction of cells is spoiled: text cells are
+blanked, numeric cells become, in equal shares, a blank, a non-number
+(``unknown``) or a negative out-of-range value, so every validation path
+gets exercised. ``extra_columns`` appends that many free-text columns the
+app does not use, like the notes and locations of real inventory exports.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+# Rows generated per block; fixed so the output does not depend on memory.
+BLOCK_ROWS = 100_000
+
+# (mean, standard deviation) of each numeric column.
+DISTRIBUTIONS = {
+    "Flowrate": (150.0, 40.0),
+    "Pressure": (6.0, 1.5),
+    "Temperature": (110.0, 25.0),
+}
+
+
+def type_names(types):
+    return [f"Type-{i + 1:03d}" for i in range(types)]
+
+
+def _spoil(values, rng, dirty_rate, numeric):
+    """Replace a ``dirty_rate`` share of ``values`` with invalid cells."""
+    dirty = rng.random(len(values)) < dirty_rate
+    kind = rng.integers(0, 3, len(values))
+    if not dirty.any():
+        return values
+
+    values = values.astype(object)
+    if not numeric:
+        # Blank is the only invalid text cell.
+        values[dirty] = None
+        return values
+    values[dirty & (kind == 0)] = None
+    values[dirty & (kind == 1)] = "unknown"
+    values[dirty & (kind == 2)] = -1.0
+    return values
+
+
+def generate_block(start, rows, types, dirty_rate, rng, extra_columns=0):
+    weights = 1.0 / np.arange(1, types + 1)
+    names = np.array(type_names(types), dtype=object)
+
+    columns = {
+        "Equipment Name": np.array(
+            [f"EQ-{i:08d}" for i in range(start, start + rows)], dtype=object
+        ),
+        "Type": names[rng.choice(types, size=rows, p=weights / weights.sum())],
+    }
+    for col, (mean, std) in DISTRIBUTIONS.items():
+        columns[col] = np.abs(rng.normal(mean, std, rows)).round(2)
+
+    for col, values in columns.items():
+        columns[col] = _spoil(values, rng, dirty_rate, numeric=col in DISTRIBUTIONS)
+    for i in range(extra_columns):
+        columns[f"Note {i + 1}"] = np.array(
+            [f"Inspected by team {code:06d}" for code in rng.integers(0, 10**6, rows)],
+            dtype=object,
+        )
+    return pd.DataFrame(columns)
+
+
+def write_equipment_csv(path, rows, types=20, dirty_rate=0.0, seed=0, extra_columns=0):
+    """Write ``rows`` synthetic equipment rows to ``path``."""
+    rng = np.random.default_rng(seed)
+    with open(path, "w", newline="") as csv_file:
+        for start in range(0, rows, BLOCK_ROWS):
+            block = generate_block(
+                start, min(BLOCK_ROWS, rows - start), types, dirty_rate, rng, extra_columns
+            )
+            block.to_csv(csv_file, header=start == 0, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--types", type=int, default=20)
+    parser.add_argument("--dirty-rate", type=float, default=0.0)
+    parser.add_argument("--extra-columns", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    write_equipment_csv(
+        args.path, args.rows, args.types, args.dirty_rate, args.seed, args.extra_columns
+    )
+
+
+if __name__ == "__main__":
+    main()
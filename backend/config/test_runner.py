@@ -0,0 +1,49 @@
+"""
+Test runner that keeps a test run's files out of the working tree.
+
+Uploads write archives and spool files and the report cache lives on disk,
+so ``manage.py test`` points all three at a scratch directory that is
+removed when the run ends. The paths are also put in the environment so
+process-pool workers, which load settings themselves, use them too.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class ScratchStorageTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        self._scratch = tempfile.TemporaryDirectory()
+        root = Path(self._scratch.name)
+        paths = {
+            "DATASET_ARCHIVE_ROOT": root / "archive",
+            "UPLOAD_SPOOL_ROOT": root / "spool",
+            "CACHE_LOCATION": root / "cache",
+        }
+        self._environ = {name: os.environ.get(name) for name in paths}
+        os.environ.update({name: str(path) for name, path in paths.items()})
+
+        caches = {alias: dict(config) for alias, config in settings.CACHES.items()}
+        caches["default"]["LOCATION"] = str(paths["CACHE_LOCATION"])
+        self._override = override_settings(
+            DATASET_ARCHIVE_ROOT=paths["DATASET_ARCHIVE_ROOT"],
+            UPLOAD_SPOOL_ROOT=paths["UPLOAD_SPOOL_ROOT"],
+            CACHES=caches,
+        )
+        self._override.enable()
+        super().setup_test_environment(**kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        self._override.disable()
+        for name, value in self._environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        self._scratch.cleanup()
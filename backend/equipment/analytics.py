@@ -0,0 +1,674 @@
+"""
+Streaming analytics for equipment CSV uploads.
+
+Uploads are read in fixed-size chunks and folded into running aggregates,
+so peak memory depends on the chunk size rather than on the file size.
+"""
+
+import io
+import math
+
+import numpy as np
+import pandas as pd
+
+from .metrics import timed
+
+# Re-exported: callers import the whole CSV vocabulary from here.
+from .schema import (  # noqa: F401
+    CSV_DTYPES,
+    MAX_REPORTED_ERRORS,
+    NUMERIC_COLUMNS,
+    REQUIRED_COLUMNS,
+    TEXT_COLUMNS,
+    VALUE_RANGES,
+    EmptyCSVError,
+    InvalidCSVError,
+    InvalidRowsError,
+    MissingColumnsError,
+)
+
+
+# =========================
+# Constants
+# =========================
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Bytes of CSV text the pyarrow reader parses per batch.
+PYARROW_BLOCK_SIZE = 2 * 1024 * 1024
+
+CSV_ENGINES = ("c", "pyarrow")
+
+# t-digest compression: higher is more accurate and stores more centroids.
+DIGEST_COMPRESSION = 200
+
+
+# =========================
+# Validation
+# =========================
+
+class ValidationReport:
+    """
+    Row-level problems found while validating an upload.
+
+    Counts cover the whole file; only the first ``max_errors`` problems are
+    listed individually, in row order. Rows are numbered from 1, not
+    counting the header.
+    """
+
+    def __init__(self, max_errors=MAX_REPORTED_ERRORS):
+        self.max_errors = max_errors
+        self.rows_checked = 0
+        self.invalid_rows = 0
+        self.dropped_rows = 0
+        self.error_counts = {}
+        self.errors = []
+
+    def record(self, column, error, mask, values, first_row):
+        count = int(mask.sum())
+        if not count:
+            return []
+
+        counts = self.error_counts.setdefault(column, {})
+        counts[error] = counts.get(error, 0) + count
+
+        # Only ever materialize as many cells as could still be listed.
+        positions = np.flatnonzero(mask)[:self.max_errors - len(self.errors)]
+        return [
+            {
+                "row": first_row + int(position),
+                "column": column,
+                "error": error,
+                "value": None if pd.isna(value) else str(value),
+            }
+            for position, value in zip(positions, values.iloc[positions])
+        ]
+
+    @classmethod
+    def from_dict(cls, data, max_errors=MAX_REPORTED_ERRORS):
+        """Rebuild a report from ``to_dict()`` output, e.g. a stored summary's."""
+        report = cls(max_errors)
+        report.rows_checked = data["rows_checked"]
+        report.invalid_rows = data["invalid_rows"]
+        report.dropped_rows = data["dropped_rows"]
+        report.error_counts = {
+            column: dict(counts) for column, counts in data["error_counts"].items()
+        }
+        report.errors = list(data["errors"][:max_errors])
+        return report
+
+    def merge(self, other):
+        """Fold in the report of the rows that directly follow this one's."""
+        row_offset = self.rows_checked
+        self.rows_checked += other.rows_checked
+        self.invalid_rows += other.invalid_rows
+        self.dropped_rows += other.dropped_rows
+        for column, counts in other.error_counts.items():
+            merged = self.error_counts.setdefault(column, {})
+            for error, count in counts.items():
+                merged[error] = merged.get(error, 0) + count
+        room = self.max_errors - len(self.errors)
+        self.errors.extend(
+            {**error, "row": error["row"] + row_offset} for error in other.errors[:room]
+        )
+        return self
+
+    def to_dict(self):
+        total_errors = sum(
+            count for counts in self.error_counts.values() for count in counts.values()
+        )
+        return {
+            "rows_checked": self.rows_checked,
+            "invalid_rows": self.invalid_rows,
+            "dropped_rows": self.dropped_rows,
+            "error_counts": self.error_counts,
+            "errors": self.errors,
+            "truncated": total_errors > len(self.errors),
+        }
+
+
+def _blank_mask(values):
+    text = values.astype("string").str.strip()
+    return (values.isna() | text.eq("")).fillna(True).to_numpy(dtype=bool)
+
+
+def validate_chunk(chunk, report, first_row=1, drop_invalid=False):
+    """
+    Coerce and check one chunk, recording problems in ``report``.
+
+    Numeric columns are converted with ``pd.to_numeric``; cells that are
+    blank, not numbers or outside ``VALUE_RANGES`` are flagged, as are blank
+    text cells. Everything is done with whole-column operations, so the cost
+    per row is the same however many rows are invalid.
+
+    Returns the chunk with float64 numeric columns, without the invalid rows
+    when ``drop_invalid`` is set. ``first_row`` is the row number of the
+    chunk's first row.
+    """
+    invalid = np.zeros(len(chunk), dtype=bool)
+    errors = []
+
+    def flag(column, error, mask, values):
+        nonlocal invalid
+        if mask.any():
+            invalid |= mask
+            errors.extend(report.record(column, error, mask, values, first_row))
+
+    for col in TEXT_COLUMNS:
+        flag(col, "blank", _blank_mask(chunk[col]), chunk[col])
+
+    numeric = {}
+    for col in NUMERIC_COLUMNS:
+        raw = chunk[col]
+        values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = raw.isna().to_numpy(dtype=bool)
+        low, high = VALUE_RANGES[col]
+
+        flag(col, "blank", missing, raw)
+        flag(col, "not a number", np.isnan(values) & ~missing, raw)
+        with np.errstate(invalid="ignore"):
+            flag(col, "out of range", (values < low) | (values > high) | np.isinf(values), raw)
+        numeric[col] = values
+
+    if errors:
+        errors.sort(key=lambda error: error["row"])
+        report.errors.extend(errors[:report.max_errors - len(report.errors)])
+
+    invalid_rows = int(invalid.sum())
+    report.rows_checked += len(chunk)
+    report.invalid_rows += invalid_rows
+
+    chunk = chunk.assign(**numeric)
+    if drop_invalid and invalid_rows:
+        chunk = chunk[~invalid]
+        report.dropped_rows += invalid_rows
+    return chunk
+
+
+# =========================
+# Aggregation
+# =========================
+
+class TDigest:
+    """
+    Mergeable quantile sketch (merging t-digest with the k1 scale function).
+
+    Values are kept as weighted centroids that are small near the tails and
+    larger around the median, so extreme quantiles stay accurate while the
+    sketch holds at most about ``compression / 2`` centroids. Compression is
+    fully vectorized with numpy; merging two digests is a single compress
+    over their concatenated centroids.
+    """
+
+    def __init__(self, compression=DIGEST_COMPRESSION, means=None, weights=None):
+        self.compression = compression
+        self.means = np.asarray(means if means is not None else [], dtype=np.float64)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=np.float64)
+
+    @property
+    def total_weight(self):
+        return float(self.weights.sum())
+
+    def add_values(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size:
+            self._compress(
+                np.concatenate([self.means, values]),
+                np.concatenate([self.weights, np.ones(values.size)]),
+            )
+        return self
+
+    def merge(self, other):
+        if other.weights.size:
+            self._compress(
+                np.concatenate([self.means, other.means]),
+                np.concatenate([self.weights, other.weights]),
+            )
+        return self
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        groups = np.floor(k)
+
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q, minimum, maximum):
+        """Estimate the ``q`` quantile, interpolating between centroids."""
+        if not self.weights.size:
+            return None
+
+        cumulative = np.cumsum(self.weights)
+        positions = np.concatenate([[0.0], cumulative - self.weights / 2, [cumulative[-1]]])
+        values = np.concatenate([[minimum], self.means, [maximum]])
+        return float(np.interp(q * cumulative[-1], positions, values))
+
+    def to_state(self):
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state["compression"], state["means"], state["weights"])
+
+
+class ColumnStats:
+    """
+    Mergeable moments and quantile sketch for one numeric column.
+
+    Keeps count, sum, min, max and ``m2`` (the sum of squared deviations
+    from the mean). Partial results combine exactly in O(1) with Chan's
+    parallel update, which stays numerically stable where a raw sum of
+    squares would cancel.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.digest = TDigest()
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return self
+
+        other = ColumnStats()
+        other.count = int(values.size)
+        other.sum = float(values.sum())
+        other.m2 = float(((values - other.sum / other.count) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        other.digest.add_values(values)
+        return self.merge(other)
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.sum, self.m2 = other.count, other.sum, other.m2
+            self.min, self.max = other.min, other.max
+            self.digest = TDigest().merge(other.digest)
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.digest.merge(other.digest)
+        return self
+
+    def std(self):
+        if self.count < 2:
+            return None
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def quantile(self, q):
+        return self.digest.quantile(q, self.min, self.max)
+
+    def result(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std(),
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+    def to_state(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "m2": self.m2,
+            "min": self.min,
+            "max": self.max,
+            "digest": self.digest.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        stats.count = state["count"]
+        stats.sum = state["sum"]
+        stats.m2 = state["m2"]
+        stats.min = state["min"]
+        stats.max = state["max"]
+        stats.digest = TDigest.from_state(state["digest"])
+        return stats
+
+
+class SummaryAccumulator:
+    """
+    Running, mergeable aggregates behind the dataset summary.
+
+    Feeding every chunk of a file through ``update`` and calling ``result``
+    gives the same summary as ``compute_summary`` on the whole DataFrame.
+    Accumulators built from different chunks, workers or uploads combine
+    with ``merge``, and ``to_state``/``from_state`` round-trip them through
+    JSON so they can be stored next to a dataset.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.columns = {col: ColumnStats() for col in NUMERIC_COLUMNS}
+        self.type_counts = {}
+        # Per Type and numeric column: [count, sum, min, max]
+        self.groups = {}
+
+    def update(self, df):
+        for col in NUMERIC_COLUMNS:
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                raise InvalidCSVError(f"Column '{col}' must be numeric.")
+
+        self.total += len(df)
+        for col in NUMERIC_COLUMNS:
+            self.columns[col].update(df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+
+        for eq_type, count in df["Type"].value_counts().to_dict().items():
+            if count:
+                self.type_counts[eq_type] = self.type_counts.get(eq_type, 0) + count
+
+        # One groupby pass yields every per-Type aggregate for the chunk.
+        grouped = df.groupby("Type", observed=True, sort=False)[NUMERIC_COLUMNS].agg(
+            ["count", "sum", "min", "max"]
+        )
+        for eq_type, row in zip(grouped.index, grouped.to_numpy(dtype=np.float64)):
+            self._merge_group(
+                eq_type,
+                {col: row[i * 4:i * 4 + 4].tolist() for i, col in enumerate(NUMERIC_COLUMNS)},
+            )
+
+        return self
+
+    def _merge_group(self, eq_type, group):
+        current = self.groups.setdefault(eq_type, {})
+        for col, (count, total, minimum, maximum) in group.items():
+            if not count:
+                continue
+            if col not in current:
+                current[col] = [int(count), total, minimum, maximum]
+                continue
+            stats = current[col]
+            stats[0] += int(count)
+            stats[1] += total
+            stats[2] = min(stats[2], minimum)
+            stats[3] = max(stats[3], maximum)
+
+    def merge(self, other):
+        self.total += other.total
+        for col in NUMERIC_COLUMNS:
+            self.columns[col].merge(other.columns[col])
+        for eq_type, count in other.type_counts.items():
+            self.type_counts[eq_type] = self.type_counts.get(eq_type, 0) + count
+        for eq_type, group in other.groups.items():
+            self._merge_group(eq_type, group)
+        return self
+
+    def mean(self, col):
+        mean = self.columns[col].mean
+        return float("nan") if mean is None else mean
+
+    def result(self):
+        type_distribution = dict(
+            sorted(self.type_counts.items(), key=lambda item: item[1], reverse=True)
+        )
+        return {
+            "total_equipment": self.total,
+            "average_flowrate": self.mean("Flowrate"),
+            "average_pressure": self.mean("Pressure"),
+            "average_temperature": self.mean("Temperature"),
+            "type_distribution": type_distribution,
+            "statistics": {
+                col: stats.result() for col, stats in self.columns.items()
+            },
+        }
+
+    def type_statistics(self):
+        """
+        Row count and mean/min/max of every numeric column, per Type.
+
+        Types are ordered like ``type_distribution``; a column with no
+        values for a Type is omitted.
+        """
+        statistics = {}
+        for eq_type, count in sorted(
+            self.type_counts.items(), key=lambda item: item[1], reverse=True
+        ):
+            entry = {"count": count}
+            for col, (n, total, minimum, maximum) in self.groups.get(eq_type, {}).items():
+                entry[col] = {"mean": total / n, "min": minimum, "max": maximum}
+            statistics[eq_type] = entry
+        return statistics
+
+    def to_state(self):
+        return {
+            "total": self.total,
+            "columns": {
+                col: stats.to_state() for col, stats in self.columns.items()
+            },
+            "type_counts": self.type_counts,
+            "groups": self.groups,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        accumulator = cls()
+        accumulator.total = state["total"]
+        accumulator.columns = {
+            col: ColumnStats.from_state(state["columns"][col])
+            for col in NUMERIC_COLUMNS
+        }
+        accumulator.type_counts = dict(state["type_counts"])
+        # States stored before per-Type aggregates existed have no groups.
+        accumulator.groups = {
+            eq_type: {col: list(stats) for col, stats in group.items()}
+            for eq_type, group in state.get("groups", {}).items()
+        }
+        return accumulator
+
+
+def compute_summary(df):
+    return SummaryAccumulator().update(df).result()
+
+
+# =========================
+# Chunked CSV reading
+# =========================
+
+def iter_csv_chunks(csv_file, chunksize=DEFAULT_CHUNK_SIZE, engine="c"):
+    """
+    Yield DataFrame chunks of at most ``chunksize`` rows from ``csv_file``.
+
+    Only ``REQUIRED_COLUMNS`` are read, with the dtypes in ``CSV_DTYPES``.
+    ``engine`` is ``"c"`` for pandas' own parser or ``"pyarrow"`` for
+    pyarrow's multithreaded streaming reader; pyarrow needs a seekable
+    file and falls back to pandas otherwise.
+
+    Raises ``MissingColumnsError`` before the first chunk is yielded if the
+    header lacks a required column, and ``InvalidCSVError`` for anything
+    that cannot be parsed.
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Unknown CSV engine: {engine!r}.")
+    if engine == "pyarrow" and _seekable(csv_file):
+        return _iter_pyarrow_chunks(csv_file, chunksize)
+    return _iter_pandas_chunks(csv_file, chunksize)
+
+
+def _seekable(csv_file):
+    seekable = getattr(csv_file, "seekable", None)
+    return seekable is not None and seekable()
+
+
+def _iter_pandas_chunks(csv_file, chunksize):
+    try:
+        reader = pd.read_csv(
+            csv_file,
+            chunksize=chunksize,
+            usecols=lambda col: col in REQUIRED_COLUMNS,
+            dtype=CSV_DTYPES,
+        )
+    except Exception as exc:
+        raise InvalidCSVError("Invalid CSV file.") from exc
+
+    with reader:
+        columns_checked = False
+        while True:
+            try:
+                with timed("parse"):
+                    chunk = next(reader)
+            except StopIteration:
+                return
+            except Exception as exc:
+                raise InvalidCSVError("Invalid CSV file.") from exc
+
+            if not columns_checked:
+                _check_columns(chunk.columns)
+                columns_checked = True
+
+            yield chunk
+
+
+def _iter_pyarrow_chunks(csv_file, chunksize):
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    start = csv_file.tell()
+    try:
+        header = pa_csv.read_csv(io.BytesIO(csv_file.readline())).schema.names
+    except pa.ArrowInvalid as exc:
+        raise InvalidCSVError("Invalid CSV file.") from exc
+    _check_columns(header)
+    csv_file.seek(start)
+
+    # Numbers are read as text, like dirty cells under pandas, so that
+    # validate_chunk reports them the same way; blank cells become nulls.
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=REQUIRED_COLUMNS,
+        column_types={
+            "Equipment Name": pa.string(),
+            "Type": pa.dictionary(pa.int32(), pa.string()),
+            **{col: pa.string() for col in NUMERIC_COLUMNS},
+        },
+        strings_can_be_null=True,
+    )
+    try:
+        reader = pa_csv.open_csv(
+            csv_file,
+            read_options=pa_csv.ReadOptions(block_size=PYARROW_BLOCK_SIZE),
+            convert_options=convert_options,
+        )
+    except pa.ArrowInvalid as exc:
+        raise InvalidCSVError("Invalid CSV file.") from exc
+
+    while True:
+        try:
+            with timed("parse"):
+                batch = reader.read_next_batch()
+        except StopIteration:
+            return
+        except pa.ArrowInvalid as exc:
+            raise InvalidCSVError("Invalid CSV file.") from exc
+
+        for offset in range(0, batch.num_rows, chunksize):
+            with timed("parse"):
+                chunk = _numbers_to_float(batch.slice(offset, chunksize)).to_pandas()
+            yield chunk
+
+
+def _numbers_to_float(batch):
+    """Cast the numeric columns of a clean batch to float64 inside Arrow."""
+    import pyarrow as pa
+
+    for col in NUMERIC_COLUMNS:
+        index = batch.schema.get_field_index(col)
+        try:
+            values = batch.column(index).cast(pa.float64())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue  # a dirty cell; validate_chunk reports it
+        batch = batch.set_column(index, col, values)
+    return batch
+
+
+def _check_columns(columns):
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing_columns:
+        raise MissingColumnsError(missing_columns)
+
+
+def require_rows(report):
+    """
+    Raise unless ``report`` kept at least one data row.
+
+    ``EmptyCSVError`` if there were no data rows at all, ``InvalidRowsError``
+    if every row was dropped: a summary of nothing has no averages to store.
+    """
+    if not report.rows_checked:
+        raise EmptyCSVError()
+    if report.dropped_rows == report.rows_checked:
+        raise InvalidRowsError(report)
+
+
+def accumulate_csv(
+    csv_file,
+    chunksize=DEFAULT_CHUNK_SIZE,
+    on_chunk=None,
+    drop_invalid=False,
+    report=None,
+    engine="c",
+):
+    """
+    Validate and fold ``csv_file`` chunk by chunk into a ``SummaryAccumulator``.
+
+    ``on_chunk`` is called with every validated chunk after it has been
+    aggregated, e.g. to archive the rows while they are still in memory.
+    Problems are recorded in ``report``. Invalid rows are left out when
+    ``drop_invalid`` is set; otherwise the rest of the file is still
+    scanned so the report is complete, and ``InvalidRowsError`` is raised.
+    ``engine`` is passed to ``iter_csv_chunks``.
+    """
+    report = ValidationReport() if report is None else report
+    accumulator = SummaryAccumulator()
+    first_row = 1
+
+    for chunk in iter_csv_chunks(csv_file, chunksize, engine):
+        rows = len(chunk)
+        with timed("validate"):
+            chunk = validate_chunk(chunk, report, first_row, drop_invalid)
+        first_row += rows
+
+        if report.invalid_rows and not drop_invalid:
+            continue
+        with timed("summarize"):
+            accumulator.update(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+
+    if report.invalid_rows and not drop_invalid:
+        raise InvalidRowsError(report)
+    return accumulator
+
+
+def summarize_csv(csv_file, chunksize=DEFAULT_CHUNK_SIZE, on_chunk=None, drop_invalid=False):
+    return accumulate_csv(csv_file, chunksize, on_chunk, drop_invalid).result()
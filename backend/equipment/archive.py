@@ -0,0 +1,170 @@
+"""
+Columnar archive of uploaded datasets.
+
+Every upload is written, chunk by chunk, to a zstd-compressed Parquet
+directory under ``settings.DATASET_ARCHIVE_ROOT``. ``Dataset.archive_path``
+points at that directory, so summaries can be recomputed later from the
+archived rows without asking operators to upload the CSV again.
+"""
+
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+
+from .analytics import REQUIRED_COLUMNS, SummaryAccumulator
+
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("Equipment Name", pa.string()),
+    ("Type", pa.string()),
+    ("Flowrate", pa.float64()),
+    ("Pressure", pa.float64()),
+    ("Temperature", pa.float64()),
+])
+
+ARCHIVE_COMPRESSION = "zstd"
+
+
+def archive_root():
+    return Path(settings.DATASET_ARCHIVE_ROOT)
+
+
+def resolve_archive(archive_path):
+    return archive_root() / archive_path
+
+
+# =========================
+# Writing
+# =========================
+
+class ArchiveWriter:
+    """
+    Append DataFrame chunks to a new Parquet part inside an archive directory.
+
+    The part is written under a hidden temporary name and only appears as
+    ``part-NNNNN.parquet`` once ``close`` has finished it, so readers never
+    see a partial file. Use ``abort`` instead to discard a partially written
+    archive. Aborting a part added to an existing archive (see
+    ``append_to``) removes only that part.
+    """
+
+    def __init__(self, name=None, part=0):
+        self.name = name or uuid.uuid4().hex
+        self.directory = resolve_archive(self.name)
+        self._new_archive = not self.directory.exists()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # None: the next free part number, picked when the part is published.
+        self.part = part
+        self.path = None
+        self._temp_path = self.directory / f".{uuid.uuid4().hex}.parquet.tmp"
+        self._writer = None
+
+    @classmethod
+    def append_to(cls, name):
+        """A writer for a new part after the existing parts of archive ``name``."""
+        return cls(name, part=None)
+
+    def write(self, chunk):
+        frame = chunk[REQUIRED_COLUMNS].copy()
+        frame["Equipment Name"] = frame["Equipment Name"].astype("string")
+        frame["Type"] = frame["Type"].astype("string")
+        table = pa.Table.from_pandas(frame, schema=ARCHIVE_SCHEMA, preserve_index=False)
+
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(
+                self._temp_path, ARCHIVE_SCHEMA, compression=ARCHIVE_COMPRESSION
+            )
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is None:
+            # Keep a valid (empty) part so an archive always has one.
+            pq.write_table(
+                ARCHIVE_SCHEMA.empty_table(), self._temp_path, compression=ARCHIVE_COMPRESSION
+            )
+        else:
+            self._writer.close()
+            self._writer = None
+        self._publish()
+
+    def _publish(self):
+        part = len(archive_parts(self.name)) if self.part is None else self.part
+        while True:
+            path = self.directory / f"part-{part:05d}.parquet"
+            try:
+                # Unlike os.replace(), a link never overwrites a part that a
+                # concurrent append published under the same number.
+                os.link(self._temp_path, path)
+            except FileExistsError:
+                if self.part is not None:
+                    raise
+                part += 1
+                continue
+            break
+        self._temp_path.unlink()
+        self.path = path
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._new_archive:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            return
+        self._temp_path.unlink(missing_ok=True)
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+
+# =========================
+# Reading
+# =========================
+
+def archive_parts(archive_path):
+    return sorted(resolve_archive(archive_path).glob("part-*.parquet"))
+
+
+def read_archive(archive_path, columns=None):
+    """
+    Load an archived dataset as a DataFrame.
+
+    Only ``columns`` are read from disk, and the Parquet files are memory
+    mapped rather than copied into Python-managed buffers first.
+    """
+    table = pq.read_table(
+        [str(part) for part in archive_parts(archive_path)],
+        columns=columns,
+        memory_map=True,
+        schema=ARCHIVE_SCHEMA,
+    )
+    return table.to_pandas()
+
+
+def iter_archive_batches(archive_path, columns=None, batch_size=None):
+    batch_size = batch_size or settings.CSV_CHUNK_SIZE
+    for part in archive_parts(archive_path):
+        parquet_file = pq.ParquetFile(part, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+
+
+def accumulate_archive(archive_path):
+    accumulator = SummaryAccumulator()
+    columns = ["Type", "Flowrate", "Pressure", "Temperature"]
+    for chunk in iter_archive_batches(archive_path, columns=columns):
+        accumulator.update(chunk)
+    return accumulator
+
+
+def summarize_archive(archive_path):
+    return accumulate_archive(archive_path).result()
+
+
+def delete_archive(archive_path):
+    if archive_path:
+        shutil.rmtree(resolve_archive(archive_path), ignore_errors=True)
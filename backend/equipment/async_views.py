@@ -0,0 +1,362 @@
+"""
+Async versions of the upload, history, PDF and auth endpoints.
+
+With ``settings.ASYNC_API`` on, ``urls.py`` routes these paths here instead
+of to the DRF views in ``views.py``; run the project under an ASGI server
+(``uvicorn config.asgi:application``) to benefit. Requests then wait on the
+database, cache and render pool without holding a thread, so slow uploads,
+PDF renders and idle keep-alive clients no longer use up worker capacity.
+
+Responses match the sync views. Parsing, hashing, pandas and reportlab work
+still blocks, so it runs on a bounded pool of ``ASYNC_BLOCKING_WORKERS``
+threads; at most that many such jobs run at once, however many requests
+are waiting.
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aauthenticate, alogin
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.utils.http import content_disposition_header
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import FileUploadParser
+
+from .caching import adatasets_version, conditional_response, set_validators, versioned_key
+from .history import (
+    HISTORY_FIELDS,
+    InvalidCursorError,
+    InvalidFieldsError,
+    ahistory_page,
+    decode_cursor,
+    parse_fields,
+)
+from .ingest import (
+    CONTENT_ENCODINGS,
+    UploadEncodingError,
+    afind_duplicate,
+    hash_upload,
+    ingest_csv,
+    upload_error,
+)
+from .jobs import discard_spool, spool_root, spool_upload, submit_upload_job
+from .models import Dataset
+from .reports import get_report_pdf, report_cache_key, report_fingerprint
+from .schema import InvalidCSVError
+from .serializers import DatasetHistorySerializer
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# =========================
+# Blocking work
+# =========================
+
+def get_blocking_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_BLOCKING_WORKERS,
+                thread_name_prefix="async-blocking",
+            )
+        return _executor
+
+
+def _call_blocking(func, args, kwargs):
+    # Pool threads keep their connection between calls, like request
+    # threads do, and drop it once it is stale or broken.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run ``func`` on the bounded blocking pool and await its result."""
+    call = sync_to_async(
+        _call_blocking, thread_sensitive=False, executor=get_blocking_executor()
+    )
+    return await call(func, args, kwargs)
+
+
+def query_flag(request, name):
+    return request.GET.get(name, "").lower() in ("1", "true")
+
+
+def request_data(request):
+    """Form fields or a JSON object body, like DRF's default parsers accept."""
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+    return request.POST
+
+
+def uploaded_csv(request):
+    """The ``file`` form field, or the raw body as a file; ``None`` if absent."""
+    if request.content_type in ("multipart/form-data", "application/x-www-form-urlencoded"):
+        return request.FILES.get("file")
+    try:
+        data = FileUploadParser().parse(
+            request, parser_context={"request": request, "kwargs": {}}
+        )
+    except ParseError:
+        return None
+    return data.files.get("file")
+
+
+# =========================
+# Login API
+# =========================
+
+@method_decorator(csrf_exempt, name="dispatch")
+class LoginView(View):
+    async def post(self, request):
+        data = request_data(request)
+        username = data.get("username")
+        password = data.get("password")
+
+        if not username or not password:
+            return JsonResponse({"error": "Username and password required"}, status=400)
+
+        user = await aauthenticate(request, username=username, password=password)
+        if user is None:
+            return JsonResponse({"error": "Invalid credentials"}, status=401)
+
+        await alogin(request, user)
+        return JsonResponse({"message": "Login successful"})
+
+
+class AuthStatusView(View):
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."}, status=403
+            )
+        return JsonResponse({"authenticated": True})
+
+
+# =========================
+# CSV Upload + Analytics API
+# =========================
+
+@method_decorator(csrf_exempt, name="dispatch")
+class CSVUploadView(View):
+    """Async ``CSVUploadAPIView``."""
+
+    async def post(self, request):
+        csv_file = await run_blocking(uploaded_csv, request)
+        if csv_file is None:
+            return JsonResponse({"error": "CSV file is required."}, status=400)
+
+        content_encoding = request.headers.get("Content-Encoding", "identity").lower()
+        if content_encoding not in CONTENT_ENCODINGS:
+            return JsonResponse(
+                {"error": f"Unsupported Content-Encoding: {content_encoding}."}, status=415
+            )
+
+        async_mode = query_flag(request, "async")
+        drop_invalid = query_flag(request, "drop_invalid")
+
+        if content_encoding == "identity" and not async_mode:
+            content_hash = await run_blocking(hash_upload, csv_file)
+
+            duplicate = await afind_duplicate(content_hash)
+            if duplicate is not None:
+                return self.duplicate_response(duplicate)
+
+            return await self.ingest(csv_file, csv_file.name, content_hash, drop_invalid)
+
+        try:
+            spool_path, content_hash = await run_blocking(
+                spool_upload, csv_file, content_encoding
+            )
+        except UploadEncodingError:
+            return JsonResponse(
+                {"error": "Could not decompress the uploaded file."}, status=400
+            )
+
+        duplicate = await afind_duplicate(content_hash)
+        if duplicate is not None:
+            discard_spool(spool_path)
+            return self.duplicate_response(duplicate)
+
+        if async_mode:
+            return await self.enqueue(
+                request, csv_file.name, spool_path, content_hash, drop_invalid
+            )
+
+        try:
+            return await self.ingest(
+                spool_root() / spool_path, csv_file.name, content_hash, drop_invalid
+            )
+        finally:
+            discard_spool(spool_path)
+
+    async def ingest(self, csv_file, filename, content_hash, drop_invalid):
+        try:
+            dataset = await run_blocking(
+                ingest_file, csv_file, filename, content_hash, drop_invalid
+            )
+        except InvalidCSVError as exc:
+            return JsonResponse(upload_error(exc), status=400)
+
+        return JsonResponse(
+            {
+                "message": "CSV uploaded and analyzed successfully.",
+                "summary": dataset.summary,
+                "type_statistics": dataset.type_statistics,
+            }
+        )
+
+    async def enqueue(self, request, filename, spool_path, content_hash, drop_invalid):
+        job = await run_blocking(
+            submit_upload_job, filename, spool_path, content_hash, drop_invalid
+        )
+        status_url = reverse("upload-job", kwargs={"job_id": job.id})
+
+        response = JsonResponse(
+            {
+                "message": "CSV accepted for processing.",
+                "job_id": str(job.id),
+                "status": job.status,
+                "status_url": status_url,
+            },
+            status=202,
+        )
+        response["Location"] = status_url
+        return response
+
+    def duplicate_response(self, dataset):
+        return JsonResponse(
+            {
+                "message": "CSV already uploaded; returning stored analysis.",
+                "summary": dataset.summary,
+                "type_statistics": dataset.type_statistics,
+                "duplicate": True,
+            }
+        )
+
+
+def ingest_file(csv_file, filename, content_hash, drop_invalid):
+    """``ingest_csv`` for an uploaded file or a path to a spooled one."""
+    if not hasattr(csv_file, "read"):
+        with open(csv_file, "rb") as spooled:
+            return ingest_csv(spooled, filename, content_hash, drop_invalid=drop_invalid)
+    return ingest_csv(csv_file, filename, content_hash, drop_invalid=drop_invalid)
+
+
+# =========================
+# Dataset History API
+# =========================
+
+class DatasetHistoryView(View):
+    """Async ``DatasetHistoryAPIView``."""
+
+    async def get(self, request):
+        try:
+            fields = parse_fields(request.GET.get("fields", ""))
+        except InvalidFieldsError as exc:
+            return JsonResponse(
+                {"error": str(exc), "available_fields": HISTORY_FIELDS}, status=400
+            )
+
+        try:
+            page_size = int(request.GET.get("page_size", settings.HISTORY_PAGE_SIZE))
+        except ValueError:
+            return JsonResponse({"error": "Invalid 'page_size'."}, status=400)
+        page_size = max(1, min(page_size, settings.HISTORY_MAX_PAGE_SIZE))
+        cursor = request.GET.get("cursor", "")
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except InvalidCursorError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+
+        version = await adatasets_version()
+        etag = version["token"]
+
+        not_modified = conditional_response(request, etag, version["last_modified"])
+        if not_modified is not None:
+            return not_modified
+
+        key = versioned_key("history", version, cursor, page_size, ",".join(fields))
+        data = await cache.aget(key)
+        if data is None:
+            datasets, next_cursor = await ahistory_page(after, page_size, fields)
+            data = {
+                "results": DatasetHistorySerializer(datasets, many=True, fields=fields).data,
+                "next_cursor": next_cursor,
+            }
+            await cache.aset(key, data, settings.API_CACHE_TIMEOUT)
+
+        data = {**data, "next": self.next_url(request, data["next_cursor"])}
+
+        response = JsonResponse(data)
+        return set_validators(response, etag, version["last_modified"])
+
+    def next_url(self, request, next_cursor):
+        if next_cursor is None:
+            return None
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+
+# =========================
+# PDF Download API
+# =========================
+
+class DatasetPDFView(View):
+    """Async ``DatasetPDFAPIView``."""
+
+    async def get(self, request):
+        version = await adatasets_version()
+
+        key = versioned_key("latest-report", version)
+        latest = await cache.aget(key)
+        if latest is None:
+            dataset = await Dataset.objects.order_by("-uploaded_at").afirst()
+            if dataset is not None:
+                latest = {
+                    "id": dataset.id,
+                    "filename": dataset.filename,
+                    "fingerprint": report_fingerprint(dataset),
+                }
+                await cache.aset(key, latest, settings.API_CACHE_TIMEOUT)
+
+        if not latest:
+            return JsonResponse({"error": "No dataset available."}, status=404)
+
+        etag = latest["fingerprint"]
+        not_modified = conditional_response(request, etag, version["last_modified"])
+        if not_modified is not None:
+            return not_modified
+
+        pdf_bytes = await cache.aget(report_cache_key(latest["id"], etag))
+        if pdf_bytes is None:
+            dataset = await Dataset.objects.filter(id=latest["id"]).afirst()
+            if dataset is None:
+                return JsonResponse({"error": "No dataset available."}, status=404)
+            pdf_bytes = await run_blocking(get_report_pdf, dataset, etag)
+
+        response = HttpResponse(pdf_bytes, content_type="application/pdf")
+        response["Content-Disposition"] = content_disposition_header(
+            True, f"{latest['filename']}_report.pdf"
+        )
+        return set_validators(response, etag, version["last_modified"])
@@ -0,0 +1,270 @@
+"""
+Batch ingestion of many CSVs in one request.
+
+Every file, or every CSV inside an uploaded ZIP archive, is spooled and
+hashed, deduplicated against stored datasets and the rest of the batch,
+and parsed in parallel on the process pool. The resulting datasets are
+inserted with a single ``bulk_create`` and the batch triggers one cache
+invalidation, however many files it holds. Like a single upload, its
+newest dataset decides whether the amortized retention sweep runs.
+"""
+
+import logging
+import time
+import zipfile
+import zlib
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.db import transaction
+
+from .archive import delete_archive
+from .caching import invalidate_dataset_caches
+from .ingest import (
+    HASH_CHUNK_SIZE,
+    archive_csv,
+    build_summary,
+    maybe_prune_datasets,
+    upload_error,
+)
+from .jobs import discard_spool, spool_blocks, spool_root
+from .metrics import record_csv, timed
+from .models import Dataset
+from .processes import get_process_pool
+from .reports import prerender_report
+from .schema import InvalidCSVError
+
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidBatchError(ValueError):
+    """Raised when a batch upload cannot be processed at all."""
+
+
+class UnreadableMemberError(ValueError):
+    """Raised while reading one ZIP member that cannot be extracted."""
+
+
+# What reading an encrypted, oddly compressed or corrupt member raises.
+MEMBER_READ_ERRORS = (
+    zipfile.BadZipFile,
+    RuntimeError,
+    NotImplementedError,
+    EOFError,
+    zlib.error,
+)
+
+
+# =========================
+# Reading the batch
+# =========================
+
+def iter_batch_files(uploaded_files):
+    """
+    Yield ``(filename, blocks)`` for every CSV in ``uploaded_files``.
+
+    ZIP archives are expanded to their ``.csv`` members. ``blocks`` must be
+    consumed before the next item is requested; for a member that cannot be
+    extracted it raises ``UnreadableMemberError``.
+    """
+    for uploaded_file in uploaded_files:
+        if uploaded_file.name.lower().endswith(".zip"):
+            yield from _iter_zip_members(uploaded_file)
+        else:
+            yield uploaded_file.name, uploaded_file.chunks(HASH_CHUNK_SIZE)
+
+
+def _iter_zip_members(uploaded_file):
+    try:
+        archive = zipfile.ZipFile(uploaded_file)
+    except zipfile.BadZipFile as exc:
+        raise InvalidBatchError(
+            f"{uploaded_file.name} is not a valid ZIP archive."
+        ) from exc
+
+    with archive:
+        extracted = 0
+        for info in archive.infolist():
+            name = PurePosixPath(info.filename)
+            if info.is_dir() or name.suffix.lower() != ".csv":
+                continue
+            if name.parts[0] == "__MACOSX":
+                continue
+            # zipfile never returns more than the declared size, so checking
+            # it up front bounds what the archive can expand to.
+            extracted += info.file_size
+            if extracted > settings.BATCH_MAX_EXTRACTED_BYTES:
+                raise InvalidBatchError(
+                    f"{uploaded_file.name} expands to more than "
+                    f"{settings.BATCH_MAX_EXTRACTED_BYTES} bytes."
+                )
+            yield name.name, _read_member(archive, info)
+
+
+def _read_member(archive, info):
+    if info.file_size > settings.BATCH_MAX_MEMBER_BYTES:
+        raise UnreadableMemberError(
+            f"File is larger than {settings.BATCH_MAX_MEMBER_BYTES} bytes once extracted."
+        )
+    try:
+        with archive.open(info) as member:
+            yield from iter(lambda: member.read(HASH_CHUNK_SIZE), b"")
+    except MEMBER_READ_ERRORS as exc:
+        raise UnreadableMemberError("Could not read file from the archive.") from exc
+
+
+def parse_spooled_csv(spool_path, drop_invalid=False):
+    """Process-pool task: validate, summarize and archive one spooled CSV."""
+    start = time.perf_counter()
+    try:
+        with open(spool_root() / spool_path, "rb") as csv_file:
+            accumulator, archive_name, report = archive_csv(
+                csv_file, drop_invalid=drop_invalid
+            )
+            bytes_parsed = csv_file.tell()
+    except Exception as exc:
+        if not isinstance(exc, InvalidCSVError):
+            logger.exception("Parsing spooled upload %s failed", spool_path)
+        return {"error": upload_error(exc)}
+
+    return {
+        "summary": build_summary(accumulator, report),
+        "type_statistics": accumulator.type_statistics(),
+        "aggregates": accumulator.to_state(),
+        "archive_path": archive_name,
+        # Metrics recorded here would stay in the worker process.
+        "parsed": (bytes_parsed, report.rows_checked, time.perf_counter() - start),
+    }
+
+
+# =========================
+# Ingestion
+# =========================
+
+def ingest_batch(uploaded_files, drop_invalid=False):
+    """
+    Ingest every CSV in ``uploaded_files`` and return per-file results.
+
+    Each result holds ``filename`` and either ``summary`` and
+    ``type_statistics`` (with ``duplicate`` set when the content was already stored) or the same
+    error payload the single upload endpoint returns. ``drop_invalid``
+    applies to every file, as for single uploads. Raises
+    ``InvalidBatchError`` for an unreadable ZIP or more than
+    ``BATCH_MAX_FILES`` files.
+    """
+    entries = []
+    try:
+        for filename, blocks in iter_batch_files(uploaded_files):
+            if len(entries) >= settings.BATCH_MAX_FILES:
+                raise InvalidBatchError(
+                    f"A batch may contain at most {settings.BATCH_MAX_FILES} files."
+                )
+            entry = {"filename": filename}
+            try:
+                entry["spool_path"], entry["content_hash"] = spool_blocks(blocks)
+            except UnreadableMemberError as exc:
+                entry["error"] = {"error": str(exc)}
+            entries.append(entry)
+
+        to_parse = _resolve_duplicates(entries)
+        with timed("parse"):
+            outcomes = list(get_process_pool().map(
+                parse_spooled_csv,
+                [entry["spool_path"] for entry in to_parse],
+                [drop_invalid] * len(to_parse),
+            ))
+        for entry, outcome in zip(to_parse, outcomes):
+            if "parsed" in outcome:
+                record_csv(*outcome.pop("parsed"))
+            entry.update(outcome)
+    finally:
+        for entry in entries:
+            discard_spool(entry.get("spool_path"))
+
+    _store_datasets([entry for entry in entries if "archive_path" in entry])
+
+    return [_entry_result(entry) for entry in entries]
+
+
+def _resolve_duplicates(entries):
+    """Link entries to stored or earlier identical content; return the rest."""
+    hashes = {entry["content_hash"] for entry in entries if "content_hash" in entry}
+    stored = {
+        dataset.content_hash: dataset
+        for dataset in Dataset.objects.filter(content_hash__in=hashes).order_by("uploaded_at")
+    }
+
+    first_seen = {}
+    to_parse = []
+    for entry in entries:
+        content_hash = entry.get("content_hash")
+        if content_hash is None:
+            continue
+        if content_hash in stored:
+            entry["summary"] = stored[content_hash].summary
+            entry["type_statistics"] = stored[content_hash].type_statistics
+            entry["duplicate"] = True
+        elif content_hash in first_seen:
+            entry["duplicate_of"] = first_seen[content_hash]
+        else:
+            first_seen[content_hash] = entry
+            to_parse.append(entry)
+    return to_parse
+
+
+def _store_datasets(entries):
+    if not entries:
+        return
+
+    datasets = [
+        Dataset(
+            filename=entry["filename"],
+            summary=entry["summary"],
+            type_statistics=entry["type_statistics"],
+            aggregates=entry["aggregates"],
+            archive_path=entry["archive_path"],
+            content_hash=entry["content_hash"],
+        )
+        for entry in entries
+    ]
+
+    try:
+        with transaction.atomic(), timed("insert"):
+            # bulk_create sends no post_save, so invalidate explicitly.
+            datasets = Dataset.objects.bulk_create(datasets)
+            invalidate_dataset_caches()
+            latest = datasets[-1]
+            maybe_prune_datasets(latest)
+            if settings.PDF_PRERENDER:
+                # Only the newest dataset's report is ever served.
+                transaction.on_commit(lambda: prerender_report(latest))
+    except Exception:
+        for entry in entries:
+            delete_archive(entry["archive_path"])
+        raise
+
+
+def _entry_result(entry):
+    source = entry.get("duplicate_of")
+    if source is not None:
+        if "error" in source:
+            return {"filename": entry["filename"], **source["error"]}
+        return {
+            "filename": entry["filename"],
+            "summary": source["summary"],
+            "type_statistics": source["type_statistics"],
+            "duplicate": True,
+        }
+
+    if "error" in entry:
+        return {"filename": entry["filename"], **entry["error"]}
+
+    result = {
+        "filename": entry["filename"],
+        "summary": entry["summary"],
+        "type_statistics": entry["type_statistics"],
+    }
+    if entry.get("duplicate"):
+        result["duplicate"] = True
+    return result
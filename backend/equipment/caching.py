@@ -0,0 +1,103 @@
+"""
+Server-side caching and HTTP validators for the read-only endpoints.
+
+Dataset contents only change when something is uploaded, appended or
+pruned. A random version token, stored in the Django cache and replaced on
+every such change, identifies the current state: it is the ETag of the
+history endpoint and part of every cache key derived from dataset rows, so
+invalidation is a single cache write and stale entries simply expire.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import Dataset
+
+
+VERSION_KEY = "equipment:datasets-version"
+
+
+def datasets_version():
+    """
+    Return ``{"token": ..., "last_modified": ...}`` for the current datasets.
+
+    ``last_modified`` is the time any dataset last changed (its upload or
+    latest append) as a Unix timestamp, or ``None`` when there are none.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = _new_version(_latest_change().first())
+        # add() so concurrent misses agree on the token that wins.
+        cache.add(VERSION_KEY, version, settings.API_CACHE_TIMEOUT)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+async def adatasets_version():
+    """Async ``datasets_version()``."""
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        version = _new_version(await _latest_change().afirst())
+        await cache.aadd(VERSION_KEY, version, settings.API_CACHE_TIMEOUT)
+        version = await cache.aget(VERSION_KEY, version)
+    return version
+
+
+def _latest_change():
+    return Dataset.objects.order_by("-updated_at").values_list("updated_at", flat=True)
+
+
+def _new_version(latest):
+    return {
+        "token": uuid.uuid4().hex,
+        "last_modified": latest.timestamp() if latest else None,
+    }
+
+
+def versioned_key(name, version, *parts):
+    return ":".join(["equipment", name, version["token"], *map(str, parts)])
+
+
+def invalidate_dataset_caches():
+    """Start a new dataset version once the current transaction commits."""
+    transaction.on_commit(_replace_version)
+
+
+def _replace_version():
+    # Overwrite rather than delete: a request that missed the version before
+    # the commit would otherwise add() a token for the old rows after it.
+    # With a fresh token in place, that request's add() fails, and anything
+    # it cached under its own token is never looked up.
+    version = _new_version(_latest_change().first())
+    cache.set(VERSION_KEY, version, settings.API_CACHE_TIMEOUT)
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    Return a ``304 Not Modified`` response if the request's validators match.
+
+    ``etag`` is an unquoted entity tag. Returns ``None`` when the full
+    response should be sent.
+    """
+    response = get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=int(last_modified) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = quote_etag(etag)
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    # Clients may store responses but must revalidate before reusing them.
+    response["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,127 @@
+"""
+Vector bar charts for the PDF report.
+
+Charts are reportlab ``Drawing`` objects rendered straight onto the report
+canvas, so they stay sharp at any zoom and cost a few hundred bytes of PDF
+operators instead of an embedded PNG.
+"""
+
+import math
+
+from reportlab.graphics import renderPDF
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+
+TYPE_COLORS = ["#4CAF50", "#2196F3", "#FF9800", "#9C27B0", "#F44336", "#00BCD4"]
+PARAMETER_COLORS = ["#2196F3", "#4CAF50", "#FF5722"]
+
+# Types beyond this many are folded into a single "Other" bar.
+MAX_CHART_TYPES = 12
+# Category labels longer than this are cut short.
+MAX_LABEL_LENGTH = 14
+
+
+def draw_chart(pdf, drawing, x, y):
+    renderPDF.draw(drawing, pdf, x, y)
+
+
+def _bar_chart(title, labels, values, bar_colors, width, height, value_format=None):
+    drawing = Drawing(width, height)
+    drawing.add(
+        String(width / 2, height - 14, title, fontName="Helvetica-Bold",
+               fontSize=10, textAnchor="middle")
+    )
+
+    chart = VerticalBarChart()
+    chart.x = 36
+    chart.width = width - chart.x - 10
+
+    # Labels wider than their bar's slot are shrunk and rotated instead of
+    # overlapping their neighbours.
+    font_size = 8 if len(labels) <= 6 else 6
+    slot = chart.width / max(len(labels), 1)
+    widest = max(
+        (stringWidth(label, "Helvetica", font_size) for label in labels), default=0
+    )
+    rotate = widest > slot - 4
+    chart.y = 8 + (widest * 0.71 + font_size if rotate else font_size + 6)
+    chart.height = height - chart.y - 24
+    chart.data = [values]
+    chart.barSpacing = 2
+    chart.groupSpacing = 6
+
+    chart.categoryAxis.categoryNames = labels
+    chart.categoryAxis.labels.fontName = "Helvetica"
+    chart.categoryAxis.labels.fontSize = font_size
+    if rotate:
+        chart.categoryAxis.labels.angle = 45
+        chart.categoryAxis.labels.boxAnchor = "ne"
+        chart.categoryAxis.labels.dx = 2
+        chart.categoryAxis.labels.dy = -2
+
+    chart.valueAxis.valueMin = min(0, min(values, default=0))
+    if value_format:
+        # Leave headroom so the tallest bar's label stays clear of the title.
+        chart.valueAxis.valueMax = max(values, default=0) * 1.15 or None
+    chart.valueAxis.labels.fontName = "Helvetica"
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = colors.HexColor("#E0E0E0")
+
+    chart.bars.strokeColor = None
+    for i, color in enumerate(bar_colors):
+        chart.bars[(0, i)].fillColor = colors.HexColor(color)
+
+    if value_format:
+        chart.barLabelFormat = value_format
+        chart.barLabels.fontName = "Helvetica"
+        chart.barLabels.fontSize = 7
+        chart.barLabels.nudge = 6
+
+    drawing.add(chart)
+    return drawing
+
+
+def _label(name):
+    name = str(name)
+    if len(name) > MAX_LABEL_LENGTH:
+        return name[:MAX_LABEL_LENGTH - 3] + "..."
+    return name
+
+
+def type_distribution_chart(type_distribution, width, height):
+    items = list(type_distribution.items())
+    if len(items) > MAX_CHART_TYPES:
+        shown = items[:MAX_CHART_TYPES - 1]
+        shown.append(("Other", sum(count for _, count in items[MAX_CHART_TYPES - 1:])))
+        items = shown
+
+    return _bar_chart(
+        "Equipment Type Distribution",
+        [_label(name) for name, _ in items],
+        [count for _, count in items],
+        [TYPE_COLORS[i % len(TYPE_COLORS)] for i in range(len(items))],
+        width,
+        height,
+    )
+
+
+def average_parameters_chart(summary, width, height):
+    values = [
+        summary.get("average_flowrate", 0),
+        summary.get("average_pressure", 0),
+        summary.get("average_temperature", 0),
+    ]
+    return _bar_chart(
+        "Average Parameters",
+        ["Flowrate", "Pressure", "Temperature"],
+        # Means of empty datasets are NaN; draw them as zero-height bars.
+        [value if math.isfinite(value) else 0 for value in values],
+        PARAMETER_COLORS,
+        width,
+        height,
+        value_format="%.1f",
+    )
@@ -0,0 +1,103 @@
+"""
+Keyset pagination of the dataset history.
+
+Pages are ordered newest first by ``(uploaded_at, id)``. A cursor encodes
+the last row of the previous page, so fetching the next page is an index
+range scan on ``dataset_uploaded_id_idx`` however deep the client has
+scrolled, and rows uploaded in the meantime never shift a page.
+"""
+
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Dataset
+
+
+HISTORY_FIELDS = ["id", "filename", "uploaded_at", "summary", "type_statistics"]
+
+
+class InvalidCursorError(ValueError):
+    def __init__(self):
+        super().__init__("Invalid cursor.")
+
+
+class InvalidFieldsError(ValueError):
+    def __init__(self, fields):
+        super().__init__(f"Unknown fields: {', '.join(fields)}.")
+        self.fields = fields
+
+
+def parse_fields(value):
+    """Split a comma-separated ``fields`` parameter; all fields when empty."""
+    fields = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in HISTORY_FIELDS]
+    if unknown:
+        raise InvalidFieldsError(unknown)
+    return list(dict.fromkeys(fields)) or list(HISTORY_FIELDS)
+
+
+def encode_cursor(dataset):
+    position = f"{dataset.uploaded_at.isoformat()}|{dataset.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the ``(uploaded_at, id)`` a cursor points after."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        uploaded_at, dataset_id = (
+            base64.urlsafe_b64decode(padded).decode().split("|")
+        )
+        position = parse_datetime(uploaded_at), int(dataset_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError()
+    if position[0] is None:
+        raise InvalidCursorError()
+    return position
+
+
+def history_page(after=None, page_size=5, fields=None):
+    """
+    Return ``(datasets, next_cursor)`` for one page of history.
+
+    ``after`` is a decoded cursor; the page starts with the dataset after it.
+    Only the columns behind ``fields`` (plus the ordering key) are loaded, so
+    rows without ``summary`` never read the summary JSON. ``next_cursor`` is
+    ``None`` on the last page.
+    """
+    return _split_page(list(_page_query(after, page_size, fields)), page_size)
+
+
+async def ahistory_page(after=None, page_size=5, fields=None):
+    """Async ``history_page()``."""
+    page = [dataset async for dataset in _page_query(after, page_size, fields)]
+    return _split_page(page, page_size)
+
+
+def _page_query(after, page_size, fields):
+    fields = fields or HISTORY_FIELDS
+    datasets = Dataset.objects.order_by("-uploaded_at", "-id").only(
+        "id", "uploaded_at", *fields
+    )
+
+    if after is not None:
+        uploaded_at, dataset_id = after
+        # The redundant upper bound lets the database seek into the index
+        # instead of scanning it from the newest row.
+        datasets = datasets.filter(
+            Q(uploaded_at__lt=uploaded_at)
+            | Q(uploaded_at=uploaded_at, id__lt=dataset_id),
+            uploaded_at__lte=uploaded_at,
+        )
+
+    # One extra row tells whether another page follows.
+    return datasets[:page_size + 1]
+
+
+def _split_page(page, page_size):
+    if len(page) > page_size:
+        return page[:page_size], encode_cursor(page[page_size - 1])
+    return page, None
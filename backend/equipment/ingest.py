@@ -0,0 +1,357 @@
+"""
+Upload ingestion pipeline shared by the upload endpoints.
+
+Turns an uploaded CSV into a stored ``Dataset``: content hashing for
+deduplication, chunked summarizing and archiving, report pre-rendering
+and history retention.
+"""
+
+import gzip
+import hashlib
+import time
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .metrics import record_csv, timed
+from .models import Dataset, UploadJob
+from .reports import prerender_report
+from .schema import EmptyCSVError, InvalidCSVError, InvalidRowsError, MissingColumnsError
+
+try:
+    import zstandard
+except ImportError:  # zstd request bodies are optional
+    zstandard = None
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+CONTENT_ENCODINGS = {"identity", "gzip"} | ({"zstd"} if zstandard else set())
+
+
+class UploadEncodingError(ValueError):
+    """Raised when a compressed request body cannot be decompressed."""
+
+
+class DatasetNotAppendableError(ValueError):
+    """Raised when a dataset has no stored aggregates or archive to extend."""
+
+
+def decoded_chunks(uploaded_file, content_encoding="identity", chunk_size=HASH_CHUNK_SIZE):
+    """
+    Yield the decompressed bytes of ``uploaded_file`` in blocks.
+
+    ``content_encoding`` is the request's ``Content-Encoding`` (one of
+    ``CONTENT_ENCODINGS``). Decompression is streamed, so a compressed body
+    is never expanded in memory all at once.
+    """
+    if content_encoding == "identity":
+        yield from uploaded_file.chunks(chunk_size)
+        return
+
+    uploaded_file.seek(0)
+    if content_encoding == "gzip":
+        stream = gzip.GzipFile(fileobj=uploaded_file, mode="rb")
+        errors = (OSError, EOFError, zlib.error)
+    else:
+        stream = zstandard.ZstdDecompressor().stream_reader(uploaded_file)
+        errors = (zstandard.ZstdError,)
+
+    try:
+        with stream:
+            while block := stream.read(chunk_size):
+                yield block
+    except errors as exc:
+        raise UploadEncodingError(f"Invalid {content_encoding} body.") from exc
+
+
+@timed("hash")
+def hash_upload(uploaded_file):
+    """Return the SHA-256 hex digest of ``uploaded_file`` and rewind it."""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def find_duplicate(content_hash):
+    if not content_hash:
+        return None
+    return (
+        Dataset.objects
+        .filter(content_hash=content_hash)
+        .order_by("-uploaded_at")
+        .first()
+    )
+
+
+async def afind_duplicate(content_hash):
+    if not content_hash:
+        return None
+    return await (
+        Dataset.objects
+        .filter(content_hash=content_hash)
+        .order_by("-uploaded_at")
+        .afirst()
+    )
+
+
+def archive_csv(csv_file, on_progress=None, drop_invalid=False, archive=None):
+    """
+    Validate and summarize ``csv_file`` while writing its rows to a new archive.
+
+    Returns ``(accumulator, archive_name, report)`` where ``report`` is the
+    ``ValidationReport``. ``on_progress`` is called after every chunk with
+    the number of bytes of ``csv_file`` consumed so far. Invalid rows are
+    left out of the summary and archive when ``drop_invalid`` is set and
+    otherwise raise ``InvalidRowsError``; a file without data rows raises
+    ``EmptyCSVError``. The archive is removed again if the file is
+    rejected. Pass an ``ArchiveWriter`` as ``archive`` to write
+    somewhere other than a new archive.
+    """
+    # pandas and pyarrow load on the first upload, not at server start.
+    from .analytics import ValidationReport, accumulate_csv, require_rows
+    from .archive import ArchiveWriter
+
+    archive = ArchiveWriter() if archive is None else archive
+    report = ValidationReport()
+
+    def on_chunk(chunk):
+        with timed("archive"):
+            archive.write(chunk)
+        if on_progress is not None:
+            on_progress(csv_file.tell())
+
+    try:
+        accumulator = accumulate_csv(
+            csv_file,
+            chunksize=settings.CSV_CHUNK_SIZE,
+            on_chunk=on_chunk,
+            drop_invalid=drop_invalid,
+            report=report,
+            engine=settings.CSV_ENGINE,
+        )
+        require_rows(report)
+    except Exception:
+        archive.abort()
+        raise
+
+    archive.close()
+    return accumulator, archive.name, report
+
+
+def build_summary(accumulator, report):
+    """The stored summary; notes dropped rows so the numbers can be read right."""
+    summary = accumulator.result()
+    if report.dropped_rows:
+        summary["validation"] = report.to_dict()
+    return summary
+
+
+def ingest_csv(csv_file, filename, content_hash="", on_progress=None, drop_invalid=False):
+    """
+    Summarize and archive ``csv_file`` and store it as a new ``Dataset``.
+
+    ``on_progress`` is called after every chunk with the number of bytes of
+    ``csv_file`` consumed so far. With ``drop_invalid``, rows that fail
+    validation are skipped instead of rejecting the file. Large files on
+    disk are parsed in byte ranges on the process pool.
+
+    Raises ``InvalidCSVError`` (or its ``MissingColumnsError``,
+    ``EmptyCSVError`` and ``InvalidRowsError`` subclasses) if the file is
+    not a usable equipment CSV; nothing is stored in that case, and the
+    archive is removed again if the insert fails.
+    """
+    from .parallel import archive_csv_parallel, plan_ranges
+
+    start = time.perf_counter()
+    plan = plan_ranges(csv_file)
+    if plan is None:
+        accumulator, archive_name, report = archive_csv(csv_file, on_progress, drop_invalid)
+        bytes_parsed = csv_file.tell()
+    else:
+        path, bounds = plan
+        accumulator, archive_name, report = archive_csv_parallel(
+            path, bounds, on_progress, drop_invalid
+        )
+        bytes_parsed = bounds[-1]
+    record_csv(bytes_parsed, report.rows_checked, time.perf_counter() - start)
+
+    try:
+        with timed("insert"):
+            dataset = Dataset.objects.create(
+                filename=filename,
+                summary=build_summary(accumulator, report),
+                type_statistics=accumulator.type_statistics(),
+                aggregates=accumulator.to_state(),
+                archive_path=archive_name,
+                content_hash=content_hash,
+            )
+    except Exception:
+        from .archive import delete_archive
+
+        delete_archive(archive_name)
+        raise
+
+    if settings.PDF_PRERENDER:
+        transaction.on_commit(lambda: prerender_report(dataset))
+
+    maybe_prune_datasets(dataset)
+
+    return dataset
+
+
+def append_csv(dataset, csv_file, drop_invalid=False):
+    """
+    Fold the rows of ``csv_file`` into the stored ``dataset``.
+
+    Only the new rows are read: they are validated, summarized and written
+    as a new part of the dataset's archive, and their aggregates are merged
+    into the stored ones. The dataset's ``content_hash`` is cleared, since
+    it no longer matches any single upload. Returns ``(dataset, report)``
+    with the updated dataset and the ``ValidationReport`` of the new rows.
+
+    Raises ``InvalidCSVError`` like ``ingest_csv``, leaving the dataset
+    untouched, and ``DatasetNotAppendableError`` for datasets stored
+    before aggregates and archives were kept.
+    """
+    from .analytics import SummaryAccumulator, ValidationReport
+    from .archive import ArchiveWriter
+
+    if not dataset.aggregates or not dataset.archive_path:
+        raise DatasetNotAppendableError(
+            "Dataset has no stored aggregates; run resummarize_datasets first."
+        )
+
+    start = time.perf_counter()
+    archive = ArchiveWriter.append_to(dataset.archive_path)
+    added, _, report = archive_csv(csv_file, drop_invalid=drop_invalid, archive=archive)
+    record_csv(csv_file.tell(), report.rows_checked, time.perf_counter() - start)
+
+    try:
+        with transaction.atomic(), timed("insert"):
+            # Locked so concurrent appends each merge into the latest state.
+            dataset = Dataset.objects.select_for_update().get(pk=dataset.pk)
+            accumulator = SummaryAccumulator.from_state(dataset.aggregates).merge(added)
+
+            validation = dataset.summary.get("validation")
+            if validation:
+                stored_report = ValidationReport.from_dict(validation)
+            else:
+                stored_report = ValidationReport()
+                stored_report.rows_checked = dataset.summary["total_equipment"]
+
+            dataset.summary = build_summary(accumulator, stored_report.merge(report))
+            dataset.type_statistics = accumulator.type_statistics()
+            dataset.aggregates = accumulator.to_state()
+            dataset.content_hash = ""
+            dataset.save(
+                update_fields=[
+                    "summary", "type_statistics", "aggregates", "content_hash", "updated_at",
+                ]
+            )
+    except Exception:
+        archive.abort()
+        raise
+
+    if settings.PDF_PRERENDER:
+        transaction.on_commit(lambda: prerender_report(dataset))
+
+    return dataset, report
+
+
+def upload_error(exc):
+    """Describe an ingestion failure as an API error payload."""
+    if isinstance(exc, MissingColumnsError):
+        return {
+            "error": "Missing required columns.",
+            "missing_columns": exc.missing_columns,
+        }
+    if isinstance(exc, InvalidRowsError):
+        no_valid_rows = exc.report.dropped_rows == exc.report.rows_checked
+        return {
+            "error": (
+                "CSV contains no valid rows."
+                if no_valid_rows
+                else "CSV contains invalid rows."
+            ),
+            "validation": exc.report.to_dict(),
+        }
+    if isinstance(exc, EmptyCSVError):
+        return {"error": "CSV contains no data rows."}
+    if isinstance(exc, InvalidCSVError):
+        return {"error": "Invalid CSV file."}
+    return {"error": "Processing failed."}
+
+
+# =========================
+# Retention
+# =========================
+
+def maybe_prune_datasets(dataset):
+    """
+    Run the retention sweep on every ``DATASET_PRUNE_EVERY``-th upload.
+
+    Keying off the new row's id spreads the cost of pruning over many
+    uploads without having to keep a counter anywhere.
+    """
+    if dataset.id % settings.DATASET_PRUNE_EVERY == 0:
+        transaction.on_commit(prune_datasets)
+
+
+@timed("prune")
+def prune_datasets(keep=None, batch_size=None):
+    """
+    Delete all but the newest ``keep`` datasets, ``batch_size`` rows at a time.
+
+    Rows are selected by keyset on ``(uploaded_at, id)`` below the oldest row
+    being kept, which the ``dataset_uploaded_id_idx`` index serves directly.
+    Each batch is its own short transaction so concurrent uploads are never
+    blocked for the whole sweep. Returns the number of datasets deleted.
+    """
+    keep = settings.DATASET_RETENTION_KEEP if keep is None else keep
+    batch_size = batch_size or settings.DATASET_PRUNE_BATCH_SIZE
+
+    newest = Dataset.objects.order_by("-uploaded_at", "-id")
+    if keep:
+        boundary = newest.values_list("uploaded_at", "id")[keep - 1:keep].first()
+        if boundary is None:
+            return 0
+        cutoff_at, cutoff_id = boundary
+        expired = Dataset.objects.filter(
+            Q(uploaded_at__lt=cutoff_at) | Q(uploaded_at=cutoff_at, id__lt=cutoff_id)
+        )
+    else:
+        expired = Dataset.objects.all()
+
+    deleted = 0
+    while True:
+        batch = list(
+            expired.order_by("uploaded_at", "id").values_list("id", flat=True)[:batch_size]
+        )
+        if not batch:
+            break
+        with transaction.atomic():
+            # Goes through the ORM so archives are removed by post_delete.
+            _, counts = Dataset.objects.filter(id__in=batch).delete()
+        deleted += counts.get(Dataset._meta.label, 0)
+
+    prune_upload_jobs()
+
+    return deleted
+
+
+def prune_upload_jobs():
+    from .jobs import reclaim_stale_jobs
+
+    reclaim_stale_jobs()
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_JOB_RETENTION)
+    UploadJob.objects.filter(
+        status__in=[UploadJob.Status.SUCCEEDED, UploadJob.Status.FAILED],
+        updated_at__lt=cutoff,
+    ).delete()
@@ -0,0 +1,210 @@
+"""
+Background processing of spooled uploads.
+
+An asynchronous upload is written to ``settings.UPLOAD_SPOOL_ROOT`` and
+recorded as an ``UploadJob`` row, which doubles as the work queue. Jobs run
+on a local thread pool once the creating transaction commits; the
+``process_upload_jobs`` management command drains anything left pending,
+e.g. by a restart before the job was handed to the pool. Jobs whose
+process died while running them are failed once they have been silent
+for ``UPLOAD_JOB_TIMEOUT`` seconds.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .schema import InvalidCSVError
+from .ingest import decoded_chunks, ingest_csv, upload_error
+from .metrics import collect_stages, timed
+from .models import UploadJob
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.UPLOAD_WORKERS,
+                thread_name_prefix="upload-job",
+            )
+        return _executor
+
+
+def spool_root():
+    return Path(settings.UPLOAD_SPOOL_ROOT)
+
+
+def spool_upload(uploaded_file, content_encoding="identity"):
+    """
+    Copy ``uploaded_file`` into the spool directory, hashing it on the way.
+
+    Compressed bodies are decompressed while they are copied, so the spooled
+    file and the hash always describe the plain CSV. Returns
+    ``(spool_path, content_hash)`` where ``spool_path`` is relative to
+    ``settings.UPLOAD_SPOOL_ROOT``.
+    """
+    return spool_blocks(decoded_chunks(uploaded_file, content_encoding))
+
+
+@timed("spool")
+def spool_blocks(blocks):
+    """Write an iterable of byte blocks to a new spool file; see ``spool_upload``."""
+    spool_root().mkdir(parents=True, exist_ok=True)
+    spool_path = f"{uuid.uuid4().hex}.csv"
+    digest = hashlib.sha256()
+
+    try:
+        with open(spool_root() / spool_path, "wb") as spool_file:
+            for block in blocks:
+                digest.update(block)
+                spool_file.write(block)
+    except Exception:
+        discard_spool(spool_path)
+        raise
+
+    return spool_path, digest.hexdigest()
+
+
+def discard_spool(spool_path):
+    if spool_path:
+        (spool_root() / spool_path).unlink(missing_ok=True)
+
+
+def submit_upload_job(filename, spool_path, content_hash, drop_invalid=False):
+    job = UploadJob.objects.create(
+        filename=filename,
+        spool_path=spool_path,
+        content_hash=content_hash,
+        drop_invalid=drop_invalid,
+    )
+    transaction.on_commit(lambda: get_executor().submit(_run_in_worker, job.id))
+    return job
+
+
+def _run_in_worker(job_id):
+    try:
+        with collect_stages():
+            run_upload_job(job_id)
+    finally:
+        # Pool threads outlive the job; don't leave their connection open.
+        connection.close()
+
+
+def run_upload_job(job_id):
+    """Process one pending job; safe to call for a job another worker claimed."""
+    # update() skips auto_now, so running jobs stamp updated_at themselves;
+    # reclaim_stale_jobs() reads it as the last sign of life.
+    claimed = UploadJob.objects.filter(
+        id=job_id, status=UploadJob.Status.PENDING
+    ).update(status=UploadJob.Status.RUNNING, updated_at=timezone.now())
+    if not claimed:
+        return
+
+    job = UploadJob.objects.get(id=job_id)
+    path = spool_root() / job.spool_path
+    outcome = {}
+
+    try:
+        total_bytes = os.path.getsize(path) or 1
+        last_reported = 0.0
+
+        def on_progress(bytes_read):
+            nonlocal last_reported
+            progress = min(bytes_read / total_bytes, 1.0)
+            # Throttle progress writes to roughly one per percent.
+            if progress - last_reported >= 0.01:
+                last_reported = progress
+                UploadJob.objects.filter(id=job.id).update(
+                    progress=progress, updated_at=timezone.now()
+                )
+
+        with open(path, "rb") as csv_file:
+            dataset = ingest_csv(
+                csv_file,
+                job.filename,
+                job.content_hash,
+                on_progress=on_progress,
+                drop_invalid=job.drop_invalid,
+            )
+    except Exception as exc:
+        if not isinstance(exc, InvalidCSVError):
+            logger.exception("Upload job %s failed", job.id)
+        outcome = {"status": UploadJob.Status.FAILED, "error": upload_error(exc)}
+    else:
+        outcome = {
+            "status": UploadJob.Status.SUCCEEDED,
+            "progress": 1.0,
+            "dataset": dataset,
+            "summary": dataset.summary,
+        }
+    finally:
+        discard_spool(job.spool_path)
+        # Conditional, so a job reclaim_stale_jobs() already failed stays failed.
+        finished = UploadJob.objects.filter(
+            id=job.id, status=UploadJob.Status.RUNNING
+        ).update(spool_path="", updated_at=timezone.now(), **outcome)
+        if not finished:
+            logger.warning("Upload job %s was reclaimed before it finished", job.id)
+
+
+def reclaim_stale_jobs(jobs=None):
+    """
+    Fail running jobs silent for over ``UPLOAD_JOB_TIMEOUT`` seconds.
+
+    Such a job's worker died with its process, so nothing would ever finish
+    it. Its spooled upload is removed, and the retention sweep deletes the
+    job like any other failed one. ``jobs`` narrows the check to a queryset.
+    Returns the number of jobs reclaimed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_JOB_TIMEOUT)
+    stale = (UploadJob.objects.all() if jobs is None else jobs).filter(
+        status=UploadJob.Status.RUNNING, updated_at__lt=cutoff
+    )
+
+    reclaimed = 0
+    for job in stale:
+        # Conditional, in case the job finished after it was read.
+        updated = UploadJob.objects.filter(
+            id=job.id, status=UploadJob.Status.RUNNING, updated_at=job.updated_at
+        ).update(
+            status=UploadJob.Status.FAILED,
+            error={"error": "Processing was interrupted; please upload the file again."},
+            spool_path="",
+            updated_at=timezone.now(),
+        )
+        if updated:
+            discard_spool(job.spool_path)
+            reclaimed += 1
+    return reclaimed
+
+
+def run_pending_jobs(min_age=0):
+    """
+    Reclaim stale jobs, then run pending jobs created over ``min_age`` seconds ago.
+
+    ``min_age`` leaves fresh jobs to the web process that created them.
+    """
+    reclaim_stale_jobs()
+    pending = UploadJob.objects.filter(
+        status=UploadJob.Status.PENDING,
+        created_at__lte=timezone.now() - timedelta(seconds=min_age),
+    ).order_by("created_at")
+
+    for job_id in pending.values_list("id", flat=True):
+        run_upload_job(job_id)
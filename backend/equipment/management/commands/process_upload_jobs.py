@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from equipment.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Fail upload jobs left running by a dead process and process those "
+        "still pending, e.g. after a server restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            help=(
+                "Keep running, draining every INTERVAL seconds the jobs pending "
+                "for at least that long (default: drain everything once)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        if not interval:
+            run_pending_jobs()
+            return
+
+        while True:
+            run_pending_jobs(min_age=interval)
+            time.sleep(interval)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from equipment.ingest import prune_datasets
+
+
+class Command(BaseCommand):
+    help = "Delete datasets beyond the retention limit, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep",
+            type=int,
+            help="Number of newest datasets to keep (default: DATASET_RETENTION_KEEP).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Rows deleted per transaction (default: DATASET_PRUNE_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_datasets(keep=options["keep"], batch_size=options["batch_size"])
+        self.stdout.write(f"Deleted {deleted} dataset(s).")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from equipment.archive import accumulate_archive
+from equipment.models import Dataset
+
+
+class Command(BaseCommand):
+    help = "Recompute dataset summaries from their archived Parquet rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "ids",
+            nargs="*",
+            type=int,
+            help="Dataset ids to re-summarize (default: every archived dataset).",
+        )
+
+    def handle(self, *args, **options):
+        datasets = Dataset.objects.exclude(archive_path="")
+        if options["ids"]:
+            datasets = datasets.filter(id__in=options["ids"])
+
+        for dataset in datasets.iterator():
+            accumulator = accumulate_archive(dataset.archive_path)
+            validation = dataset.summary.get("validation")
+            dataset.summary = accumulator.result()
+            if validation:
+                # The archive only holds the rows that passed validation.
+                dataset.summary["validation"] = validation
+            dataset.type_statistics = accumulator.type_statistics()
+            dataset.aggregates = accumulator.to_state()
+            dataset.save(
+                update_fields=["summary", "type_statistics", "aggregates", "updated_at"]
+            )
+            self.stdout.write(f"Re-summarized {dataset}")
@@ -0,0 +1,251 @@
+"""
+Request timing and Prometheus metrics.
+
+``MetricsMiddleware`` times every request. Code on the hot path marks its
+stages with ``with timed("parse"):``. Durations of the same stage add up over
+a request, are returned in the ``Server-Timing`` header and feed per-stage
+histograms. ``/api/metrics/`` renders everything in the Prometheus text
+format.
+
+Outside a request (unless wrapped in ``collect_stages``), in process-pool
+workers, or with ``settings.METRICS_ENABLED`` off, ``timed`` costs a single
+context-variable lookup. Metrics are kept in process memory, so each server
+process reports its own.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRICS = {
+    "equipment_http_requests_total": (
+        "counter", "HTTP requests by method, route and status code.",
+    ),
+    "equipment_http_request_duration_seconds": (
+        "histogram", "HTTP request latency by route.",
+    ),
+    "equipment_stage_duration_seconds": (
+        "histogram", "Time spent in each processing stage.",
+    ),
+    "equipment_csv_bytes_parsed_total": (
+        "counter", "Bytes of CSV parsed by successful uploads.",
+    ),
+    "equipment_csv_rows_parsed_total": (
+        "counter", "CSV rows parsed by successful uploads.",
+    ),
+    "equipment_csv_parse_seconds_total": (
+        "counter", "Time spent parsing, validating and summarizing CSVs.",
+    ),
+    "equipment_csv_rows_per_second": (
+        "gauge", "Parsing throughput of the most recent upload.",
+    ),
+}
+
+_stages = ContextVar("equipment_stages", default=None)
+
+
+# =========================
+# Registry
+# =========================
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+
+
+class Registry:
+    """Thread-safe counters, gauges and histograms keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = defaultdict(float)
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self.values[name, _label_key(labels)] += value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.values[name, _label_key(labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = name, _label_key(labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            values = dict(self.values)
+            histograms = {
+                key: (h.buckets, list(h.counts), h.sum, h.count)
+                for key, h in self.histograms.items()
+            }
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for (metric, labels), (buckets, counts, total, count) in sorted(
+                histograms.items()
+            ):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    le = (("le", f"{bound:g}"),)
+                    lines.append(f"{name}_bucket{_format_labels(labels + le)} {cumulative}")
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {count}')
+                lines.append(f"{name}_sum{_format_labels(labels)} {total:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+registry = Registry()
+
+
+# =========================
+# Recording
+# =========================
+
+@contextmanager
+def timed(stage):
+    """Add the time spent in this block to ``stage`` of the current request."""
+    stages = _stages.get()
+    if stages is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - start
+
+
+@contextmanager
+def collect_stages():
+    """
+    Collect ``timed`` stages inside this block and record their histograms.
+
+    Yields the ``{stage: seconds}`` dict, filled in as stages finish; it
+    stays empty when metrics are disabled.
+    """
+    stages = {}
+    if not settings.METRICS_ENABLED:
+        yield stages
+        return
+
+    token = _stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _stages.reset(token)
+        for stage, seconds in stages.items():
+            registry.observe("equipment_stage_duration_seconds", seconds, stage=stage)
+
+
+def record_csv(bytes_parsed, rows, seconds):
+    """Count one successfully parsed CSV."""
+    if not settings.METRICS_ENABLED:
+        return
+    registry.inc("equipment_csv_bytes_parsed_total", bytes_parsed)
+    registry.inc("equipment_csv_rows_parsed_total", rows)
+    registry.inc("equipment_csv_parse_seconds_total", seconds)
+    if seconds > 0:
+        registry.set("equipment_csv_rows_per_second", rows / seconds)
+
+
+def server_timing(stages, total):
+    """Format stage durations as a ``Server-Timing`` header value."""
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in stages.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """Count and time requests and add a ``Server-Timing`` header."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with collect_stages() as stages:
+            response = self.get_response(request)
+        return self.finish(request, response, stages, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        with collect_stages() as stages:
+            response = await self.get_response(request)
+        return self.finish(request, response, stages, time.perf_counter() - start)
+
+    def finish(self, request, response, stages, duration):
+        match = request.resolver_match
+        route = match.route if match is not None else "unmatched"
+        registry.inc(
+            "equipment_http_requests_total",
+            method=request.method,
+            route=route,
+            status=response.status_code,
+        )
+        registry.observe("equipment_http_request_duration_seconds", duration, route=route)
+
+        response["Server-Timing"] = server_timing(stages, duration)
+        return response
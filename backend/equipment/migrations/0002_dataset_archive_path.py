@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("equipment", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="archive_path",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("equipment", "0002_dataset_archive_path"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("equipment", "0003_dataset_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="aggregates",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
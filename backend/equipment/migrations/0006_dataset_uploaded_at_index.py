@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("equipment", "0005_uploadjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="dataset",
+            name="uploaded_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
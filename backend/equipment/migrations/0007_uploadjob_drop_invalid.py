@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("equipment", "0006_dataset_uploaded_at_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadjob",
+            name="drop_invalid",
+            field=models.BooleanField(default=False),
+        ),
+    ]
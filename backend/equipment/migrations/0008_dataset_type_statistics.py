@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("equipment", "0007_uploadjob_drop_invalid"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="type_statistics",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("equipment", "0008_dataset_type_statistics"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dataset",
+            index=models.Index(
+                fields=["-uploaded_at", "-id"], name="dataset_uploaded_id_idx"
+            ),
+        ),
+    ]
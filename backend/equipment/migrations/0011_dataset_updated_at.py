@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 07:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_uploaded_at(apps, schema_editor):
+    Dataset = apps.get_model("equipment", "Dataset")
+    Dataset.objects.update(updated_at=models.F("uploaded_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("equipment", "0010_dataset_uploaded_at_drop_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        # Existing datasets have not changed since they were uploaded.
+        migrations.RunPython(copy_uploaded_at, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,60 @@
+import uuid
+
 from django.db import models
 
 
 class Dataset(models.Model):
     filename = models.CharField(max_length=255)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # Bumped whenever the stored rows or summary change, e.g. by an append.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     summary = models.JSONField()
+    # Row count and mean/min/max of each numeric column per equipment Type.
+    type_statistics = models.JSONField(default=dict, blank=True)
+    # Mergeable SummaryAccumulator state the summary was derived from.
+    aggregates = models.JSONField(default=dict, blank=True)
+    # Directory under settings.DATASET_ARCHIVE_ROOT holding the raw rows.
+    archive_path = models.CharField(max_length=255, blank=True)
+    # SHA-256 of the uploaded bytes, used to deduplicate repeated uploads.
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the history, newest first.
+            models.Index(fields=["-uploaded_at", "-id"], name="dataset_uploaded_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.filename} ({self.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')})"
+
+
+class UploadJob(models.Model):
+    """An upload spooled to disk and processed by the background worker pool."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    # File under settings.UPLOAD_SPOOL_ROOT; removed once the job finishes.
+    spool_path = models.CharField(max_length=255, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    # Skip rows that fail validation instead of rejecting the file.
+    drop_invalid = models.BooleanField(default=False)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    progress = models.FloatField(default=0.0)
+    dataset = models.ForeignKey(
+        Dataset, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    summary = models.JSONField(null=True, blank=True)
+    error = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} [{self.status}]"
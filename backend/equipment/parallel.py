@@ -0,0 +1,206 @@
+"""
+Parallel parsing of large uploads that are already on disk.
+
+A spooled upload (or one Django streamed to a temporary file) is memory
+mapped and cut at line boundaries into one byte range per process-pool
+worker. Every worker validates and summarizes its range as a CSV of its
+own, with the header line in front, and writes it as its own part of the
+shared archive. The partial accumulators and validation reports are then
+merged in file order, so the stored summary and report are the same as a
+serial parse would give.
+
+A newline inside a quoted field would make a cut land mid-row, so files
+containing any ``"`` are always parsed serially.
+"""
+
+import io
+import mmap
+import os
+import uuid
+from concurrent.futures import as_completed, wait
+
+from django.conf import settings
+
+from .analytics import SummaryAccumulator, ValidationReport, accumulate_csv, require_rows
+from .archive import ArchiveWriter, delete_archive
+from .metrics import timed
+from .processes import get_process_pool
+from .schema import InvalidRowsError
+
+
+# =========================
+# Planning
+# =========================
+
+def upload_path(csv_file):
+    """The path of ``csv_file`` on disk, or ``None`` if it only exists in memory."""
+    if hasattr(csv_file, "temporary_file_path"):
+        return csv_file.temporary_file_path()
+    if isinstance(csv_file, io.BufferedReader):
+        return csv_file.name
+    return None
+
+
+def plan_ranges(csv_file):
+    """
+    Return ``(path, bounds)`` for parsing ``csv_file`` in parallel, or ``None``.
+
+    ``bounds`` are byte offsets: the end of the header line, the cut points
+    and the file size, so range ``i`` is ``bounds[i]:bounds[i + 1]``. Files
+    smaller than ``PARALLEL_PARSE_MIN_BYTES``, in memory or containing
+    quotes, and setups with a single worker, get ``None``.
+    """
+    workers = settings.PROCESS_WORKERS
+    path = upload_path(csv_file)
+    if workers < 2 or path is None:
+        return None
+    if os.path.getsize(path) < settings.PARALLEL_PARSE_MIN_BYTES:
+        return None
+
+    with open(path, "rb") as raw, mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data.find(b'"') != -1:
+            return None
+        header_end = data.find(b"\n") + 1
+        if not header_end:
+            return None
+        return path, split_lines(data, header_end, workers)
+
+
+def split_lines(data, start, parts):
+    """Offsets cutting ``data[start:]`` into up to ``parts`` runs of whole lines."""
+    size = len(data)
+    bounds = [start]
+    for i in range(1, parts):
+        target = start + (size - start) * i // parts
+        cut = data.find(b"\n", max(target, bounds[-1])) + 1
+        if not cut or cut >= size:
+            break
+        if cut > bounds[-1]:
+            bounds.append(cut)
+    bounds.append(size)
+    return bounds
+
+
+# =========================
+# Parsing
+# =========================
+
+class RangeFile(io.RawIOBase):
+    """Read-only, seekable file of ``data[:header_end]`` then ``data[start:end]``."""
+
+    def __init__(self, data, header_end, start, end):
+        super().__init__()
+        view = memoryview(data)
+        self._parts = [view[:header_end], view[start:end]]
+        view.release()
+        self._size = header_end + (end - start)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def readinto(self, buffer):
+        header, body = self._parts
+        if self._pos < len(header):
+            source = header[self._pos:]
+        else:
+            source = body[self._pos - len(header):]
+        count = min(len(buffer), len(source))
+        buffer[:count] = source[:count]
+        self._pos += count
+        return count
+
+    def close(self):
+        # The views must go before the mmap they point into can be closed.
+        for part in self._parts:
+            part.release()
+        super().close()
+
+
+def parse_range(path, bounds, index, archive_name, drop_invalid=False):
+    """
+    Process-pool task: validate, summarize and archive one byte range.
+
+    Returns ``(state, report)``; ``state`` is the accumulator's
+    ``to_state()``, or ``None`` if the range had invalid rows and
+    ``drop_invalid`` is off. Rows in ``report`` are numbered from the start
+    of the range.
+    """
+    report = ValidationReport()
+    archive = ArchiveWriter(archive_name, part=index)
+    with open(path, "rb") as raw, mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        with RangeFile(data, bounds[0], bounds[index], bounds[index + 1]) as range_file:
+            try:
+                accumulator = accumulate_csv(
+                    range_file,
+                    chunksize=settings.CSV_CHUNK_SIZE,
+                    on_chunk=archive.write,
+                    drop_invalid=drop_invalid,
+                    report=report,
+                    engine=settings.CSV_ENGINE,
+                )
+            except InvalidRowsError:
+                # The parent raises once every range's problems are known.
+                return None, report
+            finally:
+                archive.close()
+    return accumulator.to_state(), report
+
+
+def archive_csv_parallel(path, bounds, on_progress=None, drop_invalid=False):
+    """
+    ``archive_csv`` for the file at ``path``, one range of ``bounds`` per task.
+
+    ``on_progress`` is called whenever a range finishes, with the number of
+    bytes parsed so far. Returns ``(accumulator, archive_name, report)``.
+    """
+    archive_name = uuid.uuid4().hex
+    pool = get_process_pool()
+    futures = {}
+
+    try:
+        with timed("parse"):
+            for index in range(len(bounds) - 1):
+                future = pool.submit(
+                    parse_range, path, bounds, index, archive_name, drop_invalid
+                )
+                futures[future] = index
+            parsed = bounds[0]
+            for future in as_completed(futures):
+                index = futures[future]
+                future.result()
+                parsed += bounds[index + 1] - bounds[index]
+                if on_progress is not None:
+                    on_progress(parsed)
+            results = [future.result() for future in futures]  # in file order
+
+        accumulator = SummaryAccumulator()
+        report = ValidationReport()
+        for state, range_report in results:
+            report.merge(range_report)
+            if state is not None:
+                accumulator.merge(SummaryAccumulator.from_state(state))
+
+        if report.invalid_rows and not drop_invalid:
+            raise InvalidRowsError(report)
+        require_rows(report)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        # Ranges still running would write parts into the removed directory.
+        wait(futures)
+        delete_archive(archive_name)
+        raise
+
+    return accumulator, archive_name, report
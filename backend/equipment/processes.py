@@ -0,0 +1,130 @@
+"""
+Process pools for CPU-bound work.
+
+Parsing CSVs is pure Python/pandas work that holds the GIL for long
+stretches, so it runs in worker processes instead of the thread pools used
+for I/O-bound jobs. Workers are started with ``spawn`` (forking a threaded
+server process can copy locks held by other threads) and run
+``django.setup()`` once, so tasks can use settings like any other code.
+
+PDF reports are rendered by a second, smaller pool of warm workers. They
+are forked from a ``forkserver`` that has already imported reportlab, and
+each one renders a throwaway report on start, so fonts and chart classes
+are loaded before the first real request instead of during it.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Imported once by the forkserver; every render worker inherits them.
+RENDER_PRELOAD = [
+    "reportlab.pdfgen.canvas",
+    "reportlab.graphics.renderPDF",
+    "reportlab.graphics.charts.barcharts",
+    "equipment.charts",
+]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def get_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def _init_render_worker():
+    import django
+
+    django.setup()
+
+    from .reports import warm_renderer
+
+    warm_renderer()
+
+
+def _render_context():
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")  # e.g. on Windows
+
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(RENDER_PRELOAD)
+    return context
+
+
+def get_render_pool():
+    """The report render pool, or ``None`` when ``PDF_RENDER_WORKERS`` is 0."""
+    global _render_pool
+    if settings.PDF_RENDER_WORKERS <= 0:
+        return None
+
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_RENDER_WORKERS,
+                mp_context=_render_context(),
+                initializer=_init_render_worker,
+            )
+        return _render_pool
+
+
+def discard_render_pool(pool):
+    """Drop ``pool`` (e.g. after a worker died) so the next render starts a new one."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _ping():
+    return True
+
+
+def _start_render_workers():
+    pool = get_render_pool()
+    if pool is None:
+        return
+    try:
+        # Workers start on demand, one per submission that finds none idle.
+        for future in [pool.submit(_ping) for _ in range(settings.PDF_RENDER_WORKERS)]:
+            future.result()
+    except Exception:
+        logger.exception("Could not start the report render workers")
+        discard_render_pool(pool)
+
+
+def prefork_render_pool():
+    """
+    Start the render workers in the background.
+
+    Called by the WSGI/ASGI entry points, so server processes have warm
+    renderers ready without delaying their boot, while management commands
+    never start them at all.
+    """
+    threading.Thread(
+        target=_start_render_workers, name="render-prefork", daemon=True
+    ).start()
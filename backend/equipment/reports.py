@@ -0,0 +1,340 @@
+"""
+PDF report rendering and caching.
+
+Reports only depend on a dataset's filename, upload time, summary and
+per-Type statistics, so each one is rendered once and cached under the
+dataset id plus a hash of those inputs. The same hash doubles as the HTTP
+ETag for the download.
+
+Charts are drawn as reportlab vector graphics (see ``charts.py``). The
+previous matplotlib renderer, which embeds rasterized PNGs, remains
+available through ``settings.PDF_CHART_RENDERER = "matplotlib"``.
+
+reportlab is imported by the rendering functions rather than at module
+level, and renders run on the warm worker pool from ``processes.py``, so
+web processes that never draw a report never load it.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from io import BytesIO
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import timed
+from .processes import discard_render_pool, get_render_pool
+
+
+# Bump when the report layout changes so cached PDFs are re-rendered.
+REPORT_VERSION = 3
+
+logger = logging.getLogger(__name__)
+
+_prerender_executor = None
+_prerender_lock = threading.Lock()
+
+
+# =========================
+# Rendering
+# =========================
+
+
+def generate_pdf(dataset, chart_renderer=None):
+    """
+    Render the report for ``dataset`` and return it as a ``BytesIO``.
+
+    ``chart_renderer`` is ``"vector"`` or ``"matplotlib"``; it defaults to
+    ``settings.PDF_CHART_RENDERER``.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    draw_charts = CHART_RENDERERS[chart_renderer or settings.PDF_CHART_RENDERER]
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    y = height - 50
+
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(50, y, "Chemical Equipment Dataset Report")
+    y -= 40
+
+    pdf.setFont("Helvetica", 12)
+    pdf.drawString(50, y, f"Filename: {dataset.filename}")
+    y -= 20
+    pdf.drawString(50, y, f"Uploaded At: {dataset.uploaded_at}")
+    y -= 30
+
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(50, y, "Summary Statistics")
+    y -= 20
+
+    pdf.setFont("Helvetica", 11)
+    summary = dataset.summary
+
+    pdf.drawString(50, y, f"Total Equipment: {summary['total_equipment']}")
+    y -= 20
+    pdf.drawString(50, y, f"Average Flowrate: {summary['average_flowrate']:.2f}")
+    y -= 20
+    pdf.drawString(50, y, f"Average Pressure: {summary['average_pressure']:.2f}")
+    y -= 20
+    pdf.drawString(50, y, f"Average Temperature: {summary['average_temperature']:.2f}")
+    y -= 30
+
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(50, y, "Equipment Type Distribution")
+    y -= 20
+
+    pdf.setFont("Helvetica", 11)
+    for eq_type, count in summary["type_distribution"].items():
+        if y < 50:
+            pdf.showPage()
+            pdf.setFont("Helvetica", 11)
+            y = height - 50
+        pdf.drawString(60, y, f"{eq_type}: {count}")
+        y -= 18
+
+    # === Charts ===
+    y -= 20
+    if y - 200 < 40:
+        # Many Types: move the charts to their own page rather than off it
+        pdf.showPage()
+        y = height - 50
+    draw_charts(pdf, summary, y)
+
+    pdf.showPage()
+
+    if dataset.type_statistics:
+        draw_type_statistics(pdf, dataset.type_statistics, height)
+
+    pdf.save()
+
+    buffer.seek(0)
+    return buffer
+
+
+def draw_vector_charts(pdf, summary, y):
+    """Draw both charts as vector graphics, side by side below ``y``."""
+    from .charts import average_parameters_chart, draw_chart, type_distribution_chart
+
+    type_distribution = summary.get("type_distribution", {})
+    if type_distribution:
+        draw_chart(pdf, type_distribution_chart(type_distribution, 250, 180), 50, y - 200)
+    draw_chart(pdf, average_parameters_chart(summary, 250, 180), 310, y - 200)
+
+
+def draw_matplotlib_charts(pdf, summary, y):
+    """Draw both charts as 100-dpi PNGs rendered by matplotlib."""
+    import matplotlib
+    matplotlib.use('Agg')  # Set non-interactive backend BEFORE importing pyplot
+    import matplotlib.pyplot as plt
+    from reportlab.lib.utils import ImageReader
+
+    # Chart 1: Equipment Type Distribution
+    type_distribution = summary.get("type_distribution", {})
+    if type_distribution:
+        fig1, ax1 = plt.subplots(figsize=(5, 3), dpi=100)
+        types = list(type_distribution.keys())
+        counts = list(type_distribution.values())
+        colors = ['#4CAF50', '#2196F3', '#FF9800', '#9C27B0', '#F44336', '#00BCD4']
+        bar_colors = [colors[i % len(colors)] for i in range(len(types))]
+        ax1.bar(types, counts, color=bar_colors)
+        ax1.set_title("Equipment Type Distribution", fontsize=10, fontweight='bold')
+        ax1.set_xlabel("Type")
+        ax1.set_ylabel("Count")
+        ax1.tick_params(axis='x', rotation=45)
+        fig1.tight_layout()
+        
+        # Save chart to BytesIO
+        chart1_buffer = BytesIO()
+        fig1.savefig(chart1_buffer, format='PNG', dpi=100, bbox_inches='tight')
+        chart1_buffer.seek(0)
+        plt.close(fig1)
+        
+        # Embed in PDF
+        chart1_img = ImageReader(chart1_buffer)
+        pdf.drawImage(chart1_img, 50, y - 200, width=250, height=180)
+    
+    # Chart 2: Average Parameters
+    avg_flowrate = summary.get("average_flowrate", 0)
+    avg_pressure = summary.get("average_pressure", 0)
+    avg_temperature = summary.get("average_temperature", 0)
+    
+    fig2, ax2 = plt.subplots(figsize=(5, 3), dpi=100)
+    params = ["Flowrate", "Pressure", "Temperature"]
+    values = [avg_flowrate, avg_pressure, avg_temperature]
+    colors = ['#2196F3', '#4CAF50', '#FF5722']
+    ax2.bar(params, values, color=colors)
+    ax2.set_title("Average Parameters", fontsize=10, fontweight='bold')
+    ax2.set_ylabel("Value")
+    for i, (param, value) in enumerate(zip(params, values)):
+        ax2.text(i, value + max(values) * 0.02, f"{value:.1f}", ha='center', fontsize=8)
+    fig2.tight_layout()
+    
+    # Save chart to BytesIO
+    chart2_buffer = BytesIO()
+    fig2.savefig(chart2_buffer, format='PNG', dpi=100, bbox_inches='tight')
+    chart2_buffer.seek(0)
+    plt.close(fig2)
+    
+    # Embed in PDF (next to first chart)
+    chart2_img = ImageReader(chart2_buffer)
+    pdf.drawImage(chart2_img, 310, y - 200, width=250, height=180)
+
+
+CHART_RENDERERS = {
+    "vector": draw_vector_charts,
+    "matplotlib": draw_matplotlib_charts,
+}
+
+
+def report_fields(dataset):
+    """The parts of ``dataset`` a report is drawn from, as plain data."""
+    return {
+        "filename": dataset.filename,
+        "uploaded_at": dataset.uploaded_at,
+        "summary": dataset.summary,
+        "type_statistics": dataset.type_statistics,
+    }
+
+
+def render_fields(fields):
+    """Render a report from ``report_fields`` output; runs in pool workers."""
+    return generate_pdf(SimpleNamespace(**fields)).getvalue()
+
+
+def render_report(dataset):
+    """Render the report for ``dataset`` on the render pool and return its bytes."""
+    pool = get_render_pool()
+    if pool is None:
+        return generate_pdf(dataset).getvalue()
+
+    try:
+        return pool.submit(render_fields, report_fields(dataset)).result()
+    except BrokenProcessPool:
+        logger.exception("Report render worker died; rendering in-process")
+        discard_render_pool(pool)
+        return generate_pdf(dataset).getvalue()
+
+
+def warm_renderer():
+    """Render a small throwaway report so fonts and chart code are loaded."""
+    render_fields(
+        {
+            "filename": "warmup.csv",
+            "uploaded_at": datetime.now(timezone.utc),
+            "summary": {
+                "total_equipment": 2,
+                "average_flowrate": 1.0,
+                "average_pressure": 1.0,
+                "average_temperature": 1.0,
+                "type_distribution": {"Pump": 1, "Valve": 1},
+            },
+            "type_statistics": {
+                "Pump": {"count": 1, "Flowrate": {"mean": 1.0, "min": 1.0, "max": 1.0}},
+            },
+        }
+    )
+
+
+def draw_type_statistics(pdf, type_statistics, height):
+    """Table of count and mean [min - max] per parameter for each Type."""
+    params = ["Flowrate", "Pressure", "Temperature"]
+    columns = [50, 170, 220, 345, 470]
+
+    def header(y):
+        pdf.setFont("Helvetica-Bold", 12)
+        pdf.drawString(50, y, "Statistics by Equipment Type")
+        y -= 16
+        pdf.setFont("Helvetica", 8)
+        pdf.drawString(50, y, "Mean [min - max] of each parameter")
+        y -= 20
+        pdf.setFont("Helvetica-Bold", 9)
+        for x, title in zip(columns, ["Type", "Count", *params]):
+            pdf.drawString(x, y, title)
+        pdf.setFont("Helvetica", 8)
+        return y - 16
+
+    y = header(height - 50)
+    for eq_type, stats in type_statistics.items():
+        if y < 50:
+            pdf.showPage()
+            y = header(height - 50)
+
+        pdf.drawString(columns[0], y, str(eq_type)[:22])
+        pdf.drawString(columns[1], y, str(stats.get("count", "")))
+        for x, param in zip(columns[2:], params):
+            values = stats.get(param)
+            if values:
+                pdf.drawString(
+                    x, y, f"{values['mean']:.2f} [{values['min']:.2f} - {values['max']:.2f}]"
+                )
+        y -= 16
+
+    pdf.showPage()
+
+
+# =========================
+# Caching
+# =========================
+
+def report_fingerprint(dataset):
+    payload = json.dumps(
+        {
+            "version": REPORT_VERSION,
+            "chart_renderer": settings.PDF_CHART_RENDERER,
+            "filename": dataset.filename,
+            "uploaded_at": dataset.uploaded_at.isoformat(),
+            "summary": dataset.summary,
+            "type_statistics": dataset.type_statistics,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def report_cache_key(dataset_id, fingerprint):
+    return f"report-pdf:{dataset_id}:{fingerprint}"
+
+
+def get_cached_report_pdf(dataset_id, fingerprint):
+    return cache.get(report_cache_key(dataset_id, fingerprint))
+
+
+def get_report_pdf(dataset, fingerprint=None):
+    """Return the PDF bytes for ``dataset``, rendering them on a cache miss."""
+    key = report_cache_key(dataset.id, fingerprint or report_fingerprint(dataset))
+    pdf_bytes = cache.get(key)
+
+    if pdf_bytes is None:
+        with timed("pdf"):
+            pdf_bytes = render_report(dataset)
+        cache.set(key, pdf_bytes, settings.PDF_CACHE_TIMEOUT)
+
+    return pdf_bytes
+
+
+def prerender_report(dataset):
+    """
+    Render and cache the report for ``dataset`` in the background.
+
+    Renders run one at a time on a dedicated executor, so a burst of uploads
+    cannot pile up rendering threads, and pending renders are finished
+    rather than killed mid-draw when the process exits.
+    """
+    global _prerender_executor
+    with _prerender_lock:
+        if _prerender_executor is None:
+            _prerender_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="prerender-report"
+            )
+    return _prerender_executor.submit(get_report_pdf, dataset)
@@ -0,0 +1,85 @@
+"""
+Column layout, value ranges and errors of equipment CSV uploads.
+
+Kept free of pandas and numpy so views, URL configuration and management
+commands can use these names without loading the analytics stack.
+"""
+
+import math
+
+
+# =========================
+# Columns
+# =========================
+
+REQUIRED_COLUMNS = [
+    "Equipment Name",
+    "Type",
+    "Flowrate",
+    "Pressure",
+    "Temperature",
+]
+
+NUMERIC_COLUMNS = ["Flowrate", "Pressure", "Temperature"]
+
+TEXT_COLUMNS = ["Equipment Name", "Type"]
+
+# Parse-time dtypes. Type repeats a handful of values, so it is stored as
+# codes into a small category table. Numeric columns are left to inference:
+# a dirty cell must reach validation as text to be reported, and summaries
+# are computed in float64 so stored averages keep their decimal values.
+CSV_DTYPES = {
+    "Equipment Name": "str",
+    "Type": "category",
+}
+
+# Physically plausible (min, max) for each numeric column, inclusive.
+VALUE_RANGES = {
+    "Flowrate": (0.0, math.inf),
+    "Pressure": (0.0, math.inf),
+    "Temperature": (-273.15, math.inf),
+}
+
+# Individual cell errors listed in a validation report; counts are exact.
+MAX_REPORTED_ERRORS = 100
+
+
+# =========================
+# Errors
+# =========================
+
+class InvalidCSVError(ValueError):
+    """Raised when an upload cannot be parsed as an equipment CSV."""
+
+
+class MissingColumnsError(InvalidCSVError):
+    """Raised when the CSV header lacks one or more required columns."""
+
+    def __init__(self, missing_columns):
+        super().__init__("Missing required columns.")
+        self.missing_columns = missing_columns
+
+    def __reduce__(self):
+        # Rebuilt from the column list when raised in a pool worker.
+        return type(self), (self.missing_columns,)
+
+
+class EmptyCSVError(InvalidCSVError):
+    """Raised when the CSV has a header but no data rows."""
+
+    def __init__(self):
+        super().__init__("CSV contains no data rows.")
+
+    def __reduce__(self):
+        return type(self), ()
+
+
+class InvalidRowsError(InvalidCSVError):
+    """Raised when rows fail validation and were not asked to be dropped."""
+
+    def __init__(self, report):
+        super().__init__("CSV contains invalid rows.")
+        self.report = report
+
+    def __reduce__(self):
+        return type(self), (self.report,)
@@ -1,9 +1,42 @@
 from rest_framework import serializers
-from .models import Dataset
+from .models import Dataset, UploadJob
 
 class CSVUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
+
+
+class BatchUploadSerializer(serializers.Serializer):
+    files = serializers.ListField(child=serializers.FileField(), allow_empty=False)
+
+
 class DatasetHistorySerializer(serializers.ModelSerializer):
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Optional subset of Meta.fields to return.
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = Dataset
-        fields = ["id", "filename", "uploaded_at", "summary"]
\ No newline at end of file
+        fields = ["id", "filename", "uploaded_at", "summary", "type_statistics"]
+
+
+class UploadJobSerializer(serializers.ModelSerializer):
+    type_statistics = serializers.JSONField(
+        source="dataset.type_statistics", read_only=True, default=None
+    )
+
+    class Meta:
+        model = UploadJob
+        fields = [
+            "id",
+            "filename",
+            "status",
+            "progress",
+            "summary",
+            "type_statistics",
+            "error",
+            "created_at",
+            "updated_at",
+        ]
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_dataset_caches
+from .models import Dataset
+
+
+@receiver(post_delete, sender=Dataset)
+def remove_dataset_archive(sender, instance, **kwargs):
+    from .archive import delete_archive
+
+    delete_archive(instance.archive_path)
+
+
+@receiver(post_save, sender=Dataset)
+@receiver(post_delete, sender=Dataset)
+def invalidate_dataset_responses(sender, instance, **kwargs):
+    invalidate_dataset_caches()
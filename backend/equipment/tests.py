@@ -1,3 +1,1175 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import (
+    AsyncRequestFactory,
+    LiveServerTestCase,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.utils import timezone
+
+from . import async_views
+from .analytics import ValidationReport, accumulate_csv
+from .metrics import timed
+from .models import Dataset
+from .reports import render_report
+from .schema import InvalidCSVError, InvalidRowsError, MissingColumnsError
+
+
+def equipment_csv(rows, seed=0):
+    """A valid equipment CSV of ``rows`` rows with varied, reproducible values."""
+    lines = ["Equipment Name,Type,Flowrate,Pressure,Temperature"]
+    for i in range(rows):
+        n = i * 7919 + seed
+        lines.append(
+            f"E-{i},{('Pump', 'Valve', 'Mixer', 'Reactor')[n % 4]},"
+            f"{n % 97 + 0.5},{n % 13 + 1.25},{n % 71 + 60}"
+        )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def stored_files(root):
+    """Names in an archive or spool directory, which may not exist yet."""
+    return {path.name for path in root.iterdir()} if root.exists() else set()
+
+
+class ChunkedIngestionTests(SimpleTestCase):
+    def test_chunk_size_does_not_change_summary(self):
+        body = equipment_csv(100)
+        chunks = []
+        chunked = accumulate_csv(io.BytesIO(body), chunksize=7, on_chunk=chunks.append).result()
+        whole = accumulate_csv(io.BytesIO(body), chunksize=1000).result()
+
+        self.assertEqual(len(chunks), 15)
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 100)
+        self.assertEqual(chunked["total_equipment"], 100)
+        self.assertEqual(chunked["type_distribution"], whole["type_distribution"])
+
+        flowrates = [i * 7919 % 97 + 0.5 for i in range(100)]
+        for summary in (chunked, whole):
+            self.assertAlmostEqual(summary["average_flowrate"], statistics.mean(flowrates))
+            self.assertEqual(summary["statistics"]["Flowrate"]["min"], min(flowrates))
+            self.assertEqual(summary["statistics"]["Flowrate"]["max"], max(flowrates))
+
+    def test_missing_columns_are_listed(self):
+        csv_file = io.BytesIO(b"Equipment Name,Type,Flowrate\nP-1,Pump,1\n")
+
+        with self.assertRaises(MissingColumnsError) as raised:
+            accumulate_csv(csv_file)
+        self.assertEqual(raised.exception.missing_columns, ["Pressure", "Temperature"])
+
+
+@override_settings(PDF_PRERENDER=False)
+class ArchiveCleanupTests(TestCase):
+    def setUp(self):
+        self.archives = stored_files(settings.DATASET_ARCHIVE_ROOT)
+
+    def upload(self, body):
+        csv_file = io.BytesIO(body)
+        csv_file.name = "upload.csv"
+        return self.client.post("/api/upload-csv/", {"file": csv_file})
+
+    def test_header_only_upload_is_rejected(self):
+        response = self.upload(b"Equipment Name,Type,Flowrate,Pressure,Temperature\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "CSV contains no data rows."})
+        self.assertFalse(Dataset.objects.exists())
+        self.assertEqual(stored_files(settings.DATASET_ARCHIVE_ROOT), self.archives)
+
+    def test_failed_insert_removes_archive(self):
+        with mock.patch.object(Dataset.objects, "create", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.upload(
+                    b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+                    b"P-1,Pump,120,5,110\n"
+                )
+
+        self.assertEqual(stored_files(settings.DATASET_ARCHIVE_ROOT), self.archives)
+
+
+@override_settings(PDF_RENDER_WORKERS=0)
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_report_is_rendered_once(self):
+        from . import reports
+
+        dataset = Dataset.objects.create(
+            filename="pumps.csv",
+            summary={
+                "total_equipment": 1,
+                "average_flowrate": 120.5,
+                "average_pressure": 5.2,
+                "average_temperature": 110.0,
+                "type_distribution": {"Pump": 1},
+            },
+        )
+
+        with mock.patch.object(reports, "render_report", wraps=reports.render_report) as render:
+            first = self.client.get("/api/pdf/")
+            second = self.client.get("/api/pdf/")
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first["ETag"], f'"{reports.report_fingerprint(dataset)}"')
+        self.assertEqual(b"".join(second.streaming_content), b"".join(first.streaming_content))
+
+    @override_settings(PDF_PRERENDER=True)
+    def test_upload_prerenders_report(self):
+        from . import reports
+        from .reports import get_cached_report_pdf, report_fingerprint
+
+        csv_file = io.BytesIO(equipment_csv(20))
+        csv_file.name = "pumps.csv"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/upload-csv/", {"file": csv_file})
+        # Renders run one at a time, so this waits for the upload's.
+        reports._prerender_executor.submit(lambda: None).result()
+
+        dataset = Dataset.objects.get()
+        pdf_bytes = get_cached_report_pdf(dataset.id, report_fingerprint(dataset))
+        self.assertTrue(pdf_bytes.startswith(b"%PDF"))
+
+
+@override_settings(PDF_PRERENDER=False)
+class DeduplicationTests(TestCase):
+    def upload(self, body, name):
+        csv_file = io.BytesIO(body)
+        csv_file.name = name
+        return self.client.post("/api/upload-csv/", {"file": csv_file})
+
+    def test_duplicate_upload_returns_existing_dataset(self):
+        body = equipment_csv(30)
+        first = self.upload(body, "monday.csv").json()
+        second = self.upload(body, "copy-of-monday.csv").json()
+
+        self.assertTrue(second["duplicate"])
+        self.assertEqual(second["summary"], first["summary"])
+        dataset = Dataset.objects.get()
+        self.assertEqual(dataset.filename, "monday.csv")
+
+        content_hash = hashlib.sha256(body).hexdigest()
+        self.assertEqual(dataset.content_hash, content_hash)
+        response = self.client.get(f"/api/datasets/by-hash/{content_hash.upper()}/")
+        self.assertEqual(response.json()["id"], dataset.id)
+
+        self.upload(equipment_csv(30, seed=1), "tuesday.csv")
+        self.assertEqual(Dataset.objects.count(), 2)
+        response = self.client.get(f"/api/datasets/by-hash/{'0' * 64}/")
+        self.assertEqual(response.status_code, 404)
+
+
+class MergeableStatisticsTests(SimpleTestCase):
+    def test_digest_quantiles_are_accurate(self):
+        import numpy as np
+
+        from .analytics import TDigest
+
+        values = np.random.default_rng(5).lognormal(3, 1, 100_000)
+        digest = TDigest()
+        for part in np.array_split(values, 40):
+            digest.merge(TDigest().add_values(part))
+
+        self.assertLess(digest.means.size, digest.compression)
+        ordered = np.sort(values)
+        for q in (0.01, 0.25, 0.5, 0.9, 0.99, 0.999):
+            estimate = digest.quantile(q, ordered[0], ordered[-1])
+            rank = np.searchsorted(ordered, estimate) / ordered.size
+            self.assertAlmostEqual(rank, q, delta=0.005 if q < 0.99 else 0.001)
+
+    def test_merged_accumulators_match_single_pass(self):
+        import pandas as pd
+
+        from .analytics import SummaryAccumulator, compute_summary
+
+        df = pd.read_csv(io.BytesIO(equipment_csv(3000)))
+        expected = compute_summary(df)
+
+        merged = SummaryAccumulator()
+        for start in range(0, 3000, 700):
+            part = SummaryAccumulator().update(df.iloc[start:start + 700])
+            # Through JSON, as the state is stored next to a dataset.
+            merged.merge(SummaryAccumulator.from_state(json.loads(json.dumps(part.to_state()))))
+        summary = merged.result()
+
+        self.assertEqual(summary["total_equipment"], expected["total_equipment"])
+        self.assertEqual(summary["type_distribution"], expected["type_distribution"])
+        for eq_type, group in df.groupby("Type"):
+            stats = merged.type_statistics()[eq_type]
+            self.assertEqual(stats["count"], len(group))
+            self.assertAlmostEqual(stats["Pressure"]["mean"], group["Pressure"].mean(), places=9)
+            self.assertEqual(stats["Pressure"]["max"], group["Pressure"].max())
+        for col, stats in expected["statistics"].items():
+            for key in ("count", "min", "max"):
+                self.assertEqual(summary["statistics"][col][key], stats[key])
+            for key in ("mean", "std"):
+                self.assertAlmostEqual(summary["statistics"][col][key], stats[key], places=9)
+            self.assertAlmostEqual(summary["statistics"][col]["mean"], df[col].mean(), places=9)
+            self.assertAlmostEqual(summary["statistics"][col]["std"], df[col].std(), places=9)
+            for key in ("p50", "p95", "p99"):
+                spread = stats["max"] - stats["min"]
+                self.assertAlmostEqual(
+                    summary["statistics"][col][key], stats[key], delta=spread * 0.02
+                )
+
+
+@override_settings(PDF_PRERENDER=False)
+class UploadJobTests(TestCase):
+    def test_job_lifecycle(self):
+        from .jobs import run_upload_job
+
+        csv_file = io.BytesIO(
+            b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+            b"P-1,Pump,120,5,110\n"
+        )
+        csv_file.name = "queued.csv"
+        # The job would start on the shared pool at commit; run it here instead.
+        with self.captureOnCommitCallbacks():
+            response = self.client.post("/api/upload-csv/?async=1", {"file": csv_file})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+        status_url = response.json()["status_url"]
+        self.assertEqual(status_url, f"/api/jobs/{job_id}/")
+        self.assertEqual(response["Location"], status_url)
+        self.assertEqual(self.client.get(status_url).json()["status"], "pending")
+
+        run_upload_job(job_id)
+
+        job = self.client.get(status_url).json()
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["progress"], 1.0)
+        self.assertEqual(job["summary"]["total_equipment"], 1)
+        self.assertEqual(stored_files(settings.UPLOAD_SPOOL_ROOT), set())
+
+    def test_stale_running_job_is_failed(self):
+        from .jobs import spool_blocks
+        from .models import UploadJob
+
+        spool_path, _ = spool_blocks([b"Equipment Name\n"])
+        job = UploadJob.objects.create(
+            filename="crashed.csv", spool_path=spool_path, status=UploadJob.Status.RUNNING
+        )
+        timeout = timedelta(seconds=settings.UPLOAD_JOB_TIMEOUT)
+        UploadJob.objects.filter(id=job.id).update(
+            updated_at=timezone.now() - timeout / 2
+        )
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}/").json()["status"], "running")
+
+        UploadJob.objects.filter(id=job.id).update(
+            updated_at=timezone.now() - timeout * 2
+        )
+        response = self.client.get(f"/api/jobs/{job.id}/").json()
+        self.assertEqual(response["status"], "failed")
+        self.assertIn("interrupted", response["error"]["error"])
+        self.assertEqual(stored_files(settings.UPLOAD_SPOOL_ROOT), set())
+
+    def test_reclaimed_job_stays_failed(self):
+        from . import jobs
+        from .models import UploadJob
+
+        spool_path, _ = jobs.spool_blocks([b"Equipment Name\n"])
+        job = UploadJob.objects.create(filename="slow.csv", spool_path=spool_path)
+
+        def reclaimed_meanwhile(*args, **kwargs):
+            UploadJob.objects.filter(id=job.id).update(
+                status=UploadJob.Status.FAILED, error={"error": "interrupted"}
+            )
+            raise InvalidCSVError("Invalid CSV file.")
+
+        with mock.patch.object(jobs, "ingest_csv", side_effect=reclaimed_meanwhile):
+            with self.assertLogs("equipment.jobs", "WARNING"):
+                jobs.run_upload_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.error, {"error": "interrupted"})
+        self.assertEqual(stored_files(settings.UPLOAD_SPOOL_ROOT), set())
+
+    def test_drain_leaves_fresh_jobs_to_their_process(self):
+        from .jobs import run_pending_jobs, spool_blocks
+        from .models import UploadJob
+
+        spool_path, content_hash = spool_blocks(
+            [b"Equipment Name,Type,Flowrate,Pressure,Temperature\nP-1,Pump,120,5,110\n"]
+        )
+        job = UploadJob.objects.create(
+            filename="lost.csv", spool_path=spool_path, content_hash=content_hash
+        )
+
+        run_pending_jobs(min_age=60)
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadJob.Status.PENDING)
+
+        UploadJob.objects.filter(id=job.id).update(
+            created_at=timezone.now() - timedelta(minutes=2)
+        )
+        run_pending_jobs(min_age=60)
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadJob.Status.SUCCEEDED)
+
+
+@override_settings(PDF_PRERENDER=False)
+class RetentionTests(TestCase):
+    def test_prune_keeps_newest_datasets(self):
+        from .ingest import prune_datasets
+
+        root = settings.DATASET_ARCHIVE_ROOT
+        start = timezone.now()
+        for i in range(12):
+            (root / f"archive-{i}").mkdir(parents=True)
+            dataset = Dataset.objects.create(
+                filename=f"{i}.csv", summary={}, archive_path=f"archive-{i}"
+            )
+            # Pairs share an upload time; ties are ordered by id.
+            Dataset.objects.filter(id=dataset.id).update(
+                uploaded_at=start + timedelta(seconds=i // 2)
+            )
+        newest = list(
+            Dataset.objects.order_by("-uploaded_at", "-id").values_list("id", flat=True)[:5]
+        )
+
+        self.assertEqual(prune_datasets(keep=5, batch_size=2), 7)
+        self.assertEqual(sorted(Dataset.objects.values_list("id", flat=True)), sorted(newest))
+        self.assertEqual(
+            sorted(name for name in stored_files(root) if name.startswith("archive-")),
+            sorted(Dataset.objects.values_list("archive_path", flat=True)),
+        )
+        self.assertEqual(prune_datasets(keep=5), 0)
+
+    @override_settings(DATASET_PRUNE_EVERY=1, DATASET_RETENTION_KEEP=2)
+    def test_uploads_run_the_sweep(self):
+        for seed in range(3):
+            csv_file = io.BytesIO(equipment_csv(5, seed=seed))
+            csv_file.name = f"{seed}.csv"
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post("/api/upload-csv/", {"file": csv_file})
+
+        self.assertEqual(
+            sorted(Dataset.objects.values_list("filename", flat=True)), ["1.csv", "2.csv"]
+        )
+
+    def test_finished_jobs_expire(self):
+        from .ingest import prune_upload_jobs
+        from .models import UploadJob
+
+        statuses = [UploadJob.Status.PENDING, UploadJob.Status.SUCCEEDED, UploadJob.Status.FAILED]
+        for status in statuses:
+            UploadJob.objects.create(filename=f"old-{status}.csv", status=status)
+        expired = timezone.now() - timedelta(seconds=settings.UPLOAD_JOB_RETENTION + 1)
+        UploadJob.objects.update(updated_at=expired)
+        UploadJob.objects.create(filename="recent.csv", status=UploadJob.Status.SUCCEEDED)
+
+        prune_upload_jobs()
+
+        self.assertEqual(
+            sorted(UploadJob.objects.values_list("filename", flat=True)),
+            ["old-pending.csv", "recent.csv"],
+        )
+
+
+@override_settings(PDF_PRERENDER=False, PDF_RENDER_WORKERS=0)
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def upload(self, seed):
+        csv_file = io.BytesIO(equipment_csv(10, seed=seed))
+        csv_file.name = f"{seed}.csv"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/upload-csv/", {"file": csv_file})
+
+    def test_history_revalidates_until_an_upload(self):
+        self.upload(0)
+        response = self.client.get("/api/history/")
+        etag = response["ETag"]
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+        response = self.client.get("/api/history/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        self.upload(1)
+        response = self.client.get("/api/history/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_version_filled_before_an_upload_commits_is_replaced(self):
+        from . import caching
+
+        self.upload(0)
+        cache.delete(caching.VERSION_KEY)
+        # A request that missed the version read the rows before the upload...
+        stale = caching._new_version(caching._latest_change().first())
+        self.upload(1)
+        # ...and only stores its token after the upload committed.
+        cache.add(caching.VERSION_KEY, stale, 60)
+
+        self.assertNotEqual(caching.datasets_version()["token"], stale["token"])
+
+    def test_pdf_validators(self):
+        self.upload(0)
+        response = self.client.get("/api/pdf/")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            self.client.get("/api/pdf/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304
+        )
+        self.assertEqual(
+            self.client.get(
+                "/api/pdf/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            ).status_code,
+            304,
+        )
+        self.assertEqual(
+            self.client.get("/api/pdf/", HTTP_IF_NONE_MATCH='"other"').status_code, 200
+        )
+
+
+@override_settings(PDF_PRERENDER=False)
+class CompressedUploadTests(TestCase):
+    def post_raw(self, body, encoding):
+        return self.client.post(
+            "/api/upload-csv/",
+            data=body,
+            content_type="text/csv",
+            HTTP_CONTENT_ENCODING=encoding,
+            HTTP_CONTENT_DISPOSITION='attachment; filename="plant.csv"',
+        )
+
+    def test_gzip_body_is_decompressed_while_spooling(self):
+        body = equipment_csv(500)
+        response = self.post_raw(gzip.compress(body), "gzip")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["summary"]["total_equipment"], 500)
+        dataset = Dataset.objects.get()
+        self.assertEqual(dataset.filename, "plant.csv")
+        # Hashed after decompression, so the plain file is a duplicate.
+        self.assertEqual(dataset.content_hash, hashlib.sha256(body).hexdigest())
+        csv_file = io.BytesIO(body)
+        csv_file.name = "plant.csv"
+        self.assertTrue(self.client.post("/api/upload-csv/", {"file": csv_file}).json()["duplicate"])
+        self.assertEqual(stored_files(settings.UPLOAD_SPOOL_ROOT), set())
+
+    def test_bad_encodings_are_rejected(self):
+        response = self.post_raw(b"\x1f\x8b\x08\x00not gzip at all", "gzip")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Could not decompress the uploaded file.")
+
+        self.assertEqual(self.post_raw(equipment_csv(1), "br").status_code, 415)
+        self.assertFalse(Dataset.objects.exists())
+        self.assertEqual(stored_files(settings.UPLOAD_SPOOL_ROOT), set())
+
+
+class BatchUploadTests(TestCase):
+    HEADER = b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+    ROWS = b"P-1,Pump,120,5,110\nV-1,Valve,60,4,105\n"
+
+    def setUp(self):
+        override = override_settings(PDF_PRERENDER=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def archives(self):
+        return stored_files(settings.DATASET_ARCHIVE_ROOT)
+
+    def zip_file(self, members, compression=zipfile.ZIP_STORED):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression) as archive:
+            for name, body in members.items():
+                archive.writestr(name, body)
+        buffer.name = "batch.zip"
+        buffer.seek(0)
+        return buffer
+
+    def upload(self, *files, query=""):
+        return self.client.post(f"/api/upload-batch/{query}", {"files": list(files)})
+
+    def test_bad_members_are_rejected_per_file(self):
+        plain = io.BytesIO(self.HEADER + b"M-1,Mixer,30,2,90\n")
+        plain.name = "plain.csv"
+        batch = self.zip_file({
+            "good.csv": self.HEADER + self.ROWS,
+            "copy.csv": self.HEADER + self.ROWS,
+            "empty.csv": self.HEADER,
+            "invalid.csv": self.HEADER + b"X-1,Pump,,1,1\n",
+            "notes.txt": b"ignored",
+        })
+
+        before = self.archives()
+        response = self.upload(batch, plain, query="?drop_invalid=1")
+
+        self.assertEqual(response.status_code, 200)
+        results = {result["filename"]: result for result in response.json()["results"]}
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(results["good.csv"]["summary"]["total_equipment"], 2)
+        self.assertTrue(results["copy.csv"]["duplicate"])
+        self.assertEqual(results["empty.csv"]["error"], "CSV contains no data rows.")
+        self.assertEqual(results["invalid.csv"]["error"], "CSV contains no valid rows.")
+        self.assertNotIn("notes.txt", results)
+        self.assertEqual(
+            sorted(Dataset.objects.values_list("filename", flat=True)),
+            ["good.csv", "plain.csv"],
+        )
+        self.assertEqual(
+            self.archives() - before,
+            set(Dataset.objects.values_list("archive_path", flat=True)),
+        )
+
+    def test_zip_limits_and_unreadable_members(self):
+        body = self.HEADER + self.ROWS * 50
+        batch = self.zip_file({"big.csv": body, "small.csv": self.HEADER + self.ROWS})
+        with override_settings(BATCH_MAX_MEMBER_BYTES=len(body) - 1):
+            results = self.upload(batch).json()["results"]
+        self.assertIn("larger than", results[0]["error"])
+        self.assertIn("summary", results[1])
+
+        batch.seek(0)
+        with override_settings(BATCH_MAX_EXTRACTED_BYTES=len(body)):
+            response = self.upload(batch)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("expands to more than", response.json()["error"])
+
+        # Corrupt the compressed data of the only member.
+        data = bytearray(self.zip_file({"bad.csv": body}, zipfile.ZIP_DEFLATED).getvalue())
+        start = 30 + len("bad.csv")
+        data[start:start + 8] = b"\xff" * 8
+        corrupt = io.BytesIO(bytes(data))
+        corrupt.name = "corrupt.zip"
+        response = self.upload(corrupt)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"],
+            [{"filename": "bad.csv", "error": "Could not read file from the archive."}],
+        )
+
+    def test_batch_uses_amortized_retention(self):
+        def batch(first):
+            files = []
+            for i in range(first, first + 3):
+                csv_file = io.BytesIO(self.HEADER + f"P-{i},Pump,{i},5,110\n".encode())
+                csv_file.name = f"{i}.csv"
+                files.append(csv_file)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.upload(*files)
+
+        with mock.patch("equipment.ingest.prune_datasets") as prune:
+            with override_settings(DATASET_PRUNE_EVERY=10**9):
+                batch(0)
+            prune.assert_not_called()
+
+            with override_settings(DATASET_PRUNE_EVERY=1):
+                batch(3)
+            prune.assert_called_once_with()
+
+
+class RowValidationTests(TestCase):
+    HEADER = b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+
+    def setUp(self):
+        self.archives = stored_files(settings.DATASET_ARCHIVE_ROOT)
+        override = override_settings(PDF_PRERENDER=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, rows, query=""):
+        csv_file = io.BytesIO(self.HEADER + rows)
+        csv_file.name = "upload.csv"
+        return self.client.post(f"/api/upload-csv/{query}", {"file": csv_file})
+
+    def test_invalid_rows_are_reported(self):
+        response = self.upload(b"P-1,Pump,120,5,110\nV-1,Valve,,4,105\nM-1,Mixer,30,x,90\n")
+
+        self.assertEqual(response.status_code, 400)
+        validation = response.json()["validation"]
+        self.assertEqual(validation["invalid_rows"], 2)
+        self.assertEqual([error["row"] for error in validation["errors"]], [2, 3])
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_drop_invalid_keeps_valid_rows(self):
+        response = self.upload(
+            b"P-1,Pump,120,5,110\nV-1,Valve,,4,105\nP-2,Pump,100,7,100\n",
+            "?drop_invalid=1",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        summary = Dataset.objects.get().summary
+        self.assertEqual(summary["total_equipment"], 2)
+        self.assertEqual(summary["average_flowrate"], 110.0)
+        self.assertEqual(summary["validation"]["dropped_rows"], 1)
+
+    def test_no_valid_rows_is_rejected(self):
+        response = self.upload(b"V-1,Valve,,4,105\nM-1,Mixer,30,,90\n", "?drop_invalid=1")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "CSV contains no valid rows.")
+        self.assertFalse(Dataset.objects.exists())
+        self.assertEqual(stored_files(settings.DATASET_ARCHIVE_ROOT), self.archives)
+
+
+@override_settings(PDF_PRERENDER=False)
+class TypeStatisticsTests(TestCase):
+    def test_upload_reports_statistics_per_type(self):
+        csv_file = io.BytesIO(
+            b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+            b"P-1,Pump,100,5,110\nP-2,Pump,140,7,90\nV-1,Valve,60,4,105\n"
+            b"P-3,Pump,120,6,100\nM-1,Mixer,30,2,80\nV-2,Valve,40,3,95\n"
+        )
+        csv_file.name = "plant.csv"
+
+        response = self.client.post("/api/upload-csv/", {"file": csv_file})
+
+        type_statistics = response.json()["type_statistics"]
+        self.assertEqual(list(type_statistics), ["Pump", "Valve", "Mixer"])
+        self.assertEqual(type_statistics["Pump"]["count"], 3)
+        self.assertEqual(
+            type_statistics["Pump"]["Flowrate"], {"mean": 120.0, "min": 100.0, "max": 140.0}
+        )
+        self.assertEqual(type_statistics["Valve"]["Temperature"]["mean"], 100.0)
+        self.assertEqual(type_statistics["Mixer"]["Pressure"], {"mean": 2.0, "min": 2.0, "max": 2.0})
+
+        history = self.client.get("/api/history/?fields=id,type_statistics").json()
+        self.assertEqual(history["results"][0]["type_statistics"], type_statistics)
+
+    def test_resummarize_backfills_from_the_archive(self):
+        from django.core.management import call_command
+
+        csv_file = io.BytesIO(equipment_csv(40))
+        csv_file.name = "old.csv"
+        expected = self.client.post("/api/upload-csv/", {"file": csv_file}).json()
+        # As stored before per-Type statistics existed.
+        Dataset.objects.update(type_statistics={}, aggregates={})
+
+        call_command("resummarize_datasets", stdout=io.StringIO())
+
+        dataset = Dataset.objects.get()
+        self.assertEqual(dataset.type_statistics, expected["type_statistics"])
+        self.assertEqual(dataset.aggregates["total"], 40)
+
+
+class TrendsAndCompareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        start = timezone.now() - timedelta(days=3)
+        self.datasets = []
+        days = [(100.0, 3, 1), (120.0, 2, 2), (90.0, 4, 0)]
+        for day, (flowrate, pumps, valves) in enumerate(days):
+            dataset = Dataset.objects.create(
+                filename=f"day-{day}.csv",
+                summary={
+                    "total_equipment": pumps + valves,
+                    "average_flowrate": flowrate,
+                    "average_pressure": 5.0,
+                    "average_temperature": 100.0,
+                    "type_distribution": {"Pump": pumps, "Valve": valves},
+                    "statistics": {"Flowrate": {"p95": flowrate * 1.5}},
+                },
+                type_statistics={"Pump": {"count": pumps, "Flowrate": {"mean": flowrate + 10}}},
+            )
+            Dataset.objects.filter(id=dataset.id).update(uploaded_at=start + timedelta(days=day))
+            self.datasets.append(dataset)
+
+    def test_trend_series_oldest_first(self):
+        data = self.client.get("/api/trends/?metrics=average_flowrate,flowrate_p95").json()
+
+        self.assertEqual(data["metrics"], ["average_flowrate", "flowrate_p95"])
+        points = data["points"]
+        self.assertEqual(
+            [point["filename"] for point in points], ["day-0.csv", "day-1.csv", "day-2.csv"]
+        )
+        self.assertEqual([point["average_flowrate"] for point in points], [100.0, 120.0, 90.0])
+        self.assertEqual(points[1]["flowrate_p95"], 180.0)
+
+        latest = self.client.get("/api/trends/?limit=2&metrics=total_equipment").json()
+        self.assertEqual([point["total_equipment"] for point in latest["points"]], [4, 4])
+
+        since = (timezone.now() - timedelta(days=2, hours=12)).isoformat()
+        ranged = self.client.get("/api/trends/", {"since": since}).json()
+        self.assertEqual(
+            [point["filename"] for point in ranged["points"]], ["day-1.csv", "day-2.csv"]
+        )
+
+    def test_trend_parameters_are_checked(self):
+        response = self.client.get("/api/trends/?metrics=average_flowrate,volume")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("average_flowrate", response.json()["available_metrics"])
+        self.assertEqual(self.client.get("/api/trends/?since=yesterday").status_code, 400)
+        self.assertEqual(self.client.get("/api/trends/?limit=many").status_code, 400)
+
+    def test_compare_two_datasets(self):
+        a, b = self.datasets[0], self.datasets[1]
+        data = self.client.get(f"/api/compare/{a.id}/{b.id}/").json()
+
+        self.assertEqual(
+            data["metrics"]["average_flowrate"],
+            {"a": 100.0, "b": 120.0, "delta": 20.0, "percent_change": 20.0},
+        )
+        self.assertEqual(data["metrics"]["pressure_std"]["delta"], None)
+        self.assertEqual(data["type_distribution"]["Valve"]["delta"], 1)
+        self.assertEqual(data["type_means"]["Pump"]["Flowrate"]["delta"], 20.0)
+
+        missing = max(dataset.id for dataset in self.datasets) + 1
+        self.assertEqual(self.client.get(f"/api/compare/{a.id}/{missing}/").status_code, 404)
+
+
+class VectorChartTests(SimpleTestCase):
+    SUMMARY = {
+        "total_equipment": 3,
+        "average_flowrate": 120.5,
+        "average_pressure": 5.25,
+        "average_temperature": 110.0,
+        "type_distribution": {"Pump": 2, "Valve": 1},
+    }
+
+    def render(self, chart_renderer):
+        from types import SimpleNamespace
+
+        from .reports import generate_pdf
+
+        dataset = SimpleNamespace(
+            filename="pumps.csv",
+            uploaded_at=timezone.now(),
+            summary=self.SUMMARY,
+            type_statistics={},
+        )
+        return generate_pdf(dataset, chart_renderer).getvalue()
+
+    def test_vector_report_embeds_no_images(self):
+        vector = self.render("vector")
+        raster = self.render("matplotlib")
+
+        self.assertNotIn(b"/Subtype /Image", vector)
+        self.assertIn(b"/Subtype /Image", raster)
+        self.assertLess(len(vector), len(raster))
+
+    def test_many_types_are_folded_into_other(self):
+        from reportlab.graphics.charts.barcharts import VerticalBarChart
+
+        from .charts import MAX_CHART_TYPES, type_distribution_chart
+
+        types = {f"Heat exchanger {i:02d}": 30 - i for i in range(20)}
+        drawing = type_distribution_chart(types, 250, 180)
+        (chart,) = [item for item in drawing.contents if isinstance(item, VerticalBarChart)]
+
+        labels = chart.categoryAxis.categoryNames
+        self.assertEqual(len(labels), MAX_CHART_TYPES)
+        self.assertEqual(labels[0], "Heat exchan...")
+        self.assertEqual(labels[-1], "Other")
+        self.assertEqual(sum(chart.data[0]), sum(types.values()))
+
+
+BACKEND_DIR = Path(settings.BASE_DIR)
+
+# Libraries that only specific code paths need; loading the app must not
+# import them.
+HEAVY_MODULES = ["matplotlib", "numpy", "pandas", "pyarrow", "reportlab"]
+
+# Generous wall-clock ceiling for interpreter start + django.setup() + URL
+# resolution; the module check above is what catches regressions precisely.
+STARTUP_BUDGET_SECONDS = 5.0
+
+STARTUP_SCRIPT = """
+import os, sys
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(",".join(sorted(name for name in sys.modules if "." not in name)))
+"""
+
+
+class StartupTests(SimpleTestCase):
+    def measure_startup(self):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        wall_time = time.perf_counter() - started
+        return wall_time, set(result.stdout.strip().split(","))
+
+    def test_app_loads_without_heavy_libraries(self):
+        wall_time, modules = self.measure_startup()
+
+        self.assertEqual(sorted(modules.intersection(HEAVY_MODULES)), [])
+        self.assertLess(wall_time, STARTUP_BUDGET_SECONDS)
+
+
+class RenderPoolTests(TestCase):
+    def make_dataset(self):
+        return Dataset.objects.create(
+            filename="pumps.csv",
+            summary={
+                "total_equipment": 3,
+                "average_flowrate": 120.5,
+                "average_pressure": 5.25,
+                "average_temperature": 110.0,
+                "type_distribution": {"Pump": 2, "Valve": 1},
+            },
+            type_statistics={
+                "Pump": {"count": 2, "Flowrate": {"mean": 150.0, "min": 140.0, "max": 160.0}},
+            },
+        )
+
+    @override_settings(PDF_RENDER_WORKERS=1)
+    def test_render_on_worker_pool(self):
+        pdf_bytes = render_report(self.make_dataset())
+
+        self.assertTrue(pdf_bytes.startswith(b"%PDF"))
+        # Summary page plus the per-Type statistics page.
+        self.assertIn(b"/Count 2 ", pdf_bytes)
+
+    @override_settings(PDF_RENDER_WORKERS=0)
+    def test_render_in_process_when_disabled(self):
+        pdf_bytes = render_report(self.make_dataset())
+
+        self.assertTrue(pdf_bytes.startswith(b"%PDF"))
+
+
+class HistoryPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        same_time = timezone.now()
+        for i in range(7):
+            dataset = Dataset.objects.create(filename=f"{i}.csv", summary={"total_equipment": i})
+            # Ties on uploaded_at must be broken by id, not skipped.
+            Dataset.objects.filter(id=dataset.id).update(uploaded_at=same_time)
+
+    def test_pages_cover_every_dataset_once(self):
+        ids = []
+        url = "/api/history/?page_size=3&fields=id,filename"
+        while url:
+            data = self.client.get(url).json()
+            self.assertTrue(all(set(row) == {"id", "filename"} for row in data["results"]))
+            ids += [row["id"] for row in data["results"]]
+            url = data["next"]
+
+        self.assertEqual(ids, sorted(Dataset.objects.values_list("id", flat=True), reverse=True))
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.client.get("/api/history/?cursor=nope").status_code, 400)
+        self.assertEqual(self.client.get("/api/history/?fields=secret").status_code, 400)
+
+
+class MetricsTests(TestCase):
+    def upload(self):
+        csv_file = io.BytesIO(
+            b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+            b"P-1,Pump,120.5,5.2,110.0\n"
+        )
+        csv_file.name = "pumps.csv"
+        return self.client.post("/api/upload-csv/", {"file": csv_file})
+
+    def test_upload_reports_stage_timings(self):
+        response = self.upload()
+
+        stages = [entry.split(";")[0] for entry in response["Server-Timing"].split(", ")]
+        self.assertEqual(stages[:2], ["hash", "parse"])
+        self.assertIn("insert", stages)
+        self.assertEqual(stages[-1], "total")
+
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        self.upload()
+        text = self.client.get("/api/metrics/").content.decode()
+
+        self.assertIn(
+            'equipment_http_requests_total{method="POST",route="api/upload-csv/",status="200"}',
+            text,
+        )
+        self.assertIn("# TYPE equipment_stage_duration_seconds histogram", text)
+        self.assertIn("equipment_csv_rows_parsed_total", text)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_metrics_record_nothing(self):
+        self.assertNotIn("Server-Timing", self.upload())
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 404)
+
+        with timed("parse"):
+            pass  # no request context: a no-op
+
+
+@override_settings(PDF_PRERENDER=False)
+class ConcurrencyTests(LiveServerTestCase):
+    UPLOADS = 40
+    HISTORY_READS = 80
+    CLIENTS = 16
+    # Generous ceiling; the point is that waits stay bounded by the busy
+    # timeout rather than erroring out.
+    P99_BUDGET_SECONDS = 10.0
+
+    def request(self, path, body=None):
+        headers = {"Content-Type": MULTIPART_CONTENT} if body is not None else {}
+        request = urllib.request.Request(self.live_server_url + path, body, headers)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status, content = error.code, error.read()
+        return status, content, time.perf_counter() - start
+
+    def upload(self, i):
+        csv_file = io.BytesIO(
+            b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+            + f"P-{i},Pump,{100 + i},5.2,110.0\n".encode()
+        )
+        csv_file.name = f"pumps-{i}.csv"
+        return self.request("/api/upload-csv/", encode_multipart(BOUNDARY, {"file": csv_file}))
+
+    def test_simultaneous_uploads_and_history_reads(self):
+        jobs = [(self.upload, i) for i in range(self.UPLOADS)]
+        jobs += [(self.request, "/api/history/")] * self.HISTORY_READS
+        # Interleave writers and readers.
+        jobs = jobs[::2] + jobs[1::2]
+
+        with ThreadPoolExecutor(self.CLIENTS) as executor:
+            results = list(executor.map(lambda job: job[0](job[1]), jobs))
+
+        failures = [(status, content[:200]) for status, content, _ in results if status != 200]
+        self.assertEqual(failures, [])
+        self.assertFalse(any(b"database is locked" in content for _, content, _ in results))
+
+        latencies = sorted(seconds for _, _, seconds in results)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.assertLess(p99, self.P99_BUDGET_SECONDS)
+
+
+@override_settings(PDF_PRERENDER=False)
+class AsyncViewTests(TransactionTestCase):
+    # Transactional: the blocking pool's threads use their own connections.
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+
+    async def test_upload_history_and_pdf(self):
+        csv_file = io.BytesIO(
+            b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+            b"P-1,Pump,120.5,5.2,110.0\n"
+        )
+        csv_file.name = "pumps.csv"
+        upload = async_views.CSVUploadView.as_view()
+        response = await upload(self.factory.post("/api/upload-csv/", {"file": csv_file}))
+        self.assertEqual(json.loads(response.content)["summary"]["total_equipment"], 1)
+
+        csv_file.seek(0)
+        response = await upload(self.factory.post("/api/upload-csv/", {"file": csv_file}))
+        self.assertTrue(json.loads(response.content)["duplicate"])
+
+        history = async_views.DatasetHistoryView.as_view()
+        response = await history(self.factory.get("/api/history/?fields=id,filename"))
+        self.assertEqual(
+            [row["filename"] for row in json.loads(response.content)["results"]],
+            ["pumps.csv"],
+        )
+
+        response = await async_views.DatasetPDFView.as_view()(self.factory.get("/api/pdf/"))
+        self.assertTrue(response.content.startswith(b"%PDF"))
+
+    async def test_middleware_runs_async(self):
+        response = await self.async_client.get("/api/history/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+
+class CSVParsingTests(SimpleTestCase):
+    CSV = (
+        b"Equipment Name,Notes,Type,Flowrate,Pressure,Temperature\n"
+        b'P-1,"pumps, spare",Pump,120.5,5.2,110.0\n'
+        b"P-2,,Pump,unknown,,-300\n"
+        b"V-1,,Valve,60,4.1,105\n"
+    )
+
+    def parse(self, engine):
+        report = ValidationReport()
+        accumulator = accumulate_csv(
+            io.BytesIO(self.CSV), drop_invalid=True, report=report, engine=engine
+        )
+        return accumulator.result(), report.to_dict()
+
+    def test_engines_agree(self):
+        summary, report = self.parse("c")
+
+        self.assertEqual(summary["total_equipment"], 2)
+        self.assertEqual(summary["type_distribution"], {"Pump": 1, "Valve": 1})
+        self.assertEqual(
+            report["error_counts"],
+            {
+                "Flowrate": {"not a number": 1},
+                "Pressure": {"blank": 1},
+                "Temperature": {"out of range": 1},
+            },
+        )
+        self.assertEqual(self.parse("pyarrow"), (summary, report))
+
+
+@override_settings(PROCESS_WORKERS=3, PARALLEL_PARSE_MIN_BYTES=0)
+class ParallelParsingTests(SimpleTestCase):
+    def write_csv(self, directory, quote=False):
+        rows = ["Equipment Name,Type,Flowrate,Pressure,Temperature"]
+        for i in range(3000):
+            flowrate = "bad" if i in (4, 1500, 2999) else str(i % 50 + 1)
+            name = f'"E-{i}"' if quote and i == 10 else f"E-{i}"
+            rows.append(f"{name},{('Pump', 'Valve', 'Mixer')[i % 3]},{flowrate},{i % 7},{i % 90}")
+        path = Path(directory) / "upload.csv"
+        path.write_text("\n".join(rows) + "\n")
+        return path
+
+    def test_ranges_match_serial_parse(self):
+        from .archive import delete_archive, read_archive
+        from .ingest import archive_csv
+        from .parallel import archive_csv_parallel, plan_ranges
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write_csv(directory)
+            with open(path, "rb") as csv_file:
+                serial, serial_archive, serial_report = archive_csv(csv_file, drop_invalid=True)
+                _, bounds = plan_ranges(csv_file)
+            self.assertEqual(len(bounds), 4)
+            self.assertTrue(all(path.read_bytes()[cut - 1] == ord("\n") for cut in bounds))
+
+            parallel, parallel_archive, parallel_report = archive_csv_parallel(
+                path, bounds, drop_invalid=True
+            )
+            try:
+                self.assertEqual(parallel_report.to_dict(), serial_report.to_dict())
+                self.assertEqual(
+                    [error["row"] for error in parallel_report.errors], [5, 1501, 3000]
+                )
+                self.assertEqual(parallel.type_statistics(), serial.type_statistics())
+                summary, expected = parallel.result(), serial.result()
+                for key in ("total_equipment", "type_distribution", "average_flowrate"):
+                    self.assertEqual(summary[key], expected[key])
+                self.assertEqual(
+                    read_archive(parallel_archive)["Equipment Name"].tolist(),
+                    read_archive(serial_archive)["Equipment Name"].tolist(),
+                )
+
+                with self.assertRaises(InvalidRowsError) as raised:
+                    archive_csv_parallel(path, bounds)
+                self.assertEqual(raised.exception.report.invalid_rows, 3)
+            finally:
+                delete_archive(serial_archive)
+                delete_archive(parallel_archive)
+
+            with open(self.write_csv(directory, quote=True), "rb") as csv_file:
+                self.assertIsNone(plan_ranges(csv_file))
+
+
+@override_settings(PDF_PRERENDER=False)
+class DatasetAppendTests(TestCase):
+    HEADER = b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+    FIRST = b"P-1,Pump,120,5,110\nV-1,Valve,60,4,105\n"
+    MORE = b"P-2,Pump,100,6,100\nM-1,Mixer,30,2,90\n"
+
+    def upload(self, url, body, name):
+        csv_file = io.BytesIO(self.HEADER + body)
+        csv_file.name = name
+        return self.client.post(url, {"file": csv_file})
+
+    def test_append_matches_single_upload(self):
+        self.upload("/api/upload-csv/", self.FIRST, "hourly.csv")
+        dataset = Dataset.objects.get()
+        before = self.client.get("/api/history/")
+        etag = before["ETag"]
+
+        # Same second as the upload otherwise, which Last-Modified can't tell apart.
+        time.sleep(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload(f"/api/datasets/{dataset.id}/append/", self.MORE, "more.csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["appended_rows"], 2)
+
+        self.upload("/api/upload-csv/", self.FIRST + self.MORE, "combined.csv")
+        appended, combined = Dataset.objects.order_by("id")
+        self.assertEqual(appended.summary, combined.summary)
+        self.assertEqual(appended.type_statistics, combined.type_statistics)
+        self.assertEqual(appended.content_hash, "")
+        self.assertGreater(appended.updated_at, appended.uploaded_at)
+        self.assertNotEqual(self.client.get("/api/history/")["ETag"], etag)
+        response = self.client.get(
+            "/api/history/", HTTP_IF_MODIFIED_SINCE=before["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 200)
+
+        from .archive import archive_parts, read_archive
+
+        self.assertEqual(len(archive_parts(appended.archive_path)), 2)
+        self.assertEqual(len(read_archive(appended.archive_path)), 4)
+
+        # Rejected rows leave the dataset and its archive as they were.
+        response = self.upload(
+            f"/api/datasets/{appended.id}/append/", b"X-1,Pump,bad,1,1\n", "bad.csv"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["validation"]["errors"][0]["row"], 1)
+        appended.refresh_from_db()
+        self.assertEqual(appended.summary["total_equipment"], 4)
+        self.assertEqual(len(archive_parts(appended.archive_path)), 2)
+
+        Dataset.objects.all().delete()
+
+    def test_parts_appear_only_when_finished(self):
+        import pandas as pd
+
+        from .archive import ArchiveWriter, archive_parts, read_archive
+
+        chunk = pd.read_csv(io.BytesIO(self.HEADER + self.FIRST))
+        first = ArchiveWriter()
+        first.write(chunk)
+        first.close()
+
+        # Two appends in flight at once each get their own part number.
+        slow, fast = ArchiveWriter.append_to(first.name), ArchiveWriter.append_to(first.name)
+        slow.write(chunk)
+        fast.write(chunk)
+        self.assertEqual(len(archive_parts(first.name)), 1)
+        fast.close()
+        slow.close()
+        self.assertEqual(fast.path.name, "part-00001.parquet")
+        self.assertEqual(slow.path.name, "part-00002.parquet")
+        self.assertEqual(len(read_archive(first.name)), 6)
+
+        aborted = ArchiveWriter.append_to(first.name)
+        aborted.write(chunk)
+        aborted.abort()
+        self.assertEqual(
+            sorted(stored_files(settings.DATASET_ARCHIVE_ROOT / first.name)),
+            ["part-00000.parquet", "part-00001.parquet", "part-00002.parquet"],
+        )
+
+    def test_unknown_or_legacy_dataset(self):
+        response = self.upload("/api/datasets/999/append/", self.MORE, "x.csv")
+        self.assertEqual(response.status_code, 404)
+
+        legacy = Dataset.objects.create(filename="old.csv", summary={"total_equipment": 0})
+        response = self.upload(f"/api/datasets/{legacy.id}/append/", self.MORE, "x.csv")
+        self.assertEqual(response.status_code, 409)
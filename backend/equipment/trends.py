@@ -0,0 +1,131 @@
+"""
+Cross-dataset trends and comparisons from stored summaries.
+
+Metrics are read straight out of ``Dataset.summary`` with JSON key
+lookups, so a trend over thousands of uploads is a single query on the
+``(uploaded_at, id)`` index that selects a few scalars per row. No archive
+or CSV is ever re-read.
+"""
+
+from .schema import NUMERIC_COLUMNS
+from .models import Dataset
+
+
+# Public metric name -> path inside Dataset.summary
+TREND_METRICS = {
+    "total_equipment": ("total_equipment",),
+    "average_flowrate": ("average_flowrate",),
+    "average_pressure": ("average_pressure",),
+    "average_temperature": ("average_temperature",),
+    **{
+        f"{col.lower()}_{stat}": ("statistics", col, stat)
+        for col in NUMERIC_COLUMNS
+        for stat in ("std", "min", "max", "p50", "p95", "p99")
+    },
+}
+
+DEFAULT_TREND_METRICS = ["average_flowrate", "average_pressure", "average_temperature"]
+
+
+class InvalidMetricError(ValueError):
+    def __init__(self, metrics):
+        super().__init__(f"Unknown metrics: {', '.join(metrics)}.")
+        self.metrics = metrics
+
+
+def parse_metrics(value):
+    """Split a comma-separated ``metrics`` parameter and check every name."""
+    metrics = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in metrics if name not in TREND_METRICS]
+    if unknown:
+        raise InvalidMetricError(unknown)
+    return metrics or list(DEFAULT_TREND_METRICS)
+
+
+def _lookup(metric):
+    return "__".join(("summary", *TREND_METRICS[metric]))
+
+
+def metric_value(summary, metric):
+    value = summary
+    for key in TREND_METRICS[metric]:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def trend_series(metrics, since=None, until=None, limit=500):
+    """
+    Return the newest ``limit`` datasets in the range as points, oldest first.
+
+    Each point holds ``id``, ``filename``, ``uploaded_at`` and one value per
+    metric (``None`` where a dataset's summary lacks it).
+    """
+    datasets = Dataset.objects.all()
+    if since is not None:
+        datasets = datasets.filter(uploaded_at__gte=since)
+    if until is not None:
+        datasets = datasets.filter(uploaded_at__lt=until)
+
+    lookups = {metric: _lookup(metric) for metric in metrics}
+    rows = (
+        datasets
+        .order_by("-uploaded_at", "-id")
+        .values("id", "filename", "uploaded_at", *lookups.values())[:limit]
+    )
+
+    points = [
+        {
+            "id": row["id"],
+            "filename": row["filename"],
+            "uploaded_at": row["uploaded_at"],
+            **{metric: row[lookup] for metric, lookup in lookups.items()},
+        }
+        for row in rows
+    ]
+    points.reverse()
+    return points
+
+
+def _change(a, b):
+    if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+        return {"a": a, "b": b, "delta": None, "percent_change": None}
+    return {
+        "a": a,
+        "b": b,
+        "delta": b - a,
+        "percent_change": (b - a) / abs(a) * 100 if a else None,
+    }
+
+
+def compare_datasets(a, b):
+    """Metric, Type count and per-Type mean changes from dataset ``a`` to ``b``."""
+    types = list(dict.fromkeys([*a.type_statistics, *b.type_statistics]))
+    return {
+        "a": {"id": a.id, "filename": a.filename, "uploaded_at": a.uploaded_at},
+        "b": {"id": b.id, "filename": b.filename, "uploaded_at": b.uploaded_at},
+        "metrics": {
+            metric: _change(metric_value(a.summary, metric), metric_value(b.summary, metric))
+            for metric in TREND_METRICS
+        },
+        "type_distribution": {
+            eq_type: _change(
+                a.summary.get("type_distribution", {}).get(eq_type, 0),
+                b.summary.get("type_distribution", {}).get(eq_type, 0),
+            )
+            for eq_type in dict.fromkeys(
+                [*a.summary.get("type_distribution", {}), *b.summary.get("type_distribution", {})]
+            )
+        },
+        "type_means": {
+            eq_type: {
+                col: _change(
+                    (a.type_statistics.get(eq_type, {}).get(col) or {}).get("mean"),
+                    (b.type_statistics.get(eq_type, {}).get(col) or {}).get("mean"),
+                )
+                for col in NUMERIC_COLUMNS
+            }
+            for eq_type in types
+        },
+    }
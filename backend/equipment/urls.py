@@ -1,18 +1,65 @@
+from django.conf import settings
 from django.urls import path
+
+from . import async_views
 from .views import (
+    BatchUploadAPIView,
     CSVUploadAPIView,
+    DatasetAppendAPIView,
     DatasetHistoryAPIView,
+    DatasetByHashAPIView,
+    DatasetCompareAPIView,
+    DatasetTrendsAPIView,
     DatasetPDFAPIView,
+    MetricsAPIView,
+    UploadJobAPIView,
     LoginAPIView,
     CSRFTokenAPIView,
     AuthStatusAPIView,
 )
 
+
+def api_view(sync_view, async_view):
+    """``async_view`` when ``settings.ASYNC_API`` is on, else ``sync_view``."""
+    return (async_view if settings.ASYNC_API else sync_view).as_view()
+
+
 urlpatterns = [
-    path("login/", LoginAPIView.as_view(), name="login"),
-    path("upload-csv/", CSVUploadAPIView.as_view(), name="upload-csv"),
-    path("history/", DatasetHistoryAPIView.as_view(), name="dataset-history"),
-    path("pdf/", DatasetPDFAPIView.as_view(), name="dataset-pdf"),
+    path("login/", api_view(LoginAPIView, async_views.LoginView), name="login"),
+    path(
+        "upload-csv/",
+        api_view(CSVUploadAPIView, async_views.CSVUploadView),
+        name="upload-csv",
+    ),
+    path("upload-batch/", BatchUploadAPIView.as_view(), name="upload-batch"),
+    path("jobs/<uuid:job_id>/", UploadJobAPIView.as_view(), name="upload-job"),
+    path(
+        "history/",
+        api_view(DatasetHistoryAPIView, async_views.DatasetHistoryView),
+        name="dataset-history",
+    ),
+    path(
+        "datasets/by-hash/<str:content_hash>/",
+        DatasetByHashAPIView.as_view(),
+        name="dataset-by-hash",
+    ),
+    path(
+        "datasets/<int:pk>/append/",
+        DatasetAppendAPIView.as_view(),
+        name="dataset-append",
+    ),
+    path("trends/", DatasetTrendsAPIView.as_view(), name="dataset-trends"),
+    path(
+        "compare/<int:a>/<int:b>/",
+        DatasetCompareAPIView.as_view(),
+        name="dataset-compare",
+    ),
+    path("pdf/", api_view(DatasetPDFAPIView, async_views.DatasetPDFView), name="dataset-pdf"),
+    path("metrics/", MetricsAPIView.as_view(), name="metrics"),
     path("csrf/", CSRFTokenAPIView.as_view(), name="csrf"),
-    path("auth-status/", AuthStatusAPIView.as_view(), name="auth-status"),
+    path(
+        "auth-status/",
+        api_view(AuthStatusAPIView, async_views.AuthStatusView),
+        name="auth-status",
+    ),
 ]
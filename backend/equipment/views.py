@@ -1,11 +1,12 @@
-import matplotlib
-matplotlib.use('Agg')  # Set non-interactive backend BEFORE any other matplotlib imports
-
-import pandas as pd
 from io import BytesIO
 
+from django.conf import settings
 from django.contrib.auth import authenticate, login
-from django.http import FileResponse
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.core.cache import cache
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.utils.decorators import method_decorator
 
@@ -13,13 +14,56 @@ from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.parsers import MultiPartParser, FormParser
-
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-
-from .serializers import CSVUploadSerializer, DatasetHistorySerializer
-from .models import Dataset
+from rest_framework.parsers import MultiPartParser, FormParser, FileUploadParser
+
+from .caching import (
+    conditional_response,
+    datasets_version,
+    set_validators,
+    versioned_key,
+)
+from .history import (
+    HISTORY_FIELDS,
+    InvalidCursorError,
+    InvalidFieldsError,
+    decode_cursor,
+    history_page,
+    parse_fields,
+)
+from .ingest import (
+    CONTENT_ENCODINGS,
+    DatasetNotAppendableError,
+    UploadEncodingError,
+    append_csv,
+    find_duplicate,
+    hash_upload,
+    ingest_csv,
+    upload_error,
+)
+from .jobs import (
+    discard_spool,
+    reclaim_stale_jobs,
+    spool_root,
+    spool_upload,
+    submit_upload_job,
+)
+from .reports import get_cached_report_pdf, get_report_pdf, report_fingerprint
+from .schema import InvalidCSVError
+from .trends import (
+    TREND_METRICS,
+    InvalidMetricError,
+    compare_datasets,
+    parse_metrics,
+    trend_series,
+)
+from .serializers import (
+    BatchUploadSerializer,
+    CSVUploadSerializer,
+    DatasetHistorySerializer,
+    UploadJobSerializer,
+)
+from .metrics import registry
+from .models import Dataset, UploadJob
 
 from rest_framework.authentication import SessionAuthentication
 
@@ -28,139 +72,9 @@ class CsrfExemptSessionAuthentication(SessionAuthentication):
     def enforce_csrf(self, request):
         return  # Disable CSRF check
 
-# =========================
-# Constants
-# =========================
-
-REQUIRED_COLUMNS = [
-    "Equipment Name",
-    "Type",
-    "Flowrate",
-    "Pressure",
-    "Temperature",
-]
-
-
-# =========================
-# Helper Functions
-# =========================
-
-def compute_summary(df):
-    return {
-        "total_equipment": int(len(df)),
-        "average_flowrate": float(df["Flowrate"].mean()),
-        "average_pressure": float(df["Pressure"].mean()),
-        "average_temperature": float(df["Temperature"].mean()),
-        "type_distribution": df["Type"].value_counts().to_dict(),
-    }
-
-
-def generate_pdf(dataset):
-    import matplotlib.pyplot as plt
-    from reportlab.lib.utils import ImageReader
-    
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    y = height - 50
-
-    pdf.setFont("Helvetica-Bold", 16)
-    pdf.drawString(50, y, "Chemical Equipment Dataset Report")
-    y -= 40
-
-    pdf.setFont("Helvetica", 12)
-    pdf.drawString(50, y, f"Filename: {dataset.filename}")
-    y -= 20
-    pdf.drawString(50, y, f"Uploaded At: {dataset.uploaded_at}")
-    y -= 30
-
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(50, y, "Summary Statistics")
-    y -= 20
-
-    pdf.setFont("Helvetica", 11)
-    summary = dataset.summary
-
-    pdf.drawString(50, y, f"Total Equipment: {summary['total_equipment']}")
-    y -= 20
-    pdf.drawString(50, y, f"Average Flowrate: {summary['average_flowrate']:.2f}")
-    y -= 20
-    pdf.drawString(50, y, f"Average Pressure: {summary['average_pressure']:.2f}")
-    y -= 20
-    pdf.drawString(50, y, f"Average Temperature: {summary['average_temperature']:.2f}")
-    y -= 30
-
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(50, y, "Equipment Type Distribution")
-    y -= 20
-
-    pdf.setFont("Helvetica", 11)
-    for eq_type, count in summary["type_distribution"].items():
-        pdf.drawString(60, y, f"{eq_type}: {count}")
-        y -= 18
-
-    # === Generate and embed charts ===
-    y -= 20
-    
-    # Chart 1: Equipment Type Distribution
-    type_distribution = summary.get("type_distribution", {})
-    if type_distribution:
-        fig1, ax1 = plt.subplots(figsize=(5, 3), dpi=100)
-        types = list(type_distribution.keys())
-        counts = list(type_distribution.values())
-        colors = ['#4CAF50', '#2196F3', '#FF9800', '#9C27B0', '#F44336', '#00BCD4']
-        bar_colors = [colors[i % len(colors)] for i in range(len(types))]
-        ax1.bar(types, counts, color=bar_colors)
-        ax1.set_title("Equipment Type Distribution", fontsize=10, fontweight='bold')
-        ax1.set_xlabel("Type")
-        ax1.set_ylabel("Count")
-        ax1.tick_params(axis='x', rotation=45)
-        fig1.tight_layout()
-        
-        # Save chart to BytesIO
-        chart1_buffer = BytesIO()
-        fig1.savefig(chart1_buffer, format='PNG', dpi=100, bbox_inches='tight')
-        chart1_buffer.seek(0)
-        plt.close(fig1)
-        
-        # Embed in PDF
-        chart1_img = ImageReader(chart1_buffer)
-        pdf.drawImage(chart1_img, 50, y - 200, width=250, height=180)
-    
-    # Chart 2: Average Parameters
-    avg_flowrate = summary.get("average_flowrate", 0)
-    avg_pressure = summary.get("average_pressure", 0)
-    avg_temperature = summary.get("average_temperature", 0)
-    
-    fig2, ax2 = plt.subplots(figsize=(5, 3), dpi=100)
-    params = ["Flowrate", "Pressure", "Temperature"]
-    values = [avg_flowrate, avg_pressure, avg_temperature]
-    colors = ['#2196F3', '#4CAF50', '#FF5722']
-    ax2.bar(params, values, color=colors)
-    ax2.set_title("Average Parameters", fontsize=10, fontweight='bold')
-    ax2.set_ylabel("Value")
-    for i, (param, value) in enumerate(zip(params, values)):
-        ax2.text(i, value + max(values) * 0.02, f"{value:.1f}", ha='center', fontsize=8)
-    fig2.tight_layout()
-    
-    # Save chart to BytesIO
-    chart2_buffer = BytesIO()
-    fig2.savefig(chart2_buffer, format='PNG', dpi=100, bbox_inches='tight')
-    chart2_buffer.seek(0)
-    plt.close(fig2)
-    
-    # Embed in PDF (next to first chart)
-    chart2_img = ImageReader(chart2_buffer)
-    pdf.drawImage(chart2_img, 310, y - 200, width=250, height=180)
-
-    pdf.showPage()
-    pdf.save()
-
-    buffer.seek(0)
-    return buffer
-
 
+def query_flag(request, name):
+    return request.query_params.get(name, "").lower() in ("1", "true")
 
 # =========================
 # CSRF Token API (GET ONLY)
@@ -218,10 +132,17 @@ class AuthStatusAPIView(GenericAPIView):
 # =========================
 
 class CSVUploadAPIView(GenericAPIView):
+    """
+    Accepts either a multipart form with a ``file`` field or the raw CSV as
+    the request body (filename in ``Content-Disposition``). Raw bodies may be
+    compressed with ``Content-Encoding: gzip`` (or ``zstd`` when the
+    zstandard package is installed); they are decompressed while streaming.
+    """
+
     serializer_class = CSVUploadSerializer
     permission_classes = []
     authentication_classes = []
-    parser_classes = [MultiPartParser, FormParser]
+    parser_classes = [MultiPartParser, FormParser, FileUploadParser]
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -233,68 +154,462 @@ class CSVUploadAPIView(GenericAPIView):
             )
 
         csv_file = serializer.validated_data["file"]
+        content_encoding = request.headers.get("Content-Encoding", "identity").lower()
 
-        try:
-            df = pd.read_csv(csv_file)
-        except Exception:
+        if content_encoding not in CONTENT_ENCODINGS:
             return Response(
-                {"error": "Invalid CSV file."},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"error": f"Unsupported Content-Encoding: {content_encoding}."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
             )
 
-        missing_columns = [
-            col for col in REQUIRED_COLUMNS if col not in df.columns
-        ]
+        async_mode = query_flag(request, "async")
+        drop_invalid = query_flag(request, "drop_invalid")
+
+        if content_encoding == "identity" and not async_mode:
+            content_hash = hash_upload(csv_file)
 
-        if missing_columns:
+            duplicate = find_duplicate(content_hash)
+            if duplicate is not None:
+                return self.duplicate_response(duplicate)
+
+            return self.ingest(csv_file, csv_file.name, content_hash, drop_invalid)
+
+        try:
+            spool_path, content_hash = spool_upload(csv_file, content_encoding)
+        except UploadEncodingError:
             return Response(
-                {
-                    "error": "Missing required columns.",
-                    "missing_columns": missing_columns,
-                },
+                {"error": "Could not decompress the uploaded file."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        summary = compute_summary(df)
+        duplicate = find_duplicate(content_hash)
+        if duplicate is not None:
+            discard_spool(spool_path)
+            return self.duplicate_response(duplicate)
 
-        Dataset.objects.create(
-            filename=csv_file.name,
-            summary=summary,
+        if async_mode:
+            return self.enqueue(
+                request, csv_file.name, spool_path, content_hash, drop_invalid
+            )
+
+        try:
+            with open(spool_root() / spool_path, "rb") as spooled:
+                return self.ingest(spooled, csv_file.name, content_hash, drop_invalid)
+        finally:
+            discard_spool(spool_path)
+
+    def ingest(self, csv_file, filename, content_hash, drop_invalid):
+        try:
+            dataset = ingest_csv(
+                csv_file, filename, content_hash, drop_invalid=drop_invalid
+            )
+        except InvalidCSVError as exc:
+            return Response(upload_error(exc), status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "message": "CSV uploaded and analyzed successfully.",
+                "summary": dataset.summary,
+                "type_statistics": dataset.type_statistics,
+            },
+            status=status.HTTP_200_OK,
         )
 
-        dataset_ids_to_keep = (
-            Dataset.objects
-            .order_by("-uploaded_at")
-            .values_list("id", flat=True)[:5]
+    def enqueue(self, request, filename, spool_path, content_hash, drop_invalid):
+        job = submit_upload_job(filename, spool_path, content_hash, drop_invalid)
+        # Relative, so it keeps the scheme the client used behind a TLS proxy.
+        status_url = reverse("upload-job", kwargs={"job_id": job.id})
+
+        return Response(
+            {
+                "message": "CSV accepted for processing.",
+                "job_id": str(job.id),
+                "status": job.status,
+                "status_url": status_url,
+            },
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": status_url},
         )
 
-        Dataset.objects.exclude(id__in=dataset_ids_to_keep).delete()
+    def duplicate_response(self, dataset):
+        return Response(
+            {
+                "message": "CSV already uploaded; returning stored analysis.",
+                "summary": dataset.summary,
+                "type_statistics": dataset.type_statistics,
+                "duplicate": True,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+# =========================
+# Dataset Append API
+# =========================
+
+class DatasetAppendAPIView(GenericAPIView):
+    """
+    Add the rows of a CSV to an existing dataset.
+
+    Takes the same request bodies as ``CSVUploadAPIView`` and
+    ``?drop_invalid=1``. Only the new rows are parsed; their aggregates are
+    merged into the dataset's stored ones, so the cost grows with the
+    appended rows rather than the dataset's size.
+    """
+
+    serializer_class = CSVUploadSerializer
+    permission_classes = []
+    authentication_classes = []
+    parser_classes = [MultiPartParser, FormParser, FileUploadParser]
+
+    def post(self, request, pk):
+        dataset = Dataset.objects.filter(pk=pk).first()
+        if dataset is None:
+            return Response(
+                {"error": "Dataset not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        serializer = self.get_serializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {"error": "CSV file is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        csv_file = serializer.validated_data["file"]
+        content_encoding = request.headers.get("Content-Encoding", "identity").lower()
+
+        if content_encoding not in CONTENT_ENCODINGS:
+            return Response(
+                {"error": f"Unsupported Content-Encoding: {content_encoding}."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        drop_invalid = query_flag(request, "drop_invalid")
+
+        if content_encoding == "identity":
+            return self.append(dataset, csv_file, drop_invalid)
+
+        try:
+            spool_path, _ = spool_upload(csv_file, content_encoding)
+        except UploadEncodingError:
+            return Response(
+                {"error": "Could not decompress the uploaded file."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            with open(spool_root() / spool_path, "rb") as spooled:
+                return self.append(dataset, spooled, drop_invalid)
+        finally:
+            discard_spool(spool_path)
+
+    def append(self, dataset, csv_file, drop_invalid):
+        try:
+            dataset, report = append_csv(dataset, csv_file, drop_invalid=drop_invalid)
+        except InvalidCSVError as exc:
+            return Response(upload_error(exc), status=status.HTTP_400_BAD_REQUEST)
+        except DatasetNotAppendableError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        except Dataset.DoesNotExist:
+            # Deleted while the new rows were being parsed.
+            return Response(
+                {"error": "Dataset not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        data = {
+            "message": "Rows appended to dataset.",
+            "appended_rows": report.rows_checked - report.dropped_rows,
+            "summary": dataset.summary,
+            "type_statistics": dataset.type_statistics,
+        }
+        if report.dropped_rows:
+            data["validation"] = report.to_dict()
+        return Response(data, status=status.HTTP_200_OK)
+
+
+# =========================
+# Batch Upload API
+# =========================
+
+class BatchUploadAPIView(GenericAPIView):
+    """
+    Ingest several CSVs, or ZIP archives of CSVs, sent as repeated ``files``
+    form fields. Responds with one result per CSV, in upload order.
+    """
+
+    serializer_class = BatchUploadSerializer
+    permission_classes = []
+    authentication_classes = []
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {"error": "At least one CSV or ZIP file is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Loaded here: batch ingestion pulls in pandas and pyarrow.
+        from .batch import InvalidBatchError, ingest_batch
+
+        try:
+            results = ingest_batch(
+                serializer.validated_data["files"],
+                drop_invalid=query_flag(request, "drop_invalid"),
+            )
+        except InvalidBatchError as exc:
+            return Response(
+                {"error": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         return Response(
             {
-                "message": "CSV uploaded and analyzed successfully.",
-                "summary": summary,
+                "message": "Batch processed.",
+                "created": sum(
+                    "summary" in result and not result.get("duplicate")
+                    for result in results
+                ),
+                "results": results,
             },
             status=status.HTTP_200_OK,
         )
 
 
+# =========================
+# Upload Job Status API
+# =========================
+
+class UploadJobAPIView(GenericAPIView):
+    serializer_class = UploadJobSerializer
+    permission_classes = []  # Public access - no auth required
+    authentication_classes = []
+    queryset = UploadJob.objects.all()
+    lookup_url_kwarg = "job_id"
+
+    def get(self, request, job_id):
+        reclaim_stale_jobs(UploadJob.objects.filter(id=job_id))
+        job = self.get_object()
+        serializer = self.get_serializer(job)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 # =========================
 # Dataset History API
 # =========================
 
 class DatasetHistoryAPIView(GenericAPIView):
+    """
+    Datasets newest first, one page at a time.
+
+    Query parameters: ``cursor`` (the ``next_cursor`` of the previous page),
+    ``page_size`` (up to ``HISTORY_MAX_PAGE_SIZE``) and ``fields``
+    (comma-separated subset of ``HISTORY_FIELDS``, e.g.
+    ``id,filename,uploaded_at`` for rows without the summary JSON).
+    """
+
     serializer_class = DatasetHistorySerializer
     permission_classes = []  # Public access - no auth required
     authentication_classes = []
-    queryset = Dataset.objects.all().order_by("-uploaded_at")
 
     def get(self, request):
-        datasets = self.get_queryset()[:5]
-        serializer = self.get_serializer(datasets, many=True)
+        try:
+            fields = parse_fields(request.query_params.get("fields", ""))
+        except InvalidFieldsError as exc:
+            return Response(
+                {"error": str(exc), "available_fields": HISTORY_FIELDS},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            page_size = int(
+                request.query_params.get("page_size", settings.HISTORY_PAGE_SIZE)
+            )
+        except ValueError:
+            return Response(
+                {"error": "Invalid 'page_size'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        page_size = max(1, min(page_size, settings.HISTORY_MAX_PAGE_SIZE))
+        cursor = request.query_params.get("cursor", "")
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except InvalidCursorError as exc:
+            return Response(
+                {"error": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        version = datasets_version()
+        etag = version["token"]
+
+        not_modified = conditional_response(request, etag, version["last_modified"])
+        if not_modified is not None:
+            return not_modified
+
+        key = versioned_key("history", version, cursor, page_size, ",".join(fields))
+        data = cache.get(key)
+        if data is None:
+            datasets, next_cursor = history_page(after, page_size, fields)
+            data = {
+                "results": self.get_serializer(datasets, many=True, fields=fields).data,
+                "next_cursor": next_cursor,
+            }
+            cache.set(key, data, settings.API_CACHE_TIMEOUT)
+
+        data = {**data, "next": self.next_url(request, data["next_cursor"])}
+
+        response = Response(data, status=status.HTTP_200_OK)
+        return set_validators(response, etag, version["last_modified"])
+
+    def next_url(self, request, next_cursor):
+        if next_cursor is None:
+            return None
+        params = request.query_params.copy()
+        params["cursor"] = next_cursor
+        return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+
+# =========================
+# Dataset Lookup by Content Hash API
+# (lets clients skip re-sending a known file)
+# =========================
+
+class DatasetByHashAPIView(GenericAPIView):
+    serializer_class = DatasetHistorySerializer
+    permission_classes = []  # Public access - no auth required
+    authentication_classes = []
+
+    def get(self, request, content_hash):
+        dataset = find_duplicate(content_hash.lower())
+
+        if not dataset:
+            return Response(
+                {"error": "No dataset with this content hash."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        serializer = self.get_serializer(dataset)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+# =========================
+# Trends & Comparison API
+# (computed from stored summaries only)
+# =========================
+
+class DatasetTrendsAPIView(GenericAPIView):
+    """
+    Time-ordered metric series across datasets.
+
+    Query parameters: ``metrics`` (comma-separated names, see
+    ``TREND_METRICS``), ``since``/``until`` (ISO 8601 datetimes) and
+    ``limit`` (newest N datasets in range, up to ``TRENDS_MAX_POINTS``).
+    """
+
+    permission_classes = []  # Public access - no auth required
+    authentication_classes = []
+
+    def get(self, request):
+        try:
+            metrics = parse_metrics(request.query_params.get("metrics", ""))
+        except InvalidMetricError as exc:
+            return Response(
+                {"error": str(exc), "available_metrics": list(TREND_METRICS)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        bounds = {}
+        for name in ("since", "until"):
+            value = request.query_params.get(name)
+            if not value:
+                continue
+            parsed = parse_datetime(value)
+            if parsed is None:
+                return Response(
+                    {"error": f"Invalid '{name}' datetime."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            bounds[name] = parsed
+
+        try:
+            limit = int(request.query_params.get("limit", settings.TRENDS_MAX_POINTS))
+        except ValueError:
+            return Response(
+                {"error": "Invalid 'limit'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = max(1, min(limit, settings.TRENDS_MAX_POINTS))
+
+        version = datasets_version()
+        etag = version["token"]
+        not_modified = conditional_response(request, etag, version["last_modified"])
+        if not_modified is not None:
+            return not_modified
+
+        key = versioned_key(
+            "trends",
+            version,
+            ",".join(metrics),
+            # isoformat(): str() of a datetime has a space memcached rejects
+            *(
+                bounds[name].isoformat() if name in bounds else ""
+                for name in ("since", "until")
+            ),
+            limit,
+        )
+        data = cache.get(key)
+        if data is None:
+            data = {
+                "metrics": metrics,
+                "points": trend_series(metrics, limit=limit, **bounds),
+            }
+            cache.set(key, data, settings.API_CACHE_TIMEOUT)
+
+        response = Response(data, status=status.HTTP_200_OK)
+        return set_validators(response, etag, version["last_modified"])
+
+
+class DatasetCompareAPIView(GenericAPIView):
+    """Changes in every metric, Type count and per-Type mean from dataset a to b."""
+
+    permission_classes = []  # Public access - no auth required
+    authentication_classes = []
+
+    def get(self, request, a, b):
+        version = datasets_version()
+        etag = version["token"]
+        not_modified = conditional_response(request, etag, version["last_modified"])
+        if not_modified is not None:
+            return not_modified
+
+        key = versioned_key("compare", version, a, b)
+        data = cache.get(key)
+        if data is None:
+            datasets = Dataset.objects.filter(id__in=[a, b]).only(
+                "id", "filename", "uploaded_at", "summary", "type_statistics"
+            )
+            by_id = {dataset.id: dataset for dataset in datasets}
+            if a not in by_id or b not in by_id:
+                return Response(
+                    {"error": "Dataset not found."},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            data = compare_datasets(by_id[a], by_id[b])
+            cache.set(key, data, settings.API_CACHE_TIMEOUT)
+
+        response = Response(data, status=status.HTTP_200_OK)
+        return set_validators(response, etag, version["last_modified"])
+
+
 # =========================
 # PDF Download API
 # =========================
@@ -304,19 +619,67 @@ class DatasetPDFAPIView(GenericAPIView):
     authentication_classes = []
 
     def get(self, request):
-        dataset = Dataset.objects.order_by("-uploaded_at").first()
-
-        if not dataset:
+        version = datasets_version()
+
+        key = versioned_key("latest-report", version)
+        latest = cache.get(key)
+        if latest is None:
+            dataset = Dataset.objects.order_by("-uploaded_at").first()
+            if dataset is not None:
+                latest = {
+                    "id": dataset.id,
+                    "filename": dataset.filename,
+                    "fingerprint": report_fingerprint(dataset),
+                }
+                cache.set(key, latest, settings.API_CACHE_TIMEOUT)
+
+        if not latest:
             return Response(
                 {"error": "No dataset available."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        pdf_buffer = generate_pdf(dataset)
-
-        return FileResponse(
-            pdf_buffer,
+        etag = latest["fingerprint"]
+        not_modified = conditional_response(request, etag, version["last_modified"])
+        if not_modified is not None:
+            return not_modified
+
+        pdf_bytes = get_cached_report_pdf(latest["id"], etag)
+        if pdf_bytes is None:
+            dataset = Dataset.objects.filter(id=latest["id"]).first()
+            if dataset is None:
+                return Response(
+                    {"error": "No dataset available."},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            pdf_bytes = get_report_pdf(dataset, etag)
+
+        response = FileResponse(
+            BytesIO(pdf_bytes),
             as_attachment=True,
-            filename=f"{dataset.filename}_report.pdf",
+            filename=f"{latest['filename']}_report.pdf",
             content_type="application/pdf",
         )
+        return set_validators(response, etag, version["last_modified"])
+
+
+# =========================
+# Metrics API
+# (Prometheus text format)
+# =========================
+
+class MetricsAPIView(GenericAPIView):
+    permission_classes = []  # Public access - no auth required
+    authentication_classes = []
+
+    def get(self, request):
+        if not settings.METRICS_ENABLED:
+            return Response(
+                {"error": "Metrics are disabled."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        return HttpResponse(
+            registry.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
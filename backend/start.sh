@@ -28,5 +28,21 @@ else:
     print('Admin superuser already exists')
 "
 
-# Start Gunicorn server
-gunicorn config.wsgi:application --bind 0.0.0.0:10000
+# Drain upload jobs in the background, once a minute: run jobs still pending
+# a minute after they were queued (e.g. their process restarted first), and
+# fail running jobs silent for UPLOAD_JOB_TIMEOUT (their process died)
+python manage.py process_upload_jobs --interval 60 &
+
+# Start the ASGI server with the async API views: gunicorn supervises
+# WEB_CONCURRENCY uvicorn worker processes (default: one per core, at least 2)
+# (WSGI alternative: gunicorn config.wsgi:application --bind 0.0.0.0:10000)
+# Exported so settings size each worker's pools as a share of the machine:
+# per worker a forkserver and one warm PDF renderer, and parse workers
+# (cores / WEB_CONCURRENCY, at least 1, at most 4) started on first use.
+CORES=$(nproc 2>/dev/null || echo 1)
+export WEB_CONCURRENCY=${WEB_CONCURRENCY:-$(( CORES > 2 ? CORES : 2 ))}
+ASYNC_API=True exec gunicorn config.asgi:application \
+    --worker-class uvicorn.workers.UvicornWorker \
+    --workers "$WEB_CONCURRENCY" \
+    --bind 0.0.0.0:10000 \
+    --timeout 120
@@ -3,11 +3,74 @@ API Client for Chemical Equipment Analytics Desktop App
 
 Uses requests.Session() to maintain cookies across requests.
 Handles CSRF token fetching and attachment automatically.
+
+Every call has an *_async variant that runs it on a background thread pool
+and reports back through Qt signals (see request_worker.py).
+
+History pages, the latest dataset and recent PDF reports are kept with
+their ETags in an on-disk cache (see local_cache.py), so they can be shown
+at start-up and revalidated with a bodiless 304 later.
 """
 
+import gzip
+import hashlib
 import os
+import tempfile
+import threading
+import time
 import requests
-from typing import Optional, Dict, Any, Tuple
+from contextlib import ExitStack
+from urllib.parse import urljoin
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+from local_cache import LocalCache
+from request_worker import AsyncRequest, RequestRunner
+
+
+# gzip level for uploads: CSV shrinks ~5-10x already at fast settings
+COMPRESS_LEVEL = 6
+
+
+class _ProgressReader:
+    """
+    File wrapper that reports how much of a request body has been sent.
+
+    requests streams any object with read() and __len__ as the body; each
+    read() is one block going out on the socket. Setting cancel_event makes
+    the next read raise, which aborts the request mid-transfer.
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        f,
+        size: int,
+        on_progress: Optional[Callable[[str, float], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ):
+        self._file = f
+        self._size = size
+        self._sent = 0
+        self._on_progress = on_progress
+        self._cancel_event = cancel_event
+
+    def __len__(self) -> int:
+        return self._size
+
+    def read(self, size: int = -1) -> bytes:
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            raise UploadCancelled()
+
+        block = self._file.read(self.BLOCK_SIZE if size is None or size < 0 else size)
+        self._sent += len(block)
+        if self._on_progress is not None and self._size:
+            self._on_progress("upload", self._sent / self._size)
+        return block
+
+
+class UploadCancelled(Exception):
+    """Raised inside a request body to abort an upload in flight."""
 
 
 class APIClient:
@@ -19,9 +82,24 @@ class APIClient:
     # Use environment variable for API URL, fallback to localhost for development
     BASE_URL = os.environ.get("API_URL", "http://127.0.0.1:8000")
 
+    # Seconds between status polls while the server processes an upload
+    JOB_POLL_INTERVAL = 0.5
+
+    # History rows per page and the fields the history list shows
+    HISTORY_PAGE_SIZE = 20
+    HISTORY_LIST_FIELDS = "id,filename,uploaded_at"
+    LATEST_DATASET_FIELDS = "id,filename,uploaded_at,summary,type_statistics"
+
+    # Cached reports offered to the server in If-None-Match
+    PDF_REVALIDATE_COUNT = 5
+
     def __init__(self):
         self.session = requests.Session()
         self._csrf_token: Optional[str] = None
+        # Last (ETag, body) per endpoint on disk, revalidated with
+        # If-None-Match; see _cache_key
+        self.cache = LocalCache()
+        self._runner: Optional[RequestRunner] = None
 
     def _get_csrf_token(self) -> str:
         """Fetch CSRF token from the backend and store it."""
@@ -70,20 +148,147 @@ class APIClient:
         except requests.RequestException as e:
             return False, f"Connection error: {str(e)}"
 
-    def upload_csv(self, file_path: str) -> Tuple[bool, Dict[str, Any]]:
+    @staticmethod
+    def _hash_file(file_path: str) -> str:
+        """Return the SHA-256 hex digest of a file, read in 1 MiB blocks."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _compress_file(file_path: str, target) -> str:
+        """
+        Gzip a file into the open binary file target.
+
+        The SHA-256 of the uncompressed content is computed in the same pass
+        and returned, so the file is only read once.
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f, gzip.GzipFile(
+            fileobj=target, mode="wb", compresslevel=COMPRESS_LEVEL
+        ) as gz:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+                gz.write(block)
+        return digest.hexdigest()
+
+    def find_dataset_by_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an already uploaded dataset by the SHA-256 of its CSV.
+
+        Returns:
+            The stored dataset (with its summary), or None if unknown
+        """
+        response = self.session.get(
+            f"{self.BASE_URL}/api/datasets/by-hash/{content_hash}/"
+        )
+        if response.status_code == 200:
+            return response.json()
+        return None
+
+    def upload_csv(
+        self,
+        file_path: str,
+        on_progress: Optional[Callable[[str, float], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        drop_invalid: bool = False,
+    ) -> Tuple[bool, Dict[str, Any]]:
         """
         Upload a CSV file and get analytics.
         
         Note: This endpoint is unauthenticated per backend design.
+
+        The file is gzipped to a temporary file and hashed in the same pass;
+        if the server already has a dataset with the same content, its
+        stored analysis is returned without sending the file at all.
+
+        Otherwise the compressed file is streamed as the request body
+        (Content-Encoding: gzip) and queued as a server-side job that is
+        polled until it finishes. on_progress(stage, fraction) is called
+        with stage "upload" while bytes are sent and "processing" while the
+        server analyzes them; setting cancel_event aborts either stage.
+
+        Rows that fail validation reject the upload (the error carries a
+        "validation" report) unless drop_invalid is set, in which case they
+        are skipped and reported in the summary.
         
         Returns:
             Tuple of (success: bool, data: dict with analytics or error)
         """
+        filename = file_path.split("\\")[-1].split("/")[-1]
+
         try:
-            with open(file_path, "rb") as f:
-                files = {"file": (file_path.split("\\")[-1].split("/")[-1], f, "text/csv")}
+            with tempfile.TemporaryFile() as compressed:
+                content_hash = self._compress_file(file_path, compressed)
+
+                existing = self.find_dataset_by_hash(content_hash)
+                if existing is not None:
+                    return True, {
+                        "message": "CSV already uploaded; returning stored analysis.",
+                        "summary": existing["summary"],
+                        "type_statistics": existing.get("type_statistics"),
+                        "duplicate": True,
+                    }
+
+                size = compressed.tell()
+                compressed.seek(0)
                 response = self.session.post(
                     f"{self.BASE_URL}/api/upload-csv/",
+                    params={"async": "1", "drop_invalid": "1" if drop_invalid else "0"},
+                    data=_ProgressReader(compressed, size, on_progress, cancel_event),
+                    headers={
+                        "Content-Type": "text/csv",
+                        "Content-Encoding": "gzip",
+                        "Content-Disposition": f'attachment; filename="{filename}"',
+                    },
+                )
+
+            if response.status_code == 202:
+                return self.wait_for_job(
+                    response.json()["status_url"], on_progress, cancel_event
+                )
+            elif response.status_code == 200:
+                return True, response.json()
+            else:
+                return False, response.json()
+
+        except UploadCancelled:
+            return False, {"error": "Cancelled"}
+        except requests.RequestException as e:
+            if isinstance(e.__context__, UploadCancelled):
+                return False, {"error": "Cancelled"}
+            return False, {"error": f"Connection error: {str(e)}"}
+        except FileNotFoundError:
+            return False, {"error": "File not found"}
+
+    def upload_many(
+        self, file_paths: List[str], drop_invalid: bool = False
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Upload several CSV files (or ZIP archives of CSVs) in one request.
+
+        The server parses them in parallel and answers with one entry per
+        CSV in data["results"], each holding either a summary or an error.
+        
+        Returns:
+            Tuple of (success: bool, data: dict with per-file results or error)
+        """
+        try:
+            with ExitStack() as stack:
+                files = []
+                for file_path in file_paths:
+                    name = file_path.split("\\")[-1].split("/")[-1]
+                    content_type = (
+                        "application/zip" if name.lower().endswith(".zip") else "text/csv"
+                    )
+                    f = stack.enter_context(open(file_path, "rb"))
+                    files.append(("files", (name, f, content_type)))
+
+                response = self.session.post(
+                    f"{self.BASE_URL}/api/upload-batch/",
+                    params={"drop_invalid": "1" if drop_invalid else "0"},
                     files=files,
                 )
 
@@ -97,21 +302,98 @@ class APIClient:
         except FileNotFoundError:
             return False, {"error": "File not found"}
 
-    def get_history(self) -> Tuple[bool, Any]:
+    def wait_for_job(
+        self,
+        status_url: str,
+        on_progress: Optional[Callable[[str, float], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Poll an upload job until it succeeds, fails or is cancelled.
+
+        Returns:
+            Tuple of (success: bool, data: dict with analytics or error)
         """
-        Get the last 5 datasets.
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return False, {"error": "Cancelled"}
+
+            # The server returns the status URL relative to itself
+            response = self.session.get(urljoin(self.BASE_URL, status_url))
+            if response.status_code != 200:
+                return False, {"error": f"Failed to get upload status (status {response.status_code})"}
+
+            job = response.json()
+            if on_progress is not None:
+                on_progress("processing", job.get("progress", 0.0))
+
+            if job["status"] == "succeeded":
+                return True, {
+                    "message": "CSV uploaded and analyzed successfully.",
+                    "summary": job["summary"],
+                    "type_statistics": job.get("type_statistics"),
+                }
+            if job["status"] == "failed":
+                return False, job.get("error") or {"error": "Upload failed"}
+
+            if cancel_event is not None:
+                cancel_event.wait(self.JOB_POLL_INTERVAL)
+            else:
+                time.sleep(self.JOB_POLL_INTERVAL)
+
+    def _cache_key(self, name: str) -> str:
+        """
+        Cache key for name on this server.
+
+        History pages are named by cursor and PDF reports by their ETag,
+        which the server derives from the report's dataset and contents.
+        """
+        return f"{self.BASE_URL}|{name}"
+
+    def get_history(self, cursor: Optional[str] = None) -> Tuple[bool, Any]:
+        """
+        Get one page of datasets, newest first, without their summaries.
+
+        cursor is the next_cursor of the previous page; None fetches the
+        first page. Sends the ETag of the previous response for the same page
+        so an unchanged history costs a bodiless 304 instead of a full
+        download.
         
         Returns:
-            Tuple of (success: bool, data: list of datasets or error dict)
+            Tuple of (success: bool, data: page dict with "results" and
+            "next_cursor", or error dict)
         """
         try:
+            headers = self._get_headers()
+            key = self._cache_key(f"history:{cursor or ''}")
+            cached = self.cache.get_json(key)
+            if cached:
+                headers["If-None-Match"] = cached[0]
+
+            params = {
+                "page_size": self.HISTORY_PAGE_SIZE,
+                "fields": self.HISTORY_LIST_FIELDS,
+            }
+            if cursor:
+                params["cursor"] = cursor
+
             response = self.session.get(
                 f"{self.BASE_URL}/api/history/",
-                headers=self._get_headers(),
+                params=params,
+                headers=headers,
             )
 
-            if response.status_code == 200:
-                return True, response.json()
+            if response.status_code == 304 and cached:
+                return True, cached[1]
+            elif response.status_code == 200:
+                data = response.json()
+                etag = response.headers.get("ETag")
+                if cursor is None:
+                    # A new first page means any cached later pages are stale
+                    self.cache.delete_prefix(self._cache_key("history:"))
+                if etag:
+                    self.cache.put_json(key, etag, data)
+                return True, data
             elif response.status_code == 403:
                 return False, {"error": "Authentication required"}
             else:
@@ -120,24 +402,112 @@ class APIClient:
         except requests.RequestException as e:
             return False, {"error": f"Connection error: {str(e)}"}
 
-    def download_pdf(self, save_path: str) -> Tuple[bool, str]:
+    def cached_history(self) -> Optional[Dict[str, Any]]:
+        """The first history page as last received, without contacting the server."""
+        cached = self.cache.get_json(self._cache_key("history:"))
+        return cached[1] if cached else None
+
+    def get_latest_dataset(self) -> Tuple[bool, Any]:
+        """
+        Get the newest dataset with its summary and type statistics.
+
+        Revalidated against the cached copy like get_history.
+
+        Returns:
+            Tuple of (success: bool, data: dataset dict, None when nothing
+            has been uploaded, or error dict)
+        """
+        try:
+            headers = self._get_headers()
+            key = self._cache_key("latest-dataset")
+            cached = self.cache.get_json(key)
+            if cached:
+                headers["If-None-Match"] = cached[0]
+
+            response = self.session.get(
+                f"{self.BASE_URL}/api/history/",
+                params={"page_size": 1, "fields": self.LATEST_DATASET_FIELDS},
+                headers=headers,
+            )
+
+            if response.status_code == 304 and cached:
+                return True, cached[1]
+            elif response.status_code == 200:
+                results = response.json()["results"]
+                dataset = results[0] if results else None
+                etag = response.headers.get("ETag")
+                if etag:
+                    self.cache.put_json(key, etag, dataset)
+                return True, dataset
+            elif response.status_code == 403:
+                return False, {"error": "Authentication required"}
+            else:
+                return False, {"error": f"Failed to load latest dataset (status {response.status_code})"}
+
+        except requests.RequestException as e:
+            return False, {"error": f"Connection error: {str(e)}"}
+
+    def cached_latest_dataset(self) -> Optional[Dict[str, Any]]:
+        """The newest dataset as last received, without contacting the server."""
+        cached = self.cache.get_json(self._cache_key("latest-dataset"))
+        return cached[1] if cached else None
+
+    def download_pdf(
+        self,
+        save_path: str,
+        cancel_event: Optional[threading.Event] = None,
+        revalidate: bool = True,
+    ) -> Tuple[bool, str]:
         """
         Download the latest PDF report.
+
+        Reports are cached on disk under their ETag, and the ETags of the
+        most recent ones are sent in If-None-Match. If the latest report is
+        one of them (304), the cached copy whose ETag the server names is
+        written out without downloading again. Setting cancel_event aborts
+        the transfer and removes the partial file.
         
         Returns:
             Tuple of (success: bool, message: str)
         """
         try:
+            headers = self._get_headers()
+            prefix = self._cache_key("pdf:")
+            etags = self.cache.etags(prefix, self.PDF_REVALIDATE_COUNT) if revalidate else []
+            if etags:
+                headers["If-None-Match"] = ", ".join(etags)
+
             response = self.session.get(
                 f"{self.BASE_URL}/api/pdf/",
-                headers=self._get_headers(),
+                headers=headers,
                 stream=True,
             )
 
-            if response.status_code == 200:
+            if response.status_code == 304:
+                cached = self.cache.get(prefix + response.headers.get("ETag", ""))
+                if cached is None:
+                    # Evicted since the request was sent; fetch it in full
+                    return self.download_pdf(save_path, cancel_event, revalidate=False)
+                with open(save_path, "wb") as f:
+                    f.write(cached[1])
+                return True, f"PDF saved to {save_path}"
+            elif response.status_code == 200:
+                chunks = []
                 with open(save_path, "wb") as f:
                     for chunk in response.iter_content(chunk_size=8192):
+                        if cancel_event is not None and cancel_event.is_set():
+                            break
                         f.write(chunk)
+                        chunks.append(chunk)
+
+                if cancel_event is not None and cancel_event.is_set():
+                    response.close()
+                    os.remove(save_path)
+                    return False, "Cancelled"
+
+                etag = response.headers.get("ETag")
+                if etag:
+                    self.cache.put(prefix + etag, etag, b"".join(chunks))
                 return True, f"PDF saved to {save_path}"
             elif response.status_code == 403:
                 return False, "Authentication required"
@@ -150,5 +520,59 @@ class APIClient:
             return False, f"Connection error: {str(e)}"
 
 
+    # ----- Asynchronous API -------------------------------------------------
+    #
+    # Each *_async method runs its blocking counterpart on a thread pool and
+    # returns an AsyncRequest whose finished signal carries the same tuple.
+    # Calling one while an identical request is still in flight returns that
+    # request instead of starting another.
+
+    @property
+    def runner(self) -> RequestRunner:
+        if self._runner is None:
+            self._runner = RequestRunner()
+        return self._runner
+
+    def login_async(self, username: str, password: str) -> AsyncRequest:
+        return self.runner.submit("login", self.login, username, password)
+
+    def upload_csv_async(self, file_path: str, drop_invalid: bool = False) -> AsyncRequest:
+        """Upload in the background; progress(str, float) reports each stage."""
+        return self.runner.submit(
+            f"upload:{file_path}",
+            self.upload_csv,
+            file_path,
+            drop_invalid=drop_invalid,
+            cancellable=True,
+            reports_progress=True,
+        )
+
+    def upload_many_async(
+        self, file_paths: List[str], drop_invalid: bool = False
+    ) -> AsyncRequest:
+        return self.runner.submit(
+            "upload-many:" + "|".join(file_paths),
+            self.upload_many,
+            file_paths,
+            drop_invalid=drop_invalid,
+        )
+
+    def get_history_async(self, cursor: Optional[str] = None) -> AsyncRequest:
+        return self.runner.submit(f"history:{cursor or ''}", self.get_history, cursor)
+
+    def get_latest_dataset_async(self) -> AsyncRequest:
+        return self.runner.submit("latest-dataset", self.get_latest_dataset)
+
+    def download_pdf_async(self, save_path: str) -> AsyncRequest:
+        return self.runner.submit(
+            f"pdf:{save_path}", self.download_pdf, save_path, cancellable=True
+        )
+
+    def cancel_all(self):
+        """Cancel every in-flight asynchronous request."""
+        if self._runner is not None:
+            self._runner.cancel_all()
+
+
 # Singleton instance shared across all windows
 api_client = APIClient()
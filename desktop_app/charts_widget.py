@@ -2,7 +2,8 @@
 Charts Widget for Chemical Equipment Analytics Desktop App
 
 Displays analytics data using Matplotlib charts embedded in PyQt5.
-Shows equipment type distribution and average parameters.
+Shows equipment type distribution, average parameters and, when available,
+each parameter's mean and range per equipment type.
 """
 
 from PyQt5.QtWidgets import QWidget, QVBoxLayout
@@ -22,20 +23,21 @@ class ChartsWidget(QWidget):
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
 
-        # Create matplotlib figure with 2 subplots
-        self.figure = Figure(figsize=(8, 6), dpi=80)
+        # Create matplotlib figure (2 overview charts + 3 per-type charts)
+        self.figure = Figure(figsize=(8, 8), dpi=80)
         self.canvas = FigureCanvas(self.figure)
         layout.addWidget(self.canvas)
 
         self.setLayout(layout)
 
-    def update_charts(self, summary: dict):
+    def update_charts(self, summary: dict, type_statistics: dict = None):
         """Update charts with new analytics data."""
         self.figure.clear()
 
-        # Create 2 subplots (side by side)
-        ax1 = self.figure.add_subplot(1, 2, 1)
-        ax2 = self.figure.add_subplot(1, 2, 2)
+        # Overview charts side by side; per-type charts in a row below
+        grid = self.figure.add_gridspec(2 if type_statistics else 1, 6)
+        ax1 = self.figure.add_subplot(grid[0, :3])
+        ax2 = self.figure.add_subplot(grid[0, 3:])
 
         # Chart 1: Equipment Type Distribution (Bar Chart)
         type_distribution = summary.get("type_distribution", {})
@@ -72,6 +74,21 @@ class ChartsWidget(QWidget):
         for i, (param, value) in enumerate(zip(params, values)):
             ax2.text(i, value + max(values) * 0.02, f"{value:.1f}", ha='center', fontsize=8)
 
+        # Charts 3-5: Mean per Type with min-max range, one per parameter
+        if type_statistics:
+            types = list(type_statistics.keys())
+            for i, (param, color) in enumerate(zip(params, colors)):
+                ax = self.figure.add_subplot(grid[1, 2 * i:2 * i + 2])
+                stats = [type_statistics[t].get(param) for t in types]
+                means = [s["mean"] if s else 0 for s in stats]
+                lower = [s["mean"] - s["min"] if s else 0 for s in stats]
+                upper = [s["max"] - s["mean"] if s else 0 for s in stats]
+
+                ax.bar(types, means, color=color, yerr=[lower, upper], capsize=3)
+                ax.set_title(f"{param} by Type", fontsize=9, fontweight='bold')
+                ax.tick_params(axis='x', rotation=45, labelsize=7)
+                ax.tick_params(axis='y', labelsize=7)
+
         # Adjust layout
         self.figure.tight_layout()
         self.canvas.draw()
@@ -30,10 +30,21 @@ def format_local_time(iso_string):
 
 
 class HistoryWidget(QWidget):
-    """Widget displaying upload history (last 5 datasets)."""
+    """
+    Widget displaying upload history, newest first.
+
+    The first page is loaded on refresh; further pages are fetched as the
+    list is scrolled near its end.
+    """
+
+    # Rows from the bottom at which the next page is requested
+    LOAD_MORE_THRESHOLD = 3
 
     def __init__(self):
         super().__init__()
+        self.history_request = None
+        self.page_request = None
+        self.next_cursor = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -65,35 +76,98 @@ class HistoryWidget(QWidget):
         # History list
         self.list_widget = QListWidget()
         self.list_widget.setMaximumHeight(150)
+        self.list_widget.verticalScrollBar().valueChanged.connect(self.on_scrolled)
         layout.addWidget(self.list_widget)
 
         self.setLayout(layout)
 
+    def show_cached(self):
+        """Draw the first page as last received, until load_history answers."""
+        data = api_client.cached_history()
+        if data and data["results"]:
+            self.list_widget.clear()
+            self.add_page(data, load_more=False)
+
     def load_history(self):
-        self.list_widget.clear()
         self.error_label.hide()
         self.refresh_button.setEnabled(False)
         self.refresh_button.setText("Loading...")
 
-        success, data = api_client.get_history()
+        # A page of the old list arriving after the refresh would be stale.
+        if self.page_request is not None:
+            self.page_request.cancel()
+            self.page_request = None
+
+        request = api_client.get_history_async()
+        # Repeated refreshes share the in-flight request; connect only once.
+        if request is not self.history_request:
+            self.history_request = request
+            request.finished.connect(self.on_history_loaded)
+
+    def on_history_loaded(self, result):
+        success, data = result
 
         self.refresh_button.setEnabled(True)
         self.refresh_button.setText("Refresh")
 
         if success:
-            if not data:
+            self.list_widget.clear()
+            self.next_cursor = None
+            if not data["results"]:
                 item = QListWidgetItem("No datasets uploaded yet")
                 item.setFlags(item.flags() & ~Qt.ItemIsSelectable)
                 self.list_widget.addItem(item)
             else:
-                for dataset in data:
-                    filename = dataset.get("filename", "Unknown")
-                    uploaded_at = dataset.get("uploaded_at", "")
-                    formatted_time = format_local_time(uploaded_at)
-                    
-                    item_text = f"{filename} — {formatted_time}"
-                    self.list_widget.addItem(item_text)
+                self.add_page(data)
         else:
+            # Rows already shown (e.g. from the cache) stay, with the error above them.
+            self.show_error(data)
+
+    def on_scrolled(self, value):
+        scroll_bar = self.list_widget.verticalScrollBar()
+        if value >= scroll_bar.maximum() - self.LOAD_MORE_THRESHOLD:
+            self.load_more()
+
+    def load_more(self):
+        if self.next_cursor is None or self.page_request is not None:
+            return
+
+        self.page_request = api_client.get_history_async(self.next_cursor)
+        self.page_request.finished.connect(self.on_page_loaded)
+
+    def on_page_loaded(self, result):
+        self.page_request = None
+        success, data = result
+
+        if success:
+            self.add_page(data)
+        else:
+            self.show_error(data)
+
+    def add_page(self, data, load_more=True):
+        for dataset in data["results"]:
+            filename = dataset.get("filename", "Unknown")
+            uploaded_at = dataset.get("uploaded_at", "")
+            formatted_time = format_local_time(uploaded_at)
+
+            item_text = f"{filename} — {formatted_time}"
+            self.list_widget.addItem(item_text)
+
+        if not load_more:
+            # Cached rows only; the next page comes after revalidation.
+            return
+
+        self.next_cursor = data.get("next_cursor")
+        # Keep loading until the list can scroll, or nothing is left. Lay
+        # the items out now so the scroll range reflects the new rows.
+        self.list_widget.doItemsLayout()
+        if self.list_widget.verticalScrollBar().maximum() == 0:
+            self.load_more()
+
+    def show_error(self, data):
+        if isinstance(data, dict):
             error_msg = data.get("error", "Failed to load history")
-            self.error_label.setText(error_msg)
-            self.error_label.show()
+        else:
+            error_msg = str(data)
+        self.error_label.setText(error_msg)
+        self.error_label.show()
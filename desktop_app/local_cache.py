@@ -0,0 +1,163 @@
+"""
+On-disk response cache for Chemical Equipment Analytics Desktop App
+
+Keeps the last response of each endpoint (history pages, the latest
+dataset's summary) and recent PDF reports with their server ETags in a
+small SQLite database, so the app can draw them on start-up before the
+server has answered and revalidate them with If-None-Match afterwards.
+
+The cache is bounded by total size; the least recently used entries are
+evicted first. It is only ever an optimization: if the database cannot be
+opened or written, every lookup is a miss and the app talks to the server
+as before.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+
+def default_cache_dir() -> Path:
+    """Per-user cache directory, overridable with EQUIPMENT_CACHE_DIR."""
+    if os.environ.get("EQUIPMENT_CACHE_DIR"):
+        return Path(os.environ["EQUIPMENT_CACHE_DIR"])
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "equipment-analytics"
+
+
+class LocalCache:
+    """
+    Size-bounded LRU store of (ETag, body) pairs, safe to use from any thread.
+
+    Bodies are bytes; get_json/put_json store JSON-serializable values.
+    """
+
+    # Default upper bound for the sum of all cached bodies
+    MAX_BYTES = int(os.environ.get("EQUIPMENT_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.path = Path(path) if path is not None else default_cache_dir() / "cache.sqlite3"
+        self.max_bytes = self.MAX_BYTES if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " etag TEXT NOT NULL,"
+                " body BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used)")
+            self._db.commit()
+        except (OSError, sqlite3.Error):
+            self._db = None
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """Return (etag, body) for key and mark it as recently used, or None."""
+        with self._lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT etag, body FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE entries SET last_used = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+                    self._db.commit()
+            except sqlite3.Error:
+                return None
+        return (row[0], bytes(row[1])) if row is not None else None
+
+    def put(self, key: str, etag: str, body: bytes):
+        """Store body under key, then evict old entries beyond max_bytes."""
+        if len(body) > self.max_bytes:
+            self.delete(key)
+            return
+
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, etag, body, size, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, etag, sqlite3.Binary(body), len(body), time.time()),
+                )
+                self._evict()
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        doomed = []
+        for key, size in self._db.execute(
+            "SELECT key, size FROM entries ORDER BY last_used"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def etags(self, prefix: str, limit: int = 10) -> List[str]:
+        """ETags of the entries whose key starts with prefix, most recent first."""
+        with self._lock:
+            if self._db is None:
+                return []
+            try:
+                rows = self._db.execute(
+                    "SELECT etag FROM entries WHERE substr(key, 1, ?) = ?"
+                    " ORDER BY last_used DESC LIMIT ?",
+                    (len(prefix), prefix, limit),
+                ).fetchall()
+            except sqlite3.Error:
+                return []
+        return [row[0] for row in rows]
+
+    def delete(self, key: str):
+        self._delete("key = ?", key)
+
+    def delete_prefix(self, prefix: str):
+        """Remove every entry whose key starts with prefix."""
+        self._delete("substr(key, 1, ?) = ?", len(prefix), prefix)
+
+    def _delete(self, where: str, *params):
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute(f"DELETE FROM entries WHERE {where}", params)
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+
+    def get_json(self, key: str) -> Optional[Tuple[str, Any]]:
+        cached = self.get(key)
+        if cached is None:
+            return None
+        try:
+            return cached[0], json.loads(cached[1])
+        except ValueError:
+            return None
+
+    def put_json(self, key: str, etag: str, value: Any):
+        self.put(key, etag, json.dumps(value).encode())
@@ -86,7 +86,11 @@ class LoginWindow(QWidget):
         self.login_button.setEnabled(False)
         self.login_button.setText("Logging in...")
 
-        success, message = api_client.login(username, password)
+        request = api_client.login_async(username, password)
+        request.finished.connect(self.on_login_finished)
+
+    def on_login_finished(self, result):
+        success, message = result
 
         if success:
             self.error_label.hide()
@@ -0,0 +1,130 @@
+"""
+Background request execution for Chemical Equipment Analytics Desktop App
+
+Runs blocking APIClient calls on a QThreadPool and delivers their results
+back to the GUI thread through Qt signals, so windows never freeze while a
+request is in flight.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class AsyncRequest(QObject):
+    """
+    Handle for one in-flight background request.
+
+    Signals are emitted on the GUI thread:
+        finished(object): the call's return value, or (False, message) if
+                          it raised
+        progress(str, float): stage name and progress between 0.0 and 1.0,
+                              when reported
+        cancelled():      the request was cancelled before it delivered
+    """
+
+    finished = pyqtSignal(object)
+    progress = pyqtSignal(str, float)
+    cancelled = pyqtSignal()
+
+    # Internal hand-off from the worker thread; queued to the GUI thread
+    _completed = pyqtSignal(object)
+
+    def __init__(self, key: str, on_done: Optional[Callable[["AsyncRequest"], None]] = None):
+        super().__init__()
+        self.key = key
+        self.cancel_event = threading.Event()
+        self.done = False
+        self._on_done = on_done
+        self._completed.connect(self._deliver)
+
+    def cancel(self):
+        """Cancel the request; no finished signal will be emitted."""
+        self.cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @pyqtSlot(object)
+    def _deliver(self, result: Any):
+        self.done = True
+        if self._on_done is not None:
+            self._on_done(self)
+        if self.is_cancelled():
+            self.cancelled.emit()
+        else:
+            self.finished.emit(result)
+
+
+class _RequestRunnable(QRunnable):
+    def __init__(self, request: AsyncRequest, func: Callable, args, kwargs):
+        super().__init__()
+        self.request = request
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        result = None
+        if not self.request.is_cancelled():
+            try:
+                result = self.func(*self.args, **self.kwargs)
+            except Exception as exc:
+                # Always complete, or the key would stay in flight forever
+                result = (False, str(exc))
+        self.request._completed.emit(result)
+
+
+class RequestRunner:
+    """
+    Runs callables on a thread pool, one AsyncRequest per key.
+
+    Submitting a key that is already in flight returns the existing request
+    instead of starting a second one, so e.g. repeated Refresh clicks share a
+    single HTTP call.
+    """
+
+    def __init__(self, max_threads: int = 4):
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self._in_flight: Dict[str, AsyncRequest] = {}
+
+    def submit(
+        self,
+        key: str,
+        func: Callable,
+        *args,
+        cancellable: bool = False,
+        reports_progress: bool = False,
+        **kwargs,
+    ) -> AsyncRequest:
+        """
+        Run func(*args, **kwargs) in the background.
+
+        cancellable passes the request's threading.Event to func as
+        cancel_event; reports_progress passes an on_progress callback that
+        feeds the request's progress signal.
+        """
+        existing = self._in_flight.get(key)
+        if existing is not None and not existing.done and not existing.is_cancelled():
+            return existing
+
+        request = AsyncRequest(key, on_done=self._forget)
+        self._in_flight[key] = request
+
+        if cancellable:
+            kwargs["cancel_event"] = request.cancel_event
+        if reports_progress:
+            kwargs["on_progress"] = request.progress.emit
+
+        self.pool.start(_RequestRunnable(request, func, args, kwargs))
+        return request
+
+    def _forget(self, request: AsyncRequest):
+        if self._in_flight.get(request.key) is request:
+            del self._in_flight[request.key]
+
+    def cancel_all(self):
+        for request in list(self._in_flight.values()):
+            request.cancel()
@@ -0,0 +1,216 @@
+"""
+Tests for Chemical Equipment Analytics Desktop App
+
+Run from desktop_app/ (no display needed):
+
+    QT_QPA_PLATFORM=offscreen python -m unittest tests
+"""
+
+import gzip
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+
+# api_client opens the on-disk cache at import; keep it out of ~/.cache
+_cache_dir = tempfile.TemporaryDirectory()
+os.environ["EQUIPMENT_CACHE_DIR"] = _cache_dir.name
+
+import api_client  # noqa: E402
+from history_widget import HistoryWidget  # noqa: E402
+from local_cache import LocalCache  # noqa: E402
+from request_worker import RequestRunner  # noqa: E402
+
+
+app = QApplication.instance() or QApplication([])
+
+
+def wait_for(signal, timeout_ms=5000):
+    """Run the event loop until signal fires; return its arguments."""
+    received = []
+    loop = QEventLoop()
+
+    def on_signal(*args):
+        received.append(args)
+        loop.quit()
+
+    signal.connect(on_signal)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec_()
+    if not received:
+        raise AssertionError("signal was not emitted in time")
+    return received[0]
+
+
+class RequestRunnerTests(unittest.TestCase):
+    def setUp(self):
+        self.runner = RequestRunner(max_threads=2)
+        self.addCleanup(self.runner.pool.waitForDone)
+
+    def test_result_is_delivered_on_the_gui_thread(self):
+        main_thread = threading.get_ident()
+        request = self.runner.submit("sum", lambda a, b: (threading.get_ident(), a + b), 2, 3)
+        delivered_on = []
+        request.finished.connect(lambda _: delivered_on.append(threading.get_ident()))
+
+        (result,) = wait_for(request.finished)
+
+        worker_thread, total = result
+        self.assertEqual(total, 5)
+        self.assertNotEqual(worker_thread, main_thread)
+        self.assertEqual(delivered_on, [main_thread])
+        self.assertTrue(request.done)
+
+    def test_requests_in_flight_are_shared_per_key(self):
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return len(calls)
+
+        first = self.runner.submit("history:", slow)
+        self.assertIs(self.runner.submit("history:", slow), first)
+        release.set()
+        self.assertEqual(wait_for(first.finished), (1,))
+
+        second = self.runner.submit("history:", slow)
+        self.assertIsNot(second, first)
+        self.assertEqual(wait_for(second.finished), (2,))
+
+    def test_cancelled_request_reports_cancelled_not_finished(self):
+        started = threading.Event()
+        finished = []
+
+        def download(cancel_event):
+            started.set()
+            cancel_event.wait(5)
+            return "partial"
+
+        request = self.runner.submit("pdf", download, cancellable=True)
+        request.finished.connect(finished.append)
+        started.wait(5)
+        request.cancel()
+
+        wait_for(request.cancelled)
+        self.assertEqual(finished, [])
+
+    def test_raising_call_finishes_with_an_error_and_frees_its_key(self):
+        def save():
+            raise PermissionError("report.pdf is read-only")
+
+        request = self.runner.submit("pdf", save)
+
+        self.assertEqual(wait_for(request.finished), ((False, "report.pdf is read-only"),))
+        self.assertIsNot(self.runner.submit("pdf", lambda: (True, "")), request)
+
+
+class CompressedUploadTests(unittest.TestCase):
+    def test_compression_hashes_the_uncompressed_file(self):
+        content = b"Equipment Name,Type,Flowrate,Pressure,Temperature\n" * 5000
+        with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as source:
+            source.write(content)
+        self.addCleanup(os.unlink, source.name)
+
+        target = io.BytesIO()
+        content_hash = api_client.APIClient._compress_file(source.name, target)
+
+        self.assertEqual(content_hash, hashlib.sha256(content).hexdigest())
+        self.assertEqual(gzip.decompress(target.getvalue()), content)
+        self.assertLess(len(target.getvalue()), len(content) // 10)
+
+    def test_progress_reader_reports_and_cancels(self):
+        progress = []
+        cancel_event = threading.Event()
+        reader = api_client._ProgressReader(
+            io.BytesIO(b"x" * 100), 100, lambda *args: progress.append(args), cancel_event
+        )
+
+        self.assertEqual(len(reader), 100)
+        self.assertEqual(reader.read(40), b"x" * 40)
+        self.assertEqual(len(reader.read()), 60)
+        self.assertEqual(progress, [("upload", 0.4), ("upload", 1.0)])
+
+        cancel_event.set()
+        with self.assertRaises(api_client.UploadCancelled):
+            reader.read()
+
+
+class FakeResponse:
+    def __init__(self, status_code, etag, body=b""):
+        self.status_code = status_code
+        self.headers = {"ETag": etag}
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+
+class PdfCacheTests(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.client = api_client.APIClient()
+        self.client.cache = LocalCache(os.path.join(cache_dir.name, "cache.sqlite3"))
+        self.client._csrf_token = "token"
+        self.responses = []
+        self.sent = []
+
+        def get(url, headers, stream):
+            self.sent.append(headers.get("If-None-Match"))
+            return self.responses.pop(0)
+
+        self.client.session.get = get
+        self.save_path = os.path.join(cache_dir.name, "report.pdf")
+
+    def download(self):
+        success, message = self.client.download_pdf(self.save_path)
+        self.assertTrue(success, message)
+        with open(self.save_path, "rb") as f:
+            return f.read()
+
+    def test_reports_are_cached_per_etag(self):
+        self.responses = [
+            FakeResponse(200, '"first"', b"first report"),
+            FakeResponse(200, '"second"', b"second report"),
+            FakeResponse(304, '"first"'),
+        ]
+
+        self.assertEqual(self.download(), b"first report")
+        self.assertEqual(self.download(), b"second report")
+        self.assertEqual(self.download(), b"first report")
+        self.assertEqual(self.sent, [None, '"first"', '"second", "first"'])
+
+    def test_evicted_report_is_downloaded_again(self):
+        self.client.cache.put(self.client._cache_key("pdf:") + '"gone"', '"gone"', b"x")
+        self.responses = [
+            FakeResponse(304, '"other"'),
+            FakeResponse(200, '"other"', b"other report"),
+        ]
+
+        self.assertEqual(self.download(), b"other report")
+        self.assertEqual(self.sent, ['"gone"', None])
+
+
+class HistoryWidgetTests(unittest.TestCase):
+    def test_failed_refresh_keeps_cached_rows(self):
+        widget = HistoryWidget()
+        self.addCleanup(widget.deleteLater)
+        widget.list_widget.addItem("pumps.csv — 2026-10-01 09:00")
+
+        widget.on_history_loaded((False, {"error": "Server unreachable"}))
+
+        self.assertEqual(widget.list_widget.count(), 1)
+        self.assertEqual(widget.list_widget.item(0).text(), "pumps.csv — 2026-10-01 09:00")
+        self.assertEqual(widget.error_label.text(), "Server unreachable")
+        self.assertTrue(widget.refresh_button.isEnabled())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,6 +13,7 @@ from PyQt5.QtWidgets import (
     QGroupBox,
     QMessageBox,
     QTabWidget,
+    QCheckBox,
 )
 from PyQt5.QtCore import Qt
 
@@ -30,6 +31,8 @@ class UploadWindow(QWidget):
         self.setMinimumSize(700, 800)
         self.selected_file = None
         self.current_summary = None
+        self.current_dataset = None
+        self.has_uploaded = False
         self.setup_ui()
         self.load_initial_data()
 
@@ -62,6 +65,14 @@ class UploadWindow(QWidget):
         
         upload_layout.addLayout(file_row)
 
+        # Rows with blank or non-numeric values reject the file unless skipped
+        self.drop_invalid_checkbox = QCheckBox("Skip invalid rows")
+        self.drop_invalid_checkbox.setToolTip(
+            "Upload the valid rows and report how many were skipped, "
+            "instead of rejecting the whole file"
+        )
+        upload_layout.addWidget(self.drop_invalid_checkbox)
+
         # Upload button
         self.upload_button = QPushButton("Upload CSV")
         self.upload_button.clicked.connect(self.upload_csv)
@@ -123,8 +134,30 @@ class UploadWindow(QWidget):
         self.setLayout(main_layout)
 
     def load_initial_data(self):
+        # Draw what was cached on the last run right away, then revalidate.
+        self.history_widget.show_cached()
         self.history_widget.load_history()
 
+        latest = api_client.cached_latest_dataset()
+        if latest:
+            self.show_dataset(latest)
+
+        request = api_client.get_latest_dataset_async()
+        request.finished.connect(self.on_latest_dataset_loaded)
+
+    def on_latest_dataset_loaded(self, result):
+        success, dataset = result
+        # An upload started meanwhile shows its own, newer result.
+        if success and dataset and dataset != self.current_dataset and not self.has_uploaded:
+            self.show_dataset(dataset)
+
+    def show_dataset(self, dataset):
+        self.current_dataset = dataset
+        summary = dataset.get("summary") or {}
+        self.current_summary = summary
+        self.display_analytics(summary)
+        self.charts_widget.update_charts(summary, dataset.get("type_statistics"))
+
     def browse_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Select CSV File", "", "CSV Files (*.csv);;All Files (*)"
@@ -144,17 +177,26 @@ class UploadWindow(QWidget):
         self.upload_button.setEnabled(False)
         self.upload_button.setText("Uploading...")
         self.analytics_text.clear()
+        self.has_uploaded = True
 
-        success, data = api_client.upload_csv(self.selected_file)
+        request = api_client.upload_csv_async(
+            self.selected_file, drop_invalid=self.drop_invalid_checkbox.isChecked()
+        )
+        request.progress.connect(self.on_upload_progress)
+        request.finished.connect(self.on_upload_finished)
+
+    def on_upload_progress(self, stage: str, progress: float):
+        label = "Uploading" if stage == "upload" else "Processing"
+        self.upload_button.setText(f"{label}... {progress:.0%}")
+
+    def on_upload_finished(self, result):
+        success, data = result
 
         self.upload_button.setEnabled(True)
         self.upload_button.setText("Upload CSV")
 
         if success:
-            summary = data.get("summary", {})
-            self.current_summary = summary
-            self.display_analytics(summary)
-            self.charts_widget.update_charts(summary)
+            self.show_dataset(data)
             self.tab_widget.setCurrentIndex(1)
             self.history_widget.load_history()
             
@@ -162,11 +204,23 @@ class UploadWindow(QWidget):
             self.file_label.setText("No file selected")
             self.file_label.setStyleSheet("color: gray;")
             self.upload_button.setEnabled(False)
+        elif isinstance(data, str):
+            QMessageBox.warning(self, "Upload Error", data)
         else:
             error_msg = data.get("error", "Upload failed")
             missing = data.get("missing_columns", [])
             if missing:
                 error_msg += f"\nMissing columns: {', '.join(missing)}"
+            validation = data.get("validation")
+            if validation:
+                error_msg += (
+                    f"\n{validation['invalid_rows']} of {validation['rows_checked']}"
+                    " rows failed validation:"
+                )
+                for error in validation["errors"][:5]:
+                    error_msg += f"\n  Row {error['row']}, {error['column']}: {error['error']}"
+                if not validation["dropped_rows"]:
+                    error_msg += '\n\nTick "Skip invalid rows" to upload only the valid rows.'
             QMessageBox.warning(self, "Upload Error", error_msg)
 
     def display_analytics(self, summary: dict):
@@ -186,6 +240,24 @@ class UploadWindow(QWidget):
         lines.append(f"  Pressure:    {avg_pressure:.2f}" if isinstance(avg_pressure, (int, float)) else f"  Pressure:    {avg_pressure}")
         lines.append(f"  Temperature: {avg_temp:.2f}" if isinstance(avg_temp, (int, float)) else f"  Temperature: {avg_temp}")
         
+        statistics = summary.get("statistics", {})
+        if statistics:
+            lines.extend(["", "--- Dispersion & Percentiles ---"])
+            for param, stats in statistics.items():
+                values = [
+                    f"{key}={stats[key]:.2f}"
+                    for key in ("std", "min", "p50", "p95", "p99", "max")
+                    if isinstance(stats.get(key), (int, float))
+                ]
+                lines.append(f"  {param}: {', '.join(values)}")
+
+        validation = summary.get("validation")
+        if validation:
+            lines.extend([
+                "",
+                f"Note: {validation['dropped_rows']} invalid rows were skipped.",
+            ])
+
         lines.extend(["", "--- Type Distribution ---"])
 
         type_dist = summary.get("type_distribution", {})
@@ -205,7 +277,11 @@ class UploadWindow(QWidget):
         self.pdf_button.setEnabled(False)
         self.pdf_button.setText("Downloading...")
 
-        success, message = api_client.download_pdf(save_path)
+        request = api_client.download_pdf_async(save_path)
+        request.finished.connect(self.on_pdf_downloaded)
+
+    def on_pdf_downloaded(self, result):
+        success, message = result
 
         self.pdf_button.setEnabled(True)
         self.pdf_button.setText("Download Latest PDF Report")
@@ -214,3 +290,8 @@ class UploadWindow(QWidget):
             QMessageBox.information(self, "Success", message)
         else:
             QMessageBox.warning(self, "Download Error", message)
+
+    def closeEvent(self, event):
+        """Stop waiting on in-flight requests when the window closes."""
+        api_client.cancel_all()
+        super().closeEvent(event)
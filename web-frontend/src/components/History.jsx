@@ -20,16 +20,24 @@ function formatLocalTime(isoString) {
   }
 }
 
+/**
+ * One page of history, newest first, without the summary JSON
+ */
+const HISTORY_PARAMS = { page_size: 20, fields: "id,filename,uploaded_at" };
+
 function History() {
   const [datasets, setDatasets] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [error, setError] = useState("");
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const fetchHistory = async () => {
     setLoading(true);
     try {
-      const response = await api.get("/api/history/");
-      setDatasets(response.data);
+      const response = await api.get("/api/history/", { params: HISTORY_PARAMS });
+      setDatasets(response.data.results);
+      setNextCursor(response.data.next_cursor);
       setError("");
     } catch {
       setError("Failed to load history");
@@ -38,6 +46,21 @@ function History() {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await api.get("/api/history/", {
+        params: { ...HISTORY_PARAMS, cursor: nextCursor },
+      });
+      setDatasets((current) => [...current, ...response.data.results]);
+      setNextCursor(response.data.next_cursor);
+    } catch {
+      setError("Failed to load history");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchHistory();
   }, []);
@@ -82,6 +105,13 @@ function History() {
               <span className="history-time">{formatLocalTime(d.uploaded_at)}</span>
             </div>
           ))}
+          {nextCursor && (
+            <div style={{ marginTop: "1rem", textAlign: "center" }}>
+              <button onClick={loadMore} className="btn-secondary" disabled={loadingMore}>
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       )}
 
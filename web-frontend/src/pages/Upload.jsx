@@ -3,11 +3,56 @@ import api from "../api";
 import Charts from "../components/Charts";
 import History from "../components/History";
 
+const JOB_POLL_INTERVAL_MS = 500;
+
+/**
+ * Poll an upload job until the server finishes processing it
+ */
+async function waitForJob(statusUrl, onProgress) {
+  for (;;) {
+    const { data: job } = await api.get(statusUrl);
+    onProgress(job.progress);
+
+    if (job.status === "succeeded") {
+      return { message: "CSV uploaded and analyzed successfully.", summary: job.summary };
+    }
+    if (job.status === "failed") {
+      const error = new Error(job.error?.error || "CSV upload failed");
+      error.response = { data: job.error };
+      throw error;
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+}
+
+// Number of individual validation errors shown under the upload form
+const SHOWN_VALIDATION_ERRORS = 5;
+
+function formatUploadError(data) {
+  const message = data?.error || "CSV upload failed";
+  const validation = data?.validation;
+  if (!validation) return message;
+
+  const lines = [
+    `${message} ${validation.invalid_rows} of ${validation.rows_checked} rows failed validation.`,
+    ...validation.errors
+      .slice(0, SHOWN_VALIDATION_ERRORS)
+      .map((e) => `Row ${e.row}, ${e.column}: ${e.error}${e.value !== null ? ` ("${e.value}")` : ""}`),
+  ];
+  if (!validation.dropped_rows) {
+    lines.push('Tick "Skip invalid rows" to upload only the valid rows.');
+  }
+  return lines.join("\n");
+}
+
 function Upload() {
   const [file, setFile] = useState(null);
   const [result, setResult] = useState(null);
   const [error, setError] = useState("");
   const [loading, setLoading] = useState(false);
+  const [progress, setProgress] = useState(null);
+  const [dropInvalid, setDropInvalid] = useState(false);
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -25,16 +70,23 @@ function Upload() {
 
     try {
       await api.get("/api/csrf/");
-      const response = await api.post("/api/upload-csv/", formData);
-      setResult(response.data);
+      const response = await api.post("/api/upload-csv/", formData, {
+        params: { async: 1, drop_invalid: dropInvalid ? 1 : 0 },
+      });
+      const data =
+        response.status === 202
+          ? await waitForJob(response.data.status_url, setProgress)
+          : response.data;
+      setResult(data);
       setFile(null);
       const fileInput = document.getElementById("csv-file");
       if (fileInput) fileInput.value = "";
     } catch (err) {
       console.error(err);
-      setError(err.response?.data?.error || "CSV upload failed");
+      setError(formatUploadError(err.response?.data));
     } finally {
       setLoading(false);
+      setProgress(null);
     }
   };
 
@@ -66,18 +118,35 @@ function Upload() {
               className="btn-primary"
               disabled={loading || !file}
             >
-              {loading ? "Uploading..." : "Upload and Analyze"}
+              {loading
+                ? progress === null
+                  ? "Uploading..."
+                  : `Processing... ${Math.round(progress * 100)}%`
+                : "Upload and Analyze"}
             </button>
           </div>
+          <label style={{ display: "block", marginTop: "1rem" }}>
+            <input
+              type="checkbox"
+              checked={dropInvalid}
+              onChange={(e) => setDropInvalid(e.target.checked)}
+            />{" "}
+            Skip invalid rows
+          </label>
         </form>
 
-        {error && <div className="error-message" style={{ marginTop: "1.5rem" }}>{error}</div>}
+        {error && <div className="error-message" style={{ marginTop: "1.5rem", whiteSpace: "pre-line" }}>{error}</div>}
       </section>
 
       {/* Analytics Results */}
       {result && (
         <section className="card">
           <h2>Analytics Results</h2>
+          {result.summary.validation && (
+            <p style={{ color: "var(--text-muted)" }}>
+              {result.summary.validation.dropped_rows} invalid rows were skipped.
+            </p>
+          )}
 
           {/* Stats Grid */}
           <div className="stats-grid">